@@ -1,15 +1,35 @@
-from flolang.lexer import tokenize
+from flolang.lexer import tokenize, iter_tokens
 from flolang.abstract_source_tree import Parser
 from flolang.interpreter import interpret
 from flolang.native import create_default_environment as default_environment, to_native
 from flolang.debugtools import print_ast
+from flolang.optimizer import optimize, INLINE_SIZE
+import flolang.closure as closure
+import flolang.intermediate as intermediate
+import flolang.transpiler as transpiler
 
 
-def parse(tok):
-    return Parser().parse(tok)
+# execution engines, 'tree' walks the AST, 'closure' runs it compiled to python closures,
+# 'vm' compiled to bytecode and 'py' transpiled to python code
+engines = {"tree": interpret, "closure": closure.execute, "vm": intermediate.execute, "py": transpiler.execute}
+default_engine = "tree"
 
 
-def eval(expression: str, env=None, filename="__runtime__", shebang="#!script"):
+# lazy: parse function bodies on first use, see Parser
+# workers: parse in parallel with that many processes
+def parse(tok, lazy=False, workers=1):
+    return Parser(lazy, workers).parse(tok)
+
+
+# inline_size: the largest function expression inlined, 0 inlines nothing. None does not
+# optimize at all, see flolang.optimizer
+def execute(ast, env, engine=None, inline_size=INLINE_SIZE):
+    if inline_size is not None:
+        optimize(ast, env, inline_size)
+    return engines[engine or default_engine](ast, env)
+
+
+def eval(expression: str, env=None, filename="__runtime__", shebang="#!script", engine=None, inline_size=INLINE_SIZE):
     if shebang:
         full_expression = shebang + "\n" + expression
     else:
@@ -19,7 +39,7 @@ def eval(expression: str, env=None, filename="__runtime__", shebang="#!script"):
     print_ast(ast)  # TODO: remove this and make a test which does execute it
     if not env:
         env = default_environment()
-    val = interpret(ast, env)
+    val = execute(ast, env, engine, inline_size)
     # IntermediateEmitter(ast)
     return to_native(val)
 
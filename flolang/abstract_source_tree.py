@@ -1,25 +1,31 @@
 
 import flolang.lexer as lexer
 from flolang.lexer import Token
-from flolang.error import error_token, parser_error, LocationError
-from typing import Any
+from flolang.error import error_token, parser_error, LocationError, ParserError, TokenError
+import concurrent.futures
+import io
+import pickle
+from typing import Any, Callable, Iterable, Iterator, Sequence
 
 
 class Location:
+    __slots__ = ("start", "end", "is_multiline")
+
     def __init__(self, start: Token, end: Token, is_multiline):
         self.start = start
         self.end = end
         self.is_multiline = is_multiline
 
     def __repr__(self):
-        line = self.start.symbols.line
-        start = self.start.symbols.line_pos
-        end = self.end.symbols.line_pos
+        # the source line is looked up in the line table of the token only here
+        line = self.start.line
+        start = self.start.line_pos
+        end = self.end.line_pos
         if self.start is self.end and isinstance(self.start.value, str):
-            end = self.start.symbols.line_pos + len(self.start.value) - 1
+            end = self.start.line_pos + len(self.start.value) - 1
             if start > end:
                 end = start
-        if self.start.symbols.line_nr < self.end.symbols.line_nr:
+        if self.start.line_nr < self.end.line_nr:
             # multiline by accident, but fine
             # some of those are hard to catch
             end = len(line)
@@ -33,6 +39,8 @@ class Location:
 
 
 class NoLocation(Location):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(None, None, False)
 
@@ -40,16 +48,39 @@ class NoLocation(Location):
         return "?"
 
 
+# shared by all nodes without a location, never modified
+NO_LOCATION = NoLocation()
+
+
+# AST nodes have __slots__ and no instance __dict__, a tree with millions of
+# nodes is a fraction of the size. The node name 'kind' is a class attribute
+# and '_fields' lists the attributes printed by json() in declaration order.
+# '_children' are the fields holding nodes (a node, a list of nodes or None) in
+# source order, see walk(..) and NodeVisitor.
 class Statement:
+    __slots__ = ("loc",)
+    kind = "Statement"
+    _fields: tuple[str, ...] = ()
+    _children: tuple[str, ...] = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if "kind" not in cls.__dict__:
+            cls.kind = cls.__name__
+        slots = cls.__dict__.get("__slots__", ())
+        cls._fields = cls._fields + tuple(f for f in slots if not f.startswith("_") and f not in cls._fields)
+
     def __init__(self):
-        self.kind = type(self).__name__
-        self.loc = NoLocation()
+        self.loc: Location = NO_LOCATION
 
     def __repr__(self):
         return str(self.json())
 
     def json(self):
-        return vars(self)
+        data = {"kind": self.kind, "loc": self.loc}
+        for field in self._fields:
+            data[field] = getattr(self, field)
+        return data
 
     def location(self, start: Token, end: Token, multiline=False):
         self.loc = Location(start, end, multiline)
@@ -57,14 +88,21 @@ class Statement:
 
 
 class Expression(Statement):
-    pass
+    __slots__ = ()
 
 
+# '_incremental' is set on a program of the IncrementalParser, its statements are used again
+# after an edit, see optimizer
 class Program(Statement):
+    __slots__ = ("body", "shebang", "_incremental")
+    _incremental: bool
+    _children = ("shebang", "body")
+
     def __init__(self):
         super().__init__()
         self.body = []
         self.shebang = None
+        self._incremental = False
 
     def add(self, stmt: Statement):
         if isinstance(stmt, ShebangExpression):
@@ -75,6 +113,9 @@ class Program(Statement):
 
 
 class Type(Statement):
+    __slots__ = ("type", "templates", "is_array", "number")
+    _children = ("templates", "number")
+
     def __init__(self, typename: str, templates: list[Expression] = [], is_array: bool = False, number_elements: Expression | None = None):
         super().__init__()
         self.type = typename
@@ -84,6 +125,9 @@ class Type(Statement):
 
 
 class VariableDeclaration(Statement):
+    __slots__ = ("mutable", "dynamic", "type", "identifier", "value", "is_global")
+    _children = ("type", "value")
+
     def __init__(self, mutable: bool, dynamic: bool, type: Type, identifier: str, value: Expression, is_global=False):
         super().__init__()
         self.mutable = mutable
@@ -95,6 +139,9 @@ class VariableDeclaration(Statement):
 
 
 class ParameterStatement(Statement):
+    __slots__ = ("mutable", "type", "identifier", "default")
+    _children = ("type", "default")
+
     def __init__(self, mutable: bool, type: Type, identifier: str, default: Expression | None = None):
         super().__init__()
         self.mutable = mutable
@@ -104,12 +151,65 @@ class ParameterStatement(Statement):
 
 
 class BlockStatement(Statement):
+    __slots__ = ("body",)
+    _children = ("body",)
+
     def __init__(self, body: list[Statement]):
         super().__init__()
         self.body = body
 
 
+# indented function body of a lazy parse, see Parser(lazy=True).
+# Only the tokens of the block are kept, the statements are parsed the first
+# time the body is used (called, compiled or printed).
+class LazyBlockStatement(BlockStatement):
+    __slots__ = ("_tokens", "_body", "_on_parse")
+    kind = "BlockStatement"  # looks like any other block
+
+    def __init__(self, tokens: list[Token]):
+        Statement.__init__(self)
+        self._tokens = tokens  # BLOCKSTART .. BLOCKEND and the token following it
+        self._body: list[Statement] | None = None
+        self._on_parse: Callable[[LazyBlockStatement], Any] | None = None  # called once parsed, see optimizer
+
+    @property
+    def body(self) -> list[Statement]:
+        if self._body is None:
+            self._parse()
+        return self._body  # type: ignore[return-value]
+
+    @body.setter
+    def body(self, body: list[Statement]):
+        self._body = body
+
+    def is_parsed(self) -> bool:
+        return self._body is not None
+
+    def _parse(self):
+        # a syntax error leaves the body unparsed, it is reported again on the next use
+        parser = Parser(lazy=True)
+        parser.tokens = self._tokens
+        block = parser.parse_block_declaration()
+        self._body = block.body
+        self._tokens = []
+        on_parse = self._on_parse
+        if on_parse is not None:
+            self._on_parse = None
+            on_parse(self)
+
+    def json(self):
+        try:
+            body = self.body
+        except (ParserError, TokenError) as e:
+            # a syntax error in the body shows up only now. Print it instead of the body.
+            return {"kind": self.kind, "loc": self.loc, "error": str(e)}
+        return {"kind": self.kind, "loc": self.loc, "body": body}
+
+
 class FunctionDeclaration(Statement):
+    __slots__ = ("parameters", "result", "identifier", "body")
+    _children = ("parameters", "result", "body")
+
     def __init__(self, parameters: list[ParameterStatement], result: Type, identifier: str, body: BlockStatement):
         super().__init__()
         self.parameters = parameters
@@ -119,10 +219,13 @@ class FunctionDeclaration(Statement):
 
 
 class ClassMemberFunctionDeclaration(FunctionDeclaration):
-    pass
+    __slots__ = ()
 
 
 class ClassDeclaration(Statement):
+    __slots__ = ("classname", "functions", "variables")
+    _children = ("functions", "variables")
+
     def __init__(self, classname: str,
                  functions: list[ClassMemberFunctionDeclaration],
                  variables: list[VariableDeclaration]):
@@ -133,6 +236,9 @@ class ClassDeclaration(Statement):
 
 
 class EnumFieldDeclaration(Statement):
+    __slots__ = ("identifier", "value")
+    _children = ("value",)
+
     def __init__(self, identifier: str, value: Expression | None = None):
         super().__init__()
         self.identifier = identifier
@@ -140,6 +246,9 @@ class EnumFieldDeclaration(Statement):
 
 
 class EnumDeclaration(Statement):
+    __slots__ = ("enumname", "fields")
+    _children = ("fields",)
+
     def __init__(self, enumname: str, fields: list[EnumFieldDeclaration]):
         super().__init__()
         self.enumname = enumname
@@ -147,12 +256,17 @@ class EnumDeclaration(Statement):
 
 
 class AllocatorSwitch(Statement):
+    __slots__ = ("identifier",)
+
     def __init__(self, identifier: str):
         super().__init__()
         self.identifier = identifier
 
 
 class ElvisExpression(Statement):
+    __slots__ = ("test", "consequent", "alternate")
+    _children = ("test", "consequent", "alternate")
+
     def __init__(self, condition: Expression, consequent: Statement, alternate: Statement):
         super().__init__()
         self.test = condition
@@ -161,6 +275,9 @@ class ElvisExpression(Statement):
 
 
 class IfExpression(Statement):
+    __slots__ = ("test", "consequent", "alternate")
+    _children = ("test", "consequent", "alternate")
+
     def __init__(self, condition: Expression, consequent: BlockStatement, alternate: BlockStatement | None = None):
         super().__init__()
         self.test = condition
@@ -169,6 +286,9 @@ class IfExpression(Statement):
 
 
 class ForExpression(Statement):
+    __slots__ = ("type", "identifier", "body", "quantity_min", "quantity_max")
+    _children = ("type", "quantity_min", "quantity_max", "body")
+
     def __init__(self, type: Type, identifier: str, body: BlockStatement, quantity_min: Expression, quantity_max: Expression):
         super().__init__()
         self.type = type
@@ -179,6 +299,9 @@ class ForExpression(Statement):
 
 
 class WhileExpression(Statement):
+    __slots__ = ("condition", "body")
+    _children = ("condition", "body")
+
     def __init__(self, condition: Expression, body: BlockStatement):
         super().__init__()
         self.condition = condition
@@ -186,33 +309,47 @@ class WhileExpression(Statement):
 
 
 class ReturnExpression(Statement):
+    __slots__ = ("value",)
+    _children = ("value",)
+
     def __init__(self, value: Expression | None = None):
         super().__init__()
         self.value = value
 
 
 class BreakExpression(Statement):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__()
 
 
 class ContinueExpression(Statement):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__()
 
 
 class UnreachableExpression(Statement):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__()
 
 
 class DeleteExpression(Statement):
+    __slots__ = ("identifier",)
+
     def __init__(self, identifier: str):
         super().__init__()
         self.identifier = identifier
 
 
 class AssignmentExpression(Expression):
+    __slots__ = ("assignee", "value", "operator")
+    _children = ("assignee", "value")
+
     def __init__(self, assignee: Expression, value: Expression, operator: str):
         super().__init__()
         self.assignee = assignee
@@ -221,6 +358,9 @@ class AssignmentExpression(Expression):
 
 
 class BinaryExpression(Expression):
+    __slots__ = ("left", "right", "operator")
+    _children = ("left", "right")
+
     def __init__(self, left: Expression, right: Expression, operator: str):
         super().__init__()
         self.left = left
@@ -229,6 +369,9 @@ class BinaryExpression(Expression):
 
 
 class UnaryBeforeExpression(Expression):
+    __slots__ = ("expr", "operator")
+    _children = ("expr",)
+
     def __init__(self, expr: Expression, operator: str):
         super().__init__()
         self.expr = expr
@@ -236,6 +379,8 @@ class UnaryBeforeExpression(Expression):
 
 
 class UnaryIdentifierBeforeExpression(Expression):
+    __slots__ = ("identifier", "operator")
+
     def __init__(self, identifier: str, operator: str):
         super().__init__()
         self.identifier = identifier
@@ -243,20 +388,44 @@ class UnaryIdentifierBeforeExpression(Expression):
 
 
 class UnaryIdentifierAfterExpression(Expression):
+    __slots__ = ("identifier", "operator")
+
     def __init__(self, identifier: str, operator: str):
         super().__init__()
         self.identifier = identifier
         self.operator = operator
 
 
+# '_callee' is the inline cache of the tree interpreter, set on the first call
 class CallExpression(Expression):
+    __slots__ = ("caller", "arguments", "_callee")
+    _callee: Any
+    _children = ("caller", "arguments")
+
     def __init__(self, caller: Expression, arguments: list[Expression]):
         super().__init__()
         self.caller = caller
         self.arguments = arguments
 
 
+# a call replaced with the expression of the function, see optimizer. The expression gives the
+# result while the caller is the function of '_declaration', else the call runs.
+class InlinedCallExpression(Expression):
+    __slots__ = ("call", "expression", "_declaration")
+    _declaration: Any
+    _children = ("call", "expression")
+
+    def __init__(self, call: CallExpression, expression: Expression, declaration: Any):
+        super().__init__()
+        self.call = call
+        self.expression = expression
+        self._declaration = declaration
+
+
 class MemberExpression(Expression):
+    __slots__ = ("object", "key", "computed")
+    _children = ("object", "key")
+
     def __init__(self, object: Expression, key: Expression, computed: bool):
         super().__init__()
         self.object = object
@@ -265,26 +434,34 @@ class MemberExpression(Expression):
 
 
 class ShebangExpression(Expression):
+    __slots__ = ("shebang",)
+
     def __init__(self, shebang: str):
         super().__init__()
         self.shebang = shebang
 
 
 class Literal(Expression):
-    pass
+    __slots__ = ()
 
 
 class _SimpleLiteral(Literal):
-    pass
+    __slots__ = ()
 
 
 class Identifier(_SimpleLiteral):
+    __slots__ = ("symbol",)
+
     def __init__(self, symbol: str):
         super().__init__()
         self.symbol = symbol
 
 
+# '_constant' is the runtime value of a literal, made by the interpreter on the first evaluation
 class NumericLiteral(_SimpleLiteral):
+    __slots__ = ("value_raw", "value", "_constant")
+    _constant: Any
+
     def __init__(self, value_raw: str):
         super().__init__()
         self.value_raw = value_raw
@@ -295,6 +472,9 @@ class NumericLiteral(_SimpleLiteral):
 
 
 class FloatLiteral(_SimpleLiteral):
+    __slots__ = ("value_raw", "value", "_constant")
+    _constant: Any
+
     def __init__(self, value_raw: str):
         super().__init__()
         self.value_raw = value_raw
@@ -302,6 +482,9 @@ class FloatLiteral(_SimpleLiteral):
 
 
 class StringLiteral(_SimpleLiteral):
+    __slots__ = ("value", "_constant")
+    _constant: Any
+
     def __init__(self, value: str):
         super().__init__()
         self.value = value
@@ -311,6 +494,9 @@ class StringLiteral(_SimpleLiteral):
 
 
 class ObjectProperty(Literal):
+    __slots__ = ("key", "value")
+    _children = ("value",)
+
     def __init__(self, key: str, value: Expression | None = None):
         super().__init__()
         self.key = key
@@ -318,12 +504,18 @@ class ObjectProperty(Literal):
 
 
 class ObjectLiteral(Literal):
+    __slots__ = ("properties",)
+    _children = ("properties",)
+
     def __init__(self, properties: list[ObjectProperty]):
         super().__init__()
         self.properties = properties
 
 
 class ListLiteral(Literal):
+    __slots__ = ("values",)
+    _children = ("values",)
+
     def __init__(self, values: list[Expression]):
         super().__init__()
         self.values = values
@@ -335,30 +527,346 @@ class ListLiteral(Literal):
 #         self.values = values
 
 
-class Parser:
+# Nodes of the static scope resolution, see flolang.resolver. A resolved block knows the
+# slots of the variables declared in it, a resolved variable use knows the environment
+# ('depth' environments up from the using one) and the slot of its declaration. The slot
+# is None for a variable of the program environment, which keeps them by name. A block
+# without names declares no variable and runs in the environment of its parent.
+# They keep the 'kind' of the node they replace and are interpreted like it by everyone
+# except the tree interpreter.
+class ScopeBlockStatement(BlockStatement):
+    __slots__ = ("names", "mutables", "interrupts")
+    kind = "BlockStatement"
+
+    def __init__(self, body: list[Statement], names: dict[str, int] | None, mutables: int, interrupts: bool = True):
+        super().__init__(body)
+        self.names = names  # variable name to slot
+        self.mutables = mutables  # bit of a slot is set if the variable is mutable
+        self.interrupts = interrupts  # a 'break', 'continue' or 'return' can leave the block
+
+
+# the body of a function, with the slots of the parameters in the environment of the call
+class ScopeFunctionBody(ScopeBlockStatement):
+    __slots__ = ("parameter_names", "parameter_mutables")
+    kind = "BlockStatement"
+
+    def __init__(self, body: list[Statement], names: dict[str, int] | None, mutables: int, interrupts: bool, parameter_names: dict[str, int], parameter_mutables: int):
+        super().__init__(body, names, mutables, interrupts)
+        self.parameter_names = parameter_names
+        self.parameter_mutables = parameter_mutables
+
+
+# the loop variable is slot 0 of the environment of the loop. A loop with names None makes no
+# environment, its variable is not bound.
+class ScopeForExpression(ForExpression):
+    __slots__ = ("names",)
+    kind = "ForExpression"
+
+    def __init__(self, type: Type, identifier: str, body: BlockStatement, quantity_min: Expression, quantity_max: Expression,
+                 bound: bool = True):
+        super().__init__(type, identifier, body, quantity_min, quantity_max)
+        self.names: dict[str, int] | None = {identifier: 0} if bound else None
+
+
+class SlotVariableDeclaration(VariableDeclaration):
+    __slots__ = ("slot",)
+    kind = "VariableDeclaration"
+
+    def __init__(self, mutable: bool, dynamic: bool, type: Type, identifier: str, value: Expression, is_global: bool, slot: int):
+        super().__init__(mutable, dynamic, type, identifier, value, is_global)
+        self.slot = slot
+
+
+class SlotIdentifier(Identifier):
+    __slots__ = ("depth", "slot")
+    kind = "Identifier"
+
+    def __init__(self, symbol: str, depth: int, slot: int | None):
+        super().__init__(symbol)
+        self.depth = depth
+        self.slot = slot
+
+
+class SlotAssignmentExpression(AssignmentExpression):
+    __slots__ = ("depth", "slot")
+    kind = "AssignmentExpression"
+
+    def __init__(self, assignee: Identifier, value: Expression, operator: str, depth: int, slot: int | None):
+        super().__init__(assignee, value, operator)
+        self.depth = depth
+        self.slot = slot
+
+
+class SlotUnaryIdentifierBeforeExpression(UnaryIdentifierBeforeExpression):
+    __slots__ = ("depth", "slot")
+    kind = "UnaryIdentifierBeforeExpression"
+
+    def __init__(self, identifier: str, operator: str, depth: int, slot: int | None):
+        super().__init__(identifier, operator)
+        self.depth = depth
+        self.slot = slot
+
+
+class SlotUnaryIdentifierAfterExpression(UnaryIdentifierAfterExpression):
+    __slots__ = ("depth", "slot")
+    kind = "UnaryIdentifierAfterExpression"
+
+    def __init__(self, identifier: str, operator: str, depth: int, slot: int | None):
+        super().__init__(identifier, operator)
+        self.depth = depth
+        self.slot = slot
+
+
+# Tree traversal. The child nodes of a node are found through the '_children' of its class.
+# Nothing here is recursive, so deeply nested code does not reach the python recursion limit.
+# Function bodies of a lazy parse are parsed when they are visited.
+
+def iter_children(node: Statement) -> Iterator[Statement]:
+    # the direct child nodes in source order
+    for field in node._children:
+        value = getattr(node, field)
+        if isinstance(value, list):
+            yield from value
+        elif value is not None:
+            yield value
+
+
+def walk(node: Statement) -> Iterator[Statement]:
+    # the node and all nodes below it, depth first in source order
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        yield node
+        children = list(iter_children(node))
+        children.reverse()
+        stack.extend(children)
+
+
+class NodeVisitor:
+    # visit(node) calls the method visit_<kind>(node) for every node of the tree, depth first
+    # in source order. A node without such a method goes to generic_visit(node).
+    # If the method returns False the nodes below are not visited.
     def __init__(self):
-        self.tokens: list[Token]  # tokens from lexer
+        self._methods: dict[type[Statement], Callable[[Statement], Any]] = {}
+
+    def _method(self, cls: type[Statement]) -> Callable[[Statement], Any]:
+        if cls in self._methods:
+            return self._methods[cls]
+        method = getattr(self, "visit_" + cls.kind, self.generic_visit)
+        self._methods[cls] = method
+        return method
+
+    def visit(self, node: Statement):
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if self._method(type(node))(node) is not False:
+                children = list(iter_children(node))
+                children.reverse()
+                stack.extend(children)
+
+    def generic_visit(self, node: Statement) -> Any:
+        pass
+
+
+class NodeTransformer(NodeVisitor):
+    # visit(node) calls visit_<kind>(node) for every node of the tree after the nodes below it
+    # are done (depth first, bottom up). The node is replaced with what the method returns.
+    # None removes a node from a list, in a single child field it sets None.
+    # generic_visit(node) keeps the node. Gives the replacement of the root node.
+    def visit(self, node: Statement) -> Any:
+        results: list[Any] = []
+        stack: list[tuple[Statement, bool]] = [(node, False)]
+        while stack:
+            node, children_done = stack.pop()
+            if not children_done:
+                stack.append((node, True))
+                children = list(iter_children(node))
+                children.reverse()
+                stack.extend((child, False) for child in children)
+                continue
+            # the results of the children are on top, in source order
+            count = 0
+            for field in node._children:
+                value = getattr(node, field)
+                if isinstance(value, list):
+                    count += len(value)
+                elif value is not None:
+                    count += 1
+            if count:
+                replaced = results[-count:]
+                del results[-count:]
+                index = 0
+                for field in node._children:
+                    value = getattr(node, field)
+                    if isinstance(value, list):
+                        elements = replaced[index:index + len(value)]
+                        index += len(value)
+                        setattr(node, field, [element for element in elements if element is not None])
+                    elif value is not None:
+                        setattr(node, field, replaced[index])
+                        index += 1
+            results.append(self._method(type(node))(node))
+        return results[0]
+
+    def generic_visit(self, node: Statement) -> Any:
+        return node
+
+
+# Token source for the parser pulling the tokens lazily from a generator like lexer.iter_tokens(..).
+# Indexed with the absolute token position like a list. Tokens are pulled from the
+# generator when first looked at and kept until the parser releases them.
+class TokenStream:
+    def __init__(self, tokens: Iterator[Token]):
+        self._source = tokens
+        self._buffer: list[Token] = []
+        self._offset = 0  # absolute position of self._buffer[0]
+
+    def __getitem__(self, index: int) -> Token:
+        i = index - self._offset
+        if i < 0:
+            raise IndexError("TokenStream token %d was already released." % index)
+        buffer = self._buffer
+        while i >= len(buffer):
+            try:
+                buffer.append(next(self._source))
+            except StopIteration:
+                raise IndexError("TokenStream reached end of tokens.")
+        return buffer[i]
+
+    def release(self, index: int):
+        # tokens before index are not looked at anymore
+        if index > self._offset:
+            del self._buffer[:index - self._offset]
+            self._offset = index
+
+
+# part of a token the parser reads as two, like '>>' closing two templates.
+# The position is the one of the original token, also when lexer.IncrementalTokenizer renumbers it.
+class _SplitToken(Token):
+    __slots__ = ("original",)
+
+    def __init__(self, original: Token, type: int | str):
+        self.original = original
+        self.type = type
+        self.value = None
+        self.table = original.table
+        self.line_pos = original.line_pos
+
+    @property
+    def line_nr(self) -> int:  # type: ignore[override]
+        return self.original.line_nr
+
+    def __reduce__(self):
+        return _SplitToken, (self.original, self.type)
+
+
+# binding power of the binary operators, higher binds stronger.
+# All binary operators are left associative.
+_binary_precedence: dict[int | str, int] = {
+    lexer.OR: 1,
+    lexer.AND: 2,
+    lexer.BITOR: 3,
+    lexer.XOR: 4,
+    lexer.BITAND: 5,
+    lexer.COMPARE: 6, lexer.NOTCOMPARE: 6, lexer.ISNOT: 6, lexer.IS: 6,
+    lexer.BIGGEREQ: 7, lexer.SMALLEREQ: 7, lexer.BIGGER: 7, lexer.SMALLER: 7,
+    lexer.SHIFTRIGHT: 8, lexer.SHIFTLEFT: 8,
+    lexer.PLUS: 9, lexer.MINUS: 9,
+    lexer.MUL: 10, lexer.DIV: 10, lexer.MOD: 10, lexer.INTDIV: 10,
+    lexer.POW: 11,
+}
+_assignment_operators = frozenset([lexer.ASSIGN, lexer.ASSIGNADD, lexer.ASSIGNSUB, lexer.ASSIGNMUL, lexer.ASSIGNDIV,
+                                   lexer.ASSIGNREM, lexer.ASSIGNBITAND, lexer.ASSIGNBITXOR, lexer.ASSIGNBITOR,
+                                   lexer.ASSIGNBITSHIFTL, lexer.ASSIGNBITSHIFTR])
+_unary_before_operators = frozenset([lexer.NOT, lexer.BITNOT, lexer.PLUS, lexer.MINUS])
+_increment_operators = frozenset([lexer.INCREMENT, lexer.DECREMENT])
+_member_operators = frozenset([lexer.DOT, lexer.SQUARE_L])
+_postfix_operators = frozenset([lexer.DOT, lexer.SQUARE_L, lexer.COURVE_L, lexer.INCREMENT, lexer.DECREMENT])
+
+
+# the single token expressions
+_primary_nodes: dict[int | str, Callable[[Any], Expression]] = {
+    lexer.IDENTIFIER: Identifier,
+    lexer.NUMBER: NumericLiteral,
+    lexer.FLOAT: FloatLiteral,
+    lexer.STRING: StringLiteral,
+}
+
+
+class Parser:
+    # lazy: function bodies are parsed on first use, see LazyBlockStatement.
+    #       Syntax errors in them are then only reported at that time.
+    # workers: with workers > 1 large token lists are parsed in parallel by that many processes.
+    #          All syntax errors are reported, but the indented function bodies come back lazy.
+    def __init__(self, lazy=False, workers=1):
+        self.lazy = lazy
+        self.workers = workers
+        self.tokens: Sequence[Token] | TokenStream  # tokens from lexer, never modified
+        self.pos = 0  # cursor, index of the next token in self.tokens
+        self._pending: Token | None = None  # token in front of the cursor, see split_token(..)
         self._last_eaten = None
 
     def not_eof(self) -> bool:
-        return self.tokens[0].type is not lexer.EOF
+        return (self._pending or self.tokens[self.pos]).type is not lexer.EOF
 
     def at(self) -> Token:
-        return self.tokens[0]
+        return self._pending or self.tokens[self.pos]
 
     def at_last(self) -> Token:
         return self._last_eaten
 
+    # look k tokens ahead, peek(0) is the same as at().
+    # Looking beyond the end gives the EOF token.
+    def peek(self, k: int = 1) -> Token:
+        if self._pending:
+            if k == 0:
+                return self._pending
+            k -= 1
+        index = self.pos + k
+        while True:
+            try:
+                return self.tokens[index]
+            except IndexError:
+                if index <= self.pos:
+                    raise
+                index -= 1
+
     def eat(self) -> Token:
-        self._last_eaten = self.tokens.pop(0)
-        return self._last_eaten
+        tok = self._pending
+        if tok:
+            self._pending = None
+        else:
+            tok = self.tokens[self.pos]
+            self.pos += 1
+        self._last_eaten = tok
+        return tok
 
     def backtrack(self):
-        if not self._last_eaten:
+        tok = self._last_eaten
+        if not tok:
             raise Exception("Cannot backtrack.")
-        self.tokens.insert(0, self._last_eaten)
+        if tok is not self.tokens[self.pos - 1]:
+            self._pending = tok  # was the half of a split '>>'
+        else:
+            self.pos -= 1
         self._last_eaten = None
 
+    # remember the cursor to go back to it with restore(..)
+    def mark(self) -> tuple[int, Token | None, Token | None]:
+        return self.pos, self._pending, self._last_eaten
+
+    def restore(self, mark: tuple[int, Token | None, Token | None]):
+        self.pos, self._pending, self._last_eaten = mark
+
+    # eat the token at the cursor and continue with the two given tokens instead.
+    # Used to read '>>' as '>' '>'. The token sequence itself is not modified.
+    def split_token(self, first: Token, second: Token) -> Token:
+        self.eat()
+        self._pending = second
+        self._last_eaten = first
+        return first
+
     def eat_expect(self, token_type: int | str, error_comment: str, loc_start: Token) -> Token:
         prev = self.eat()
         if prev.type is not token_type:
@@ -386,46 +894,100 @@ class Parser:
             error_token("Unimplemented token encuntered in Source Code.", self.at())
         error_token("Unimplemented token encountered and End of File reached.", self.at())
 
+    # skip the indented block at the cursor and give its tokens together with the one
+    # following it. Gives None (and does not move) if the block does not end.
+    def _skip_block(self) -> list[Token] | None:
+        tokens = self.tokens
+        start = self.pos
+        index = start
+        depth = 0
+        while True:
+            type = tokens[index].type
+            if type is lexer.BLOCKSTART:
+                depth += 1
+            elif type is lexer.BLOCKEND:
+                depth -= 1
+                if depth == 0:
+                    break
+            elif type is lexer.EOF:
+                return None
+            index += 1
+        # the lexer always ends with EOF, so there is a token following the BLOCKEND
+        if isinstance(tokens, TokenStream):
+            block = [tokens[i] for i in range(start, index + 2)]
+        else:
+            block = list(tokens[start:index + 2])
+        self.pos = index + 1
+        self._last_eaten = tokens[index]
+        return block
+
     # make the AST (Abstract Syntax Tree)
-    def parse(self, tokens: list[Token]) -> Program:
-        self.tokens = tokens
-        program = Program().location(tokens[0], tokens[-1])
+    # tokens can be a list/tuple or any iterable of tokens, e.g. lexer.iter_tokens(..)
+    # which is then consumed lazily. A list is only read, never modified.
+    def parse(self, tokens: Iterable[Token]) -> Program:
+        if self.workers > 1:
+            if not isinstance(tokens, (list, tuple)):
+                tokens = list(tokens)
+            # the workers tokenize the lines again, so all tokens need to come from one source
+            table = tokens[0].table
+            if table is tokens[-1].table and isinstance(table.lines, list):
+                chunks = _split_top_level(tokens, self.workers * 4)
+                if len(chunks) > 1:
+                    return self._parse_parallel(tokens, table.lines, chunks)
+        stream = None
+        if isinstance(tokens, (list, tuple)):
+            self.tokens = tokens
+        else:
+            self.tokens = stream = TokenStream(iter(tokens))
+        self.pos = 0
+        self._last_eaten = None
+        program = Program()
         self.program = program
+        start = self.at()
         # parse until there is nothing left
         while self.not_eof():
             program.add(self.parse_statement())
-        return program
+            if stream:
+                # a finished top level statement is never looked at again
+                stream.release(self.pos - 1)
+        # the program ends with the EOF token
+        return program.location(start, self.at())
+
+    def _parse_parallel(self, tokens: Sequence[Token], lines: list[str], chunks: list[tuple[int, int]]) -> Program:
+        self.tokens = tokens
+        self._last_eaten = None
+        program = Program()
+        self.program = program
+        filename = tokens[0].filename
+        with concurrent.futures.ProcessPoolExecutor(max_workers=self.workers) as pool:
+            futures = []
+            for start, end in chunks:
+                # the token following the chunk is included, the parser looks at it to end the last statement
+                first_line = tokens[start].line_nr
+                is_last = end == len(tokens) - 1
+                last_line = len(lines) - 1 if is_last else tokens[end].line_nr
+                futures.append(pool.submit(_parse_chunk, filename, first_line, lines[first_line:last_line + 1],
+                                           end - start + 1, is_last))
+            # results are taken in order, so the first error in the source is raised
+            for (start, end), future in zip(chunks, futures):
+                data = future.result()
+                if data is None:
+                    # a statement did not end inside of its chunk, continue without workers
+                    for f in futures:
+                        f.cancel()
+                    self.pos = start
+                    while self.not_eof():
+                        program.add(self.parse_statement())
+                    break
+                for stmt in _ChunkUnpickler(io.BytesIO(data), tokens, start).load():
+                    program.add(stmt)
+        self.pos = len(tokens) - 1
+        return program.location(tokens[0], self.at())
 
     def parse_statement(self) -> Statement:
-        type = self.at().type
-        if type is lexer.LET or type is lexer.STATIC:
-            return self.parse_variable_declaration()
-        if type is lexer.FUNCTION:
-            return self.parse_function_declaration()
-        if type is lexer.IF:
-            return self.parse_if_declaration()
-        if type is lexer.FOR:
-            return self.parse_for_loop_declaration()
-        if type is lexer.WHILE:
-            return self.parse_while_loop_declatation()
-        if type is lexer.RETURN:
-            return self.parse_return_declaration()
-        if type is lexer.BREAK:
-            return self.parse_break_declaration()
-        if type is lexer.CONTINUE:
-            return self.parse_continue_declaration()
-        if type is lexer.SHEBANG:
-            return self.parse_shebang()
-        if type is lexer.CLASS:
-            return self.parse_class()
-        if type is lexer.ENUM:
-            return self.parse_enum()
-        if type is lexer.ALLOC:
-            return self.parse_alloc()
-        if type is lexer.UNREACHABLE:
-            return self.parse_unreachable_declaration()
-        if type is lexer.DELETE:
-            return self.parse_delete_declaration()
+        parse = self._statement_parsers.get(self.at().type)
+        if parse:
+            return parse(self)
         return self.parse_expression()
 
     # let a = (...)
@@ -498,7 +1060,14 @@ class Parser:
         #                     ^
         self.eat_expect(lexer.COLON, "Expect '%s' following function declaration." % lexer.COLON, loc_start)
 
-        body = self.parse_block_declaration()
+        body = None
+        if self.lazy and self.at().type is lexer.BLOCKSTART:
+            block_start = self.at()
+            tokens = self._skip_block()
+            if tokens:
+                body = LazyBlockStatement(tokens).location(block_start, self.at(), multiline=True)
+        if body is None:
+            body = self.parse_block_declaration()
 
         if class_member_function:
             return ClassMemberFunctionDeclaration(args, type, identifier, body).location(loc_start, self.at())
@@ -642,9 +1211,9 @@ class Parser:
                     # everything else could be a constant expression.
                     # let type<100> varname = (...)
                     #          ^^^
-                    # this needs to be of type parse_additive_expr or higher prescidence. this
-                    # is that it does not interfere with the '>' which is shared with the logic syntax.
-                    template = self.parse_additive_expr()
+                    # this needs to be of additive or higher prescidence. this is that
+                    # it does not interfere with the '>' which is shared with the logic syntax.
+                    template = self.parse_binary_expr(_binary_precedence[lexer.PLUS])
                 templates.append(template)
 
                 # let type<T> varname = (...)
@@ -660,11 +1229,11 @@ class Parser:
                     # There is a potential problem here. The '>>' keyword could match
                     # Exception: "Expect '>' or ',' after Identifier opening '<' template bracket. Got '>>' instead.""
                     if self.at().type is lexer.SHIFTRIGHT:
-                        symbols = self.eat().symbols  # consume '>>'
-                        tok = Token(symbols, lexer.BIGGER)
-                        self.tokens.insert(0, tok)  # isert '>'
-                        self.tokens.insert(0, tok)  # isert '>'
-                    self.eat_expect(lexer.BIGGER, "Expect '%s' or '%s' after Identifier opening '%s' template bracket." % (lexer.BIGGER, lexer.COMMA, lexer.SMALLER), loop_loc_start)
+                        # read '>>' as '>' '>', the second one closes the outer template
+                        tok = _SplitToken(self.at(), lexer.BIGGER)
+                        self.split_token(tok, tok)
+                    else:
+                        self.eat_expect(lexer.BIGGER, "Expect '%s' or '%s' after Identifier opening '%s' template bracket." % (lexer.BIGGER, lexer.COMMA, lexer.SMALLER), loop_loc_start)
                     break  # break out of this while loop
 
         # check for array
@@ -1014,35 +1583,37 @@ class Parser:
         #     self.parse_statement()  # throw it away
 
     # (...)
-    def parse_expression(self):
-        return self.parse_assignment_expression()
-
     # i = 5
     # i = (...)
-    def parse_assignment_expression(self):
+    def parse_expression(self):
         loc_start = self.at()
         # foo = bar
         # ^^^
         assignee = self.parse_elvis_operator_expression()
-        expressions = [lexer.ASSIGN, lexer.ASSIGNADD, lexer.ASSIGNSUB, lexer.ASSIGNMUL, lexer.ASSIGNDIV,
-                       lexer.ASSIGNREM, lexer.ASSIGNBITAND, lexer.ASSIGNBITXOR, lexer.ASSIGNBITOR,
-                       lexer.ASSIGNBITSHIFTL, lexer.ASSIGNBITSHIFTR]
-        if self.at().type in expressions:
+        if self.at().type in _assignment_operators:
             operator = self.eat().type
-            value = self.parse_assignment_expression()
+            value = self.parse_expression()
             # foo = bar
             #       ^^^
             return AssignmentExpression(assignee, value, operator).location(loc_start, self.at_last())
 
         return assignee
 
+    parse_assignment_expression = parse_expression
+
     def parse_elvis_operator_expression(self):
         loc_start = self.at()
         # (...)
         # ^^^^^
         # (...) ? (...) : (...)
         # ^^^^^
-        expression_or_test = self.parse_object_expression()
+        type = loc_start.type
+        if type is lexer.WIGGLE_L:
+            expression_or_test = self.parse_object_expression()
+        elif type is lexer.SQUARE_L:
+            expression_or_test = self.parse_array_expression()
+        else:
+            expression_or_test = self.parse_binary_expr()
 
         if self.at().type is lexer.ELVIS:
             # eat '?' / Ternary conditional operator
@@ -1072,10 +1643,6 @@ class Parser:
     # { foo1: bar1, foo2: bar2 }
     def parse_object_expression(self):
         loc_start = self.at()
-        # check if it is an object. if not just continue down the tree
-        if self.at().type is not lexer.WIGGLE_L:
-            return self.parse_array_expression()
-
         self.eat()  # eat wiggle "{"
         properties = []
         while self.not_eof() and self.at().type is not lexer.WIGGLE_R:
@@ -1107,10 +1674,6 @@ class Parser:
 
     def parse_array_expression(self):
         loc_start = self.at()
-        # check if it is an array. If not just continue down the tree
-        if self.at().type is not lexer.SQUARE_L:
-            return self.parse_logic_or_expr()
-
         self.eat()  # eat square "["
         list = []
         while self.not_eof() and self.at().type is not lexer.SQUARE_R:
@@ -1126,128 +1689,26 @@ class Parser:
         return ListLiteral(list).location(loc_start, self.at_last())
 
     # (...) or (...)
-    def parse_logic_or_expr(self):
-        loc_start = self.at()
-        left = self.parse_logic_and_expr()
-        while self.at().type is lexer.OR:
-            operator = self.eat().type
-            right = self.parse_logic_and_expr()
-            left = BinaryExpression(left, right, operator).location(loc_start, self.at())
-        return left  # no more things to do, return last expression
-
-    # (...) and (...)
-    def parse_logic_and_expr(self):
-        loc_start = self.at()
-        left = self.parse_bit_logic_or_expr()
-        while self.at().type is lexer.AND:
-            operator = self.eat().type
-            right = self.parse_bit_logic_or_expr()
-            left = BinaryExpression(left, right, operator).location(loc_start, self.at())
-        return left  # no more things to do, return last expression
-
-    # (...) | (...)
-    def parse_bit_logic_or_expr(self):
-        loc_start = self.at()
-        left = self.parse_bit_logic_xor_expr()
-        while self.at().type is lexer.BITOR:
-            operator = self.eat().type
-            right = self.parse_bit_logic_xor_expr()
-            left = BinaryExpression(left, right, operator).location(loc_start, self.at())
-        return left  # no more things to do, return last expression
-
-    # (...) ^ (...)
-    def parse_bit_logic_xor_expr(self):
-        loc_start = self.at()
-        left = self.parse_bit_logic_and_expr()
-        while self.at().type is lexer.XOR:
-            operator = self.eat().type
-            right = self.parse_bit_logic_and_expr()
-            left = BinaryExpression(left, right, operator).location(loc_start, self.at())
-        return left  # no more things to do, return last expression
-
-    # (...) & (...)
-    def parse_bit_logic_and_expr(self):
-        loc_start = self.at()
-        left = self.parse_logic_equality_expr()
-        while self.at().type is lexer.BITAND:
-            operator = self.eat().type
-            right = self.parse_logic_equality_expr()
-            left = BinaryExpression(left, right, operator).location(loc_start, self.at())
-        return left  # no more things to do, return last expression
-
-    # (...) == (...)
-    # (...) != (...)
-    def parse_logic_equality_expr(self):
-        loc_start = self.at()
-        left = self.parse_logic_compare_expr()
-        expressions = [lexer.COMPARE, lexer.NOTCOMPARE, lexer.ISNOT, lexer.IS]
-        while self.at().type in expressions:
-            operator = self.eat().type
-            right = self.parse_logic_compare_expr()
-            left = BinaryExpression(left, right, operator).location(loc_start, self.at())
-        return left  # no more things to do, return last expression
-
-    # (...) <= (...)
-    # (...) >= (...)
-    # (...) > (...)
-    # (...) < (...)
-    def parse_logic_compare_expr(self):
-        loc_start = self.at()
-        left = self.parse_bit_shift_expr()
-        expressions = [lexer.BIGGEREQ, lexer.SMALLEREQ, lexer.BIGGER, lexer.SMALLER]
-        while self.at().type in expressions:
-            operator = self.eat().type
-            right = self.parse_bit_shift_expr()
-            left = BinaryExpression(left, right, operator).location(loc_start, self.at())
-        return left  # no more things to do, return last expression
-
-    # (...) << (...)
-    # (...) >> (...)
-    def parse_bit_shift_expr(self):
-        loc_start = self.at()
-        left = self.parse_additive_expr()
-        expressions = [lexer.SHIFTRIGHT, lexer.SHIFTLEFT]
-        while self.at().type in expressions:
-            operator = self.eat().type
-            right = self.parse_additive_expr()
-            left = BinaryExpression(left, right, operator).location(loc_start, self.at())
-        return left  # no more things to do, return last expression
-
-    # (...) + (...)
-    # (...) - (...)
-    def parse_additive_expr(self):
+    # (...) + (...) * (...)
+    # all binary operators are parsed here by their binding power in _binary_precedence.
+    # The right hand side only takes operators binding stronger, so all are left associative.
+    def parse_binary_expr(self, min_precedence=1):
         loc_start = self.at()
-        left = self.parse_multiplicative_expr()
-        expressions = [lexer.PLUS, lexer.MINUS]
-        while self.at().type in expressions:
-            operator = self.eat().type
-            right = self.parse_multiplicative_expr()
-            left = BinaryExpression(left, right, operator).location(loc_start, self.at())
-        return left  # no more things to do, return last expression
-
-    # (...) * (...)
-    # (...) / (...)
-    # (...) // (...)
-    # (...) % (...)
-    def parse_multiplicative_expr(self):
-        loc_start = self.at()
-        left = self.parse_exponential_expr()
-        expressions = [lexer.MUL, lexer.DIV, lexer.MOD, lexer.INTDIV]
-        while self.at().type in expressions:
-            operator = self.eat().type
-            right = self.parse_exponential_expr()
-            left = BinaryExpression(left, right, operator).location(loc_start, self.at())
-        return left  # no more things to do, return last expression
-
-    # (...) ^ (...)
-    def parse_exponential_expr(self):
-        loc_start = self.at()
-        left = self.parse_single_operator_before_expr()
-        expressions = [lexer.POW]
-        while self.at().type in expressions:
+        node = _primary_nodes.get(loc_start.type)
+        if node and self.peek(1).type not in _postfix_operators:
+            # plain identifier or literal, the most common operand
+            self.eat()
+            left = node(loc_start.value).location(loc_start, loc_start)
+        else:
+            left = self.parse_single_operator_before_expr()
+        at = self.at()
+        precedence = _binary_precedence.get(at.type)
+        while precedence is not None and precedence >= min_precedence:
             operator = self.eat().type
-            right = self.parse_single_operator_before_expr()
-            left = BinaryExpression(left, right, operator).location(loc_start, self.at())
+            right = self.parse_binary_expr(precedence + 1)
+            at = self.at()
+            left = BinaryExpression(left, right, operator).location(loc_start, at)
+            precedence = _binary_precedence.get(at.type)
         return left  # no more things to do, return last expression
 
     # not i
@@ -1258,13 +1719,12 @@ class Parser:
     # --i
     def parse_single_operator_before_expr(self):
         loc_start = self.at()
-        expressions = [lexer.NOT, lexer.BITNOT, lexer.PLUS, lexer.MINUS]
-        if self.at().type in expressions:
+        type = loc_start.type
+        if type in _unary_before_operators:
             operator = self.eat().type
             expr = self.parse_single_operator_after_expr()
             return UnaryBeforeExpression(expr, operator).location(loc_start, self.at())
-        identifier_expressions = [lexer.INCREMENT, lexer.DECREMENT]
-        if self.at().type in identifier_expressions:
+        if type in _increment_operators:
             operator = self.eat().type
             expr = self.parse_single_operator_after_expr()
             if not isinstance(expr, Identifier):
@@ -1279,17 +1739,6 @@ class Parser:
 
     # i++
     # i--
-    def parse_single_operator_after_expr(self):
-        loc_start = self.at()
-        expr = self.parse_call_member_expr()
-        expressions = [lexer.INCREMENT, lexer.DECREMENT]
-        if self.at().type in expressions:
-            if not isinstance(expr, Identifier):
-                parser_error("Operators '%s' and '%s' are only allowed on Identifiers." % (lexer.INCREMENT, lexer.DECREMENT), loc_start, self.at())
-            operator = self.eat().type
-            return UnaryIdentifierAfterExpression(expr.symbol, operator).location(loc_start, self.at_last())
-        return expr
-
     # (...)
     # (...)()
     # (...)()()
@@ -1297,22 +1746,26 @@ class Parser:
     # foo.bar()
     # foo.bar()()
     # foo().bar()()
-    def parse_call_member_expr(self):
+    def parse_single_operator_after_expr(self):
         loc_start = self.at()
         # (...)()
         # ^^^^^
         # foo.bar.a.b.c()()()()()
         # ^^^^^^^^^^^^^ = member
-        member = self.parse_member_expr()
-
-        # check if there is a call coming up
-        # (...)()
-        #      ^
-        if self.at().type is lexer.COURVE_L:
-            # member((...))
-            return self.parse_call_expr(member, loc_start)
-
-        return member
+        expr = self.parse_member_expr()
+        type = self.at().type
+        if type is lexer.COURVE_L:
+            # check if there is a call coming up
+            # (...)()
+            #      ^
+            expr = self.parse_call_expr(expr, loc_start)
+            type = self.at().type
+        if type in _increment_operators:
+            if not isinstance(expr, Identifier):
+                parser_error("Operators '%s' and '%s' are only allowed on Identifiers." % (lexer.INCREMENT, lexer.DECREMENT), loc_start, self.at())
+            operator = self.eat().type
+            return UnaryIdentifierAfterExpression(expr.symbol, operator).location(loc_start, self.at_last())
+        return expr
 
     # caller()
     # caller()()
@@ -1366,7 +1819,7 @@ class Parser:
         # the first expression is expected to be here and is a primary
         obj = self.parse_primary_expr()
 
-        while self.at().type is lexer.DOT or self.at().type is lexer.SQUARE_L:
+        while self.at().type in _member_operators:
             loc_start = self.at()
             operator = self.eat()  # either '.' or '[
 
@@ -1394,19 +1847,11 @@ class Parser:
     # (...)
     def parse_primary_expr(self):
         loc_start = self.at()
-        type = self.at().type
-        if type is lexer.IDENTIFIER:
-            identifier = self.eat().value
-            return Identifier(identifier).location(loc_start, self.at_last())
-        if type is lexer.NUMBER:
-            number = self.eat().value
-            return NumericLiteral(number).location(loc_start, self.at_last())
-        if type is lexer.FLOAT:
-            float = self.eat().value
-            return FloatLiteral(float).location(loc_start, self.at_last())
-        if type is lexer.STRING:
-            string = self.eat().value
-            return StringLiteral(string).location(loc_start, self.at_last())
+        type = loc_start.type
+        node = _primary_nodes.get(type)
+        if node:
+            self.eat()
+            return node(loc_start.value).location(loc_start, loc_start)
         if type is lexer.COURVE_L:
             self.eat()  # eat "("
             value = self.parse_expression()  # evaluate (...)
@@ -1414,3 +1859,211 @@ class Parser:
             return value
         # invalid token reached
         parser_error("Unexpected or unimplemented token reached. Token is %s." % str(self.at()), loc_start, self.at())
+
+    # statement keyword to the method parsing it, anything else is an expression
+    _statement_parsers: dict[int | str, Callable[[Any], Statement]] = {
+        lexer.LET: parse_variable_declaration,
+        lexer.STATIC: parse_variable_declaration,
+        lexer.FUNCTION: parse_function_declaration,
+        lexer.IF: parse_if_declaration,
+        lexer.FOR: parse_for_loop_declaration,
+        lexer.WHILE: parse_while_loop_declatation,
+        lexer.RETURN: parse_return_declaration,
+        lexer.BREAK: parse_break_declaration,
+        lexer.CONTINUE: parse_continue_declaration,
+        lexer.SHEBANG: parse_shebang,
+        lexer.CLASS: parse_class,
+        lexer.ENUM: parse_enum,
+        lexer.ALLOC: parse_alloc,
+        lexer.UNREACHABLE: parse_unreachable_declaration,
+        lexer.DELETE: parse_delete_declaration,
+    }
+
+
+def _split_top_level(tokens: Sequence[Token], count: int) -> list[tuple[int, int]]:
+    # splits the tokens in about count chunks of (start, end) token index. Every chunk but the
+    # first starts with a statement keyword at column 0, that is a top level statement.
+    # The one before must have ended there.
+    size = max(len(tokens) // count, 1)
+    statements = Parser._statement_parsers
+    chunks = []
+    first = 0
+    candidate = size
+    while candidate < len(tokens) - 1:
+        token = tokens[candidate]
+        if token.line_pos == 0 and token.type in statements:
+            chunks.append((first, candidate))
+            first = candidate
+            candidate += size
+        else:
+            candidate += 1
+    chunks.append((first, len(tokens) - 1))  # the last one ends with EOF
+    return chunks
+
+
+# the parsed statements of a chunk are sent back without the tokens. The tokens are referenced
+# by their index in the chunk and replaced with the tokens of the parent process again.
+# Indented function bodies are sent as their token span only and become a LazyBlockStatement.
+# Building the body nodes again in the parent would cost about as much as parsing them.
+# Both are persistent ids: a token is its index, a body the tuple of its first and last index.
+class _ChunkPickler(pickle.Pickler):
+    def __init__(self, file: io.BytesIO, tokens: list[Token], statements: list[Statement]):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self._index = {id(token): i for i, token in enumerate(tokens)}
+        functions: list[FunctionDeclaration] = []
+        for stmt in statements:
+            if isinstance(stmt, FunctionDeclaration):
+                functions.append(stmt)
+            elif isinstance(stmt, ClassDeclaration):
+                functions.extend(stmt.functions)
+        self._bodies = {id(f.body) for f in functions if f.body.loc.start.type is lexer.BLOCKSTART}
+
+        def reduce_operator(node):
+            state = {name: getattr(node, name) for name in ("loc",) + node._fields if name != "operator"}
+            return _operator_node, (type(node), node.operator), (None, state)
+
+        self.dispatch_table = {node: reduce_operator for node in _operator_nodes}
+
+    def persistent_id(self, obj: Any) -> Any:
+        kind = type(obj)
+        if kind is Token:
+            return self._index[id(obj)]
+        if kind is BlockStatement and id(obj) in self._bodies:
+            return (self._index[id(obj.loc.start)], self._index[id(obj.loc.end)])
+        return None
+
+
+# nodes with an operator. The interpreter compares it with 'is' to the lexer constants.
+_operator_nodes = (AssignmentExpression, BinaryExpression, UnaryBeforeExpression,
+                   UnaryIdentifierBeforeExpression, UnaryIdentifierAfterExpression)
+
+
+def _operator_node(cls: Any, operator: str) -> Statement:
+    # an unpickled operator is a copy, it is replaced with the lexer constant again
+    node = cls.__new__(cls)
+    node.operator = lexer._canonical_types.get(operator, operator)
+    return node
+
+
+class _ChunkUnpickler(pickle.Unpickler):
+    def __init__(self, file: io.BytesIO, tokens: Sequence[Token], start: int):
+        super().__init__(file)
+        self._tokens = tokens
+        self._start = start
+
+    def persistent_load(self, pid: Any) -> Any:
+        tokens = self._tokens
+        if type(pid) is int:
+            return tokens[self._start + pid]
+        # function body from BLOCKSTART up to the token following its BLOCKEND
+        first = self._start + pid[0]
+        last = self._start + pid[1]
+        return LazyBlockStatement(list(tokens[first:last + 1])).location(tokens[first], tokens[last], multiline=True)
+
+
+def _parse_chunk(filename: str, first_line: int, lines: list[str], count: int, is_last: bool) -> bytes | None:
+    # runs in a worker process. The chunk starts at a top level line with indentation 0, so
+    # tokenizing its lines again gives the same tokens the parent has. That is cheaper than
+    # sending them. The last of the count tokens is the one following the chunk.
+    # Gives None if the statements do not end exactly there.
+    table = lexer.LineTable(filename, dict(enumerate(lines, first_line)))
+    tokens: list[Token] = []
+    current_ident = 0
+    last_pos = 0
+    for line_nr, full_line in enumerate(lines, first_line):
+        current_ident, last_pos = lexer._tokenize_line(tokens, table, full_line, line_nr, current_ident)
+    if is_last:
+        lexer._tokenize_end(tokens, table, first_line + len(lines) - 1, last_pos, current_ident)
+    del tokens[count:]
+
+    parser = Parser()  # everything is parsed to report all syntax errors
+    parser.tokens = tokens
+    end = len(tokens) - 1
+    statements = []
+    try:
+        while parser.pos < end:
+            statements.append(parser.parse_statement())
+    except IndexError:
+        return None
+    if parser.pos != end:
+        return None
+    file = io.BytesIO()
+    _ChunkPickler(file, tokens, statements).dump(statements)
+    return file.getvalue()
+
+
+class IncrementalParser:
+    # Parses a source code kept in a lexer.IncrementalTokenizer. Each top level statement is kept
+    # with its token span. An edit re-parses only the top level statements whose tokens changed.
+    # The unchanged ones are reused as they are (same objects), their tokens are renumbered in place
+    # by the tokenizer. After an edit the lists reparsed and removed tell which top level
+    # statements are new and which are gone.
+    def __init__(self, sourcecode: str = "", filename: str = "__unspecified__", lazy=False):
+        self.tokenizer = lexer.IncrementalTokenizer(sourcecode, filename)
+        self.lazy = lazy
+        self._tokens: list[Token] = []
+        self._statements: list[Statement] = []  # top level statements, including the shebangs
+        self._spans: list[tuple[int, int]] = []  # token index of the start and the token following each statement
+        self.reparsed: list[Statement] = []
+        self.removed: list[Statement] = []
+        self.program = self._update()
+
+    def edit(self, first_line: int, last_line: int, text: str) -> Program:
+        # same as lexer.IncrementalTokenizer.edit(..), gives the updated program.
+        self.tokenizer.edit(first_line, last_line, text)
+        self.program = self._update()
+        return self.program
+
+    def _update(self) -> Program:
+        old = self._tokens
+        new = self.tokenizer.tokens()
+
+        # the tokens in front and at the end which did not change
+        limit = min(len(old), len(new))
+        prefix = 0
+        while prefix < limit and old[prefix] is new[prefix]:
+            prefix += 1
+        suffix = 0
+        while suffix < limit - prefix and old[-1 - suffix] is new[-1 - suffix]:
+            suffix += 1
+        shift = len(new) - len(old)
+
+        # a statement is reused if its tokens and the token following it did not change.
+        # The parser never looks further than that token to end a statement.
+        front = 0
+        while front < len(self._spans) and self._spans[front][1] < prefix:
+            front += 1
+        back = len(self._spans)
+        while back > front and self._spans[back - 1][0] >= len(old) - suffix:
+            back -= 1
+        back_starts = {self._spans[i][0] + shift: i for i in range(back, len(self._spans))}
+
+        statements = self._statements[:front]
+        spans = self._spans[:front]
+        parser = Parser(self.lazy)
+        parser.tokens = new
+        parser.pos = spans[-1][1] if spans else 0
+        reparsed = []
+        while parser.not_eof() and parser.pos not in back_starts:
+            start = parser.pos
+            stmt = parser.parse_statement()
+            statements.append(stmt)
+            spans.append((start, parser.pos))
+            reparsed.append(stmt)
+        resume = back_starts.get(parser.pos, len(self._spans))
+        for i in range(resume, len(self._spans)):
+            start, end = self._spans[i]
+            statements.append(self._statements[i])
+            spans.append((start + shift, end + shift))
+
+        self.removed = self._statements[front:resume]
+        self.reparsed = reparsed
+        self._tokens = new
+        self._statements = statements
+        self._spans = spans
+
+        program = Program()
+        program._incremental = True
+        for stmt in statements:
+            program.add(stmt)
+        return program.location(new[0], new[-1])
@@ -0,0 +1,261 @@
+import flolang.lexer as lexer
+import flolang.abstract_source_tree as ast
+from flolang.lexer import Token
+import gc
+import hashlib
+import marshal
+import os
+from typing import Any, Callable
+
+
+# Cache of the token list and the AST of a source file, like __pycache__ for python. It is in
+# the __flocache__ directory next to the file, see cache_directory(..). A source code given as
+# string (eval) is not cached, nothing is written into the working directory.
+# An entry is found by a hash of the source code, the file name and the flolang version.
+# Entries which were not used for the longest time are removed when the cache grows
+# over max_size bytes. Setting the environment variable FLOLANG_NOCACHE disables it.
+
+VERSION = "0.1.0"  # flolang version, see setup.py
+DIRECTORY = "__flocache__"
+_CHUNK_SIZE = 1024 * 1024  # bytes of a source file hashed at once
+
+enabled = not os.environ.get("FLOLANG_NOCACHE")
+max_size = 64 * 1024 * 1024
+
+# every Statement subclass by name. Their fields are part of the key, so an entry written
+# by a flolang with a different AST is never read.
+_node_classes: dict[str, Any] = {}
+
+
+def _collect_node_classes(cls):
+    for subclass in cls.__subclasses__():
+        _node_classes[subclass.__name__] = subclass
+        _collect_node_classes(subclass)
+
+
+_collect_node_classes(ast.Statement)
+_layout = repr(sorted((name, cls._fields) for name, cls in _node_classes.items())).encode()
+
+
+def cache_directory(script_file: str) -> str:
+    # the cache of a script is next to it
+    return os.path.join(os.path.dirname(os.path.abspath(script_file)), DIRECTORY)
+
+
+def _key(filename: str, lazy: bool) -> Any:
+    # the hash of an entry, the source code is added to it
+    key = hashlib.sha256()
+    for part in (VERSION.encode(), _layout, filename.encode(), b"lazy" if lazy else b"eager"):
+        key.update(part)
+        key.update(b"\0")
+    return key
+
+
+def _lookup(directory: str, key: Any, filename: str, lines: Callable[[], list[str]]) -> tuple[str, tuple[list[Token], ast.Program] | None]:
+    # the path of the entry and its tokens and AST if it is there. lines gives the source lines.
+    path = os.path.join(directory, key.hexdigest()[:32] + ".flc")
+    entry = _read(path)
+    if entry is None:
+        return path, None
+    # the tokens and nodes have no reference cycles. The garbage collector would only
+    # scan the growing tree again and again while it is built.
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return path, _decode(lines(), filename, entry)
+    except (ValueError, TypeError, IndexError, KeyError, AttributeError):
+        return path, None  # damaged entry, it is written again
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def _store(directory: str, path: str, tok: list[Token], lazy: bool) -> tuple[list[Token], ast.Program]:
+    # parses the tokens and writes the entry
+    program = ast.Parser(lazy).parse(tok)
+    try:
+        data = marshal.dumps(_encode(tok, program))
+    except (ValueError, KeyError):
+        return tok, program  # something in the AST which is not cached
+    _write(directory, path, data)
+    return tok, program
+
+
+def cached_parse(sourcecode: str, filename: str = "__unspecified__", lazy=False,
+                 directory: str | None = None) -> tuple[list[Token], ast.Program]:
+    # same as tokenize(..) and parse(..), taken from the cache in the directory if the source
+    # code did not change. Without a directory nothing is cached.
+    if not enabled or directory is None:
+        tok = lexer.tokenize(sourcecode, filename)
+        return tok, ast.Parser(lazy).parse(tok)
+
+    key = _key(filename, lazy)
+    key.update(sourcecode.encode())
+    key.update(b"\0")
+    path, cached = _lookup(directory, key, filename, sourcecode.splitlines)
+    if cached is not None:
+        return cached
+    return _store(directory, path, lexer.tokenize(sourcecode, filename), lazy)
+
+
+def cached_parse_file(source_file: str, filename: str = "__unspecified__", lazy=False,
+                      directory: str | None = None) -> tuple[list[Token], ast.Program]:
+    # same as cached_parse(..) for the source code in the file. The file is hashed in chunks and
+    # tokenized line by line, it is never read into one string. An entry taken from the cache
+    # keeps all source lines for the error messages, like tokenize(..) does.
+    if not enabled or directory is None:
+        tok = list(lexer.iter_tokens(source_file, filename))
+        return tok, ast.Parser(lazy).parse(tok)
+
+    key = _key(filename, lazy)
+    with open(source_file, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            key.update(chunk)
+    key.update(b"\0")
+
+    def lines() -> list[str]:
+        with open(source_file, "r", encoding="utf-8") as f:
+            return list(lexer._iter_lines(f))
+
+    path, cached = _lookup(directory, key, filename, lines)
+    if cached is not None:
+        return cached
+    return _store(directory, path, list(lexer.iter_tokens(source_file, filename)), lazy)
+
+
+def _read(path: str) -> Any:
+    try:
+        with open(path, "rb") as f:
+            entry = marshal.loads(f.read())
+        os.utime(path)  # the modification time tells when it was used last
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    return entry
+
+
+def _write(directory: str, path: str, data: bytes):
+    # a read only or full disk only means there is no cache
+    try:
+        os.makedirs(directory, exist_ok=True)
+        temp = "%s.%d.tmp" % (path, os.getpid())
+        with open(temp, "wb") as f:
+            f.write(data)
+        os.replace(temp, path)  # other processes never see a half written entry
+        _evict(directory)
+    except OSError:
+        pass
+
+
+def _evict(directory: str):
+    entries = []
+    size = 0
+    for entry in os.scandir(directory):
+        if entry.name.endswith(".flc"):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            size += stat.st_size
+    entries.sort()
+    for mtime, entry_size, path in entries:
+        if size <= max_size:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        size -= entry_size
+
+
+# The entry is stored with marshal, it only knows the builtin types. Tokens are stored as
+# one list per attribute, the source lines are not stored. A node is a tuple of its class name,
+# location and fields. Lists are lists and everything else is a value (no tuples in the AST).
+# A location refers to tokens by their index. A token split by the parser (the '>' of '>>')
+# is the list [index, type]. An unparsed lazy function body is only the index of its first
+# and last token.
+
+def _encode(tok: list[Token], program: ast.Program) -> tuple:
+    index = {id(token): i for i, token in enumerate(tok)}
+
+    def token_ref(token):
+        if isinstance(token, ast._SplitToken):
+            return [index[id(token.original)], token.type]
+        return index[id(token)]
+
+    def encode(value):
+        if isinstance(value, ast.Statement):
+            loc = value.loc
+            if loc is ast.NO_LOCATION:
+                encoded_loc = None
+            else:
+                encoded_loc = (token_ref(loc.start), token_ref(loc.end), loc.is_multiline)
+            if isinstance(value, ast.LazyBlockStatement) and not value.is_parsed():
+                return ("", encoded_loc)
+            name = type(value).__name__
+            if _node_classes.get(name) is not type(value):
+                raise ValueError("Not a cached AST node: " + name)
+            return (name, encoded_loc) + tuple(encode(getattr(value, field)) for field in value._fields)
+        if isinstance(value, list):
+            return [encode(element) for element in value]
+        return value
+
+    return ([t.type for t in tok], [t.value for t in tok], [t.line_nr for t in tok],
+            [t.line_pos for t in tok], encode(program))
+
+
+_containers = (tuple, list)
+
+
+def _decode(lines: list[str], filename: str, entry: tuple) -> tuple[list[Token], ast.Program]:
+    types, values, line_nrs, line_positions, tree = entry
+    table = lexer.LineTable(filename, lines)
+    # token types and operators are compared with 'is', the unmarshaled strings are copies
+    canonical = lexer._canonical_types
+    new_token = lexer._token
+    containers = _containers
+    tok = [new_token(table, line_nr, line_pos, canonical.get(type, type), value)
+           for type, value, line_nr, line_pos in zip(types, values, line_nrs, line_positions)]
+    classes = {name: (cls, cls._fields) for name, cls in _node_classes.items()}
+    new_location = ast.Location.__new__
+    Location = ast.Location
+    SplitToken = ast._SplitToken
+
+    def decode(value):
+        # value is a node (tuple) or a list
+        if type(value) is list:
+            return [decode(element) if type(element) in containers else element for element in value]
+        name = value[0]
+        encoded_loc = value[1]
+        if not name:
+            # function body of a lazy parse
+            first, last, multiline = encoded_loc
+            return ast.LazyBlockStatement(tok[first:last + 1]).location(tok[first], tok[last], multiline)
+        cls, fields = classes[name]
+        node = cls.__new__(cls)
+        if encoded_loc is None:
+            node.loc = ast.NO_LOCATION
+        else:
+            start, end, multiline = encoded_loc
+            loc = new_location(Location)
+            loc.start = tok[start] if type(start) is int else SplitToken(tok[start[0]], canonical.get(start[1], start[1]))
+            loc.end = tok[end] if type(end) is int else SplitToken(tok[end[0]], canonical.get(end[1], end[1]))
+            loc.is_multiline = multiline
+            node.loc = loc
+        index = 2
+        for field in fields:
+            field_value = value[index]
+            index += 1
+            kind = type(field_value)
+            if kind in containers:
+                field_value = decode(field_value)
+            elif kind is str:
+                field_value = canonical.get(field_value, field_value)
+            setattr(node, field, field_value)
+        return node
+
+    program = decode(tree)
+    if not isinstance(program, ast.Program):
+        raise ValueError("Cache entry is not a program")
+    program._incremental = False
+    return tok, program
@@ -0,0 +1,831 @@
+import itertools
+import operator
+import typing
+import flolang.abstract_source_tree as ast
+import flolang.interpreter as inter
+import flolang.lexer as lexer
+from flolang.interpreter import Environment, RuntimeValue, envstate, noneValueInstance, statement_error
+
+
+# Closure compiling execution engine. The AST is converted once into nested python closures,
+# one per node. A closure gets the environment and gives the runtime value like
+# interpreter.interpret(..) does, with the same semantics and errors. The operators, literal
+# values and child closures are looked up when building, not on every evaluation.
+# A block which declares no variable runs in the environment of its parent. The control flow
+# state is only checked where a 'break', 'continue' or 'return' can occur.
+# Function bodies are built on their first call. Runtime functions are shared with the
+# interpreter, so the environment of either engine can be used.
+
+Closure = typing.Callable[[Environment], RuntimeValue]
+
+# Operations of two int values. The result is the same as the interpreter gives, but without
+# the type promotion checks. These are the most common operations in loops.
+_int_operations: dict[str, typing.Callable[[int, int], int]] = {
+    lexer.PLUS: operator.add,
+    lexer.MINUS: operator.sub,
+    lexer.MUL: operator.mul,
+    lexer.MOD: operator.mod,
+    lexer.INTDIV: operator.floordiv,
+    lexer.BITOR: operator.or_,
+    lexer.XOR: operator.xor,
+    lexer.BITAND: operator.and_,
+    lexer.SHIFTRIGHT: operator.rshift,
+    lexer.SHIFTLEFT: operator.lshift,
+}
+
+_int_comparisons: dict[str, typing.Callable[[int, int], bool]] = {
+    lexer.COMPARE: operator.eq,
+    lexer.NOTCOMPARE: operator.ne,
+    lexer.BIGGEREQ: operator.ge,
+    lexer.SMALLEREQ: operator.le,
+    lexer.BIGGER: operator.gt,
+    lexer.SMALLER: operator.lt,
+}
+
+_int_assignment_operations: dict[str, typing.Callable[[int, int], int]] = {
+    lexer.ASSIGNADD: operator.add,
+    lexer.ASSIGNSUB: operator.sub,
+    lexer.ASSIGNMUL: operator.mul,
+    lexer.ASSIGNREM: operator.mod,
+    lexer.ASSIGNBITAND: operator.and_,
+    lexer.ASSIGNBITXOR: operator.xor,
+    lexer.ASSIGNBITOR: operator.or_,
+    lexer.ASSIGNBITSHIFTR: operator.rshift,
+    lexer.ASSIGNBITSHIFTL: operator.lshift,
+}
+
+IntValue = inter.IntValue
+# runtime values are never modified, the result of a comparison can be shared
+_true = inter.BooleanValue(True)
+_false = inter.BooleanValue(False)
+
+
+def _find(env: Environment, name: str) -> Environment | None:
+    # the environment which has the variable, like env._resolve(..)
+    while env is not None:
+        if name in env.scope:
+            return env
+        env = env.parent
+    return None
+
+
+def execute(program: ast.Statement, env: Environment) -> RuntimeValue:
+    # same as interpreter.interpret(program, env)
+    return build(program)(env)
+
+
+def build(stmt: ast.Statement) -> Closure:
+    try:
+        builder = _builders[type(stmt)]
+    except KeyError:
+        builder = _find_builder(type(stmt))
+    return builder(stmt)
+
+
+def _find_builder(cls: type) -> typing.Callable[[typing.Any], Closure]:
+    # like interpreter._find_interpreter(..)
+    for base in cls.__mro__:
+        if base in _builders:
+            _builders[cls] = _builders[base]
+            return _builders[cls]
+    return build_unknown
+
+
+def build_unknown(stmt: ast.Statement) -> Closure:
+    # the error is raised when it is executed, like the interpreter does
+    def unknown(env: Environment) -> RuntimeValue:
+        return inter.interpret_unknown(stmt, env)
+    return unknown
+
+
+class _ControlFlowFinder(ast.NodeVisitor):
+    # finds a 'break', 'continue' or 'return' which changes the state of the environment.
+    # The ones inside a function declaration belong to the function.
+    def __init__(self):
+        super().__init__()
+        self.found = False
+
+    def visit_BreakExpression(self, node):
+        self.found = True
+
+    def visit_ContinueExpression(self, node):
+        self.found = True
+
+    def visit_ReturnExpression(self, node):
+        self.found = True
+
+    def visit_FunctionDeclaration(self, node):
+        return False
+
+    def visit_ClassMemberFunctionDeclaration(self, node):
+        return False
+
+
+def _has_control_flow(stmt: ast.Statement) -> bool:
+    finder = _ControlFlowFinder()
+    finder.visit(stmt)
+    return finder.found
+
+
+def build_numeric_literal(stmt: ast.NumericLiteral) -> Closure:
+    # runtime values are never modified, the same one is given every time
+    value = IntValue(stmt.value)
+    return lambda env: value
+
+
+def build_float_literal(stmt: ast.FloatLiteral) -> Closure:
+    value = inter.FloatValue(stmt.value)
+    return lambda env: value
+
+
+def build_string_literal(stmt: ast.StringLiteral) -> Closure:
+    value = inter.StringValue(stmt.value)
+    return lambda env: value
+
+
+def build_identifier(stmt: ast.Identifier) -> Closure:
+    symbol = stmt.symbol
+
+    def identifier(env: Environment) -> RuntimeValue:
+        # same as env.lookup(..) without the recursion
+        scope_env = env
+        while scope_env is not None:
+            scope = scope_env.scope
+            if symbol in scope:
+                return scope[symbol]
+            scope_env = scope_env.parent
+        return env.lookup(symbol, stmt)  # not defined error
+    return identifier
+
+
+def build_binary_expression(stmt: ast.BinaryExpression) -> Closure:
+    left = build(stmt.left)
+    right = build(stmt.right)
+    operation = inter._binary_operations.get(stmt.operator)
+
+    if operation is None:
+        def no_operation(env: Environment) -> RuntimeValue:
+            left(env)
+            right(env)
+            statement_error('Did not found a operation for this expression.', stmt)
+            return noneValueInstance
+        return no_operation
+
+    def binary(env: Environment) -> RuntimeValue:
+        left_value = left(env)
+        right_value = right(env)
+        try:
+            return operation(left_value, right_value)
+        except TypeError as te:
+            statement_error('Interpreter type error "%s". Unable to resolve operation with given types.' % str(te), stmt)
+        return noneValueInstance
+
+    int_operation = _int_operations.get(stmt.operator)
+    int_comparison = _int_comparisons.get(stmt.operator)
+    if int_operation is None and int_comparison is None:
+        return binary
+
+    if isinstance(stmt.right, ast.NumericLiteral):
+        # most of the time the right side is a number
+        constant = IntValue(stmt.right.value)
+        number = constant.value
+
+        if int_operation is not None:
+            def int_binary_constant(env: Environment) -> RuntimeValue:
+                left_value = left(env)
+                if type(left_value) is IntValue:
+                    return IntValue(int_operation(left_value.value, number))
+                try:
+                    return operation(left_value, constant)
+                except TypeError as te:
+                    statement_error('Interpreter type error "%s". Unable to resolve operation with given types.' % str(te), stmt)
+                return noneValueInstance
+            return int_binary_constant
+
+        compare_constant = _int_comparisons[stmt.operator]
+
+        def int_compare_constant(env: Environment) -> RuntimeValue:
+            left_value = left(env)
+            if type(left_value) is IntValue:
+                return _true if compare_constant(left_value.value, number) else _false
+            try:
+                return operation(left_value, constant)
+            except TypeError as te:
+                statement_error('Interpreter type error "%s". Unable to resolve operation with given types.' % str(te), stmt)
+            return noneValueInstance
+        return int_compare_constant
+
+    if int_operation is not None:
+        def int_binary(env: Environment) -> RuntimeValue:
+            left_value = left(env)
+            right_value = right(env)
+            if type(left_value) is IntValue and type(right_value) is IntValue:
+                return IntValue(int_operation(left_value.value, right_value.value))
+            try:
+                return operation(left_value, right_value)
+            except TypeError as te:
+                statement_error('Interpreter type error "%s". Unable to resolve operation with given types.' % str(te), stmt)
+            return noneValueInstance
+        return int_binary
+
+    compare = _int_comparisons[stmt.operator]
+
+    def int_compare(env: Environment) -> RuntimeValue:
+        left_value = left(env)
+        right_value = right(env)
+        if type(left_value) is IntValue and type(right_value) is IntValue:
+            return _true if compare(left_value.value, right_value.value) else _false
+        try:
+            return operation(left_value, right_value)
+        except TypeError as te:
+            statement_error('Interpreter type error "%s". Unable to resolve operation with given types.' % str(te), stmt)
+        return noneValueInstance
+    return int_compare
+
+
+def build_unary_before_expression(stmt: ast.UnaryBeforeExpression) -> Closure:
+    expression = build(stmt.expr)
+    operation = inter._unary_operations.get(stmt.operator)
+
+    def unary(env: Environment) -> RuntimeValue:
+        value = expression(env)
+        if operation is None:
+            statement_error("Statement operator invalid '%s' for unary." % stmt.operator, stmt)
+            return noneValueInstance
+        return operation(value)
+    return unary
+
+
+def build_unary_identifier_before_expression(stmt: ast.UnaryIdentifierBeforeExpression) -> Closure:
+    identifier = stmt.identifier
+    step = inter._increment_steps.get(stmt.operator)
+
+    def increment(env: Environment) -> RuntimeValue:
+        variable = env.lookup(identifier, stmt)
+        if step is None:
+            statement_error("Statement operator invalid '%s' for unary." % stmt.operator, stmt)
+            return noneValueInstance
+        variable = _increment(env, identifier, variable, step, stmt)
+        return variable
+    return increment
+
+
+def build_unary_identifier_after_expression(stmt: ast.UnaryIdentifierAfterExpression) -> Closure:
+    identifier = stmt.identifier
+    step = inter._increment_steps.get(stmt.operator)
+
+    def increment(env: Environment) -> RuntimeValue:
+        variable_original = env.lookup(identifier, stmt)
+        if step is None:
+            statement_error("Statement operator invalid '%s' for unary post expression." % stmt.operator, stmt)
+            return noneValueInstance
+        _increment(env, identifier, variable_original, step, stmt)
+        return variable_original
+    return increment
+
+
+def _increment(env: Environment, identifier: str, variable: RuntimeValue, step: int, stmt: ast.Statement) -> RuntimeValue:
+    if type(variable) is IntValue:
+        variable = IntValue(variable.value + step)
+        scope_env = _find(env, identifier)
+        if scope_env is not None and identifier in scope_env.mutables and type(scope_env.scope[identifier]) is IntValue:
+            scope_env.scope[identifier] = variable
+            return variable
+    else:
+        variable = inter._expression_unary_find_type(variable, variable.value + step)
+    return env.assign(identifier, variable, stmt)
+
+
+def build_assignment_expression(stmt: ast.AssignmentExpression) -> Closure:
+    if isinstance(stmt.assignee, ast.Identifier):
+        return _build_variable_assignment(stmt, stmt.assignee.symbol)
+    if isinstance(stmt.assignee, ast.MemberExpression):
+        return _build_member_assignment(stmt, stmt.assignee)
+    return lambda env: noneValueInstance
+
+
+def _build_variable_assignment(stmt: ast.AssignmentExpression, identifier: str) -> Closure:
+    value = build(stmt.value)
+    find_type_everything = inter._expression_find_type_everything
+
+    # the variable is found once for reading and writing. Any error is left to env.assign(..).
+    if stmt.operator is lexer.ASSIGN:
+        def assign(env: Environment) -> RuntimeValue:
+            right = value(env)
+            scope_env = _find(env, identifier)
+            if scope_env is None:
+                return env.lookup(identifier, stmt)  # not defined error
+            scope = scope_env.scope
+            left = scope[identifier]
+            if type(left) is IntValue and type(right) is IntValue:
+                result = right
+            else:
+                result = find_type_everything(left, right, right.value)
+            if type(left) is type(result) and identifier in scope_env.mutables:
+                scope[identifier] = result
+                return result
+            return env.assign(identifier, result, stmt)
+        return assign
+
+    operation = inter._assignment_operations.get(stmt.operator)
+    int_operation = _int_assignment_operations.get(stmt.operator)
+
+    def compound_assign(env: Environment) -> RuntimeValue:
+        right = value(env)
+        scope_env = _find(env, identifier)
+        if scope_env is None:
+            return env.lookup(identifier, stmt)  # not defined error
+        scope = scope_env.scope
+        left = scope[identifier]
+        result: RuntimeValue
+        if int_operation is not None and type(left) is IntValue and type(right) is IntValue:
+            result = IntValue(int_operation(left.value, right.value))
+        elif operation is None:
+            statement_error("Statement operator invalid '%s'." % stmt.operator, stmt)
+            return noneValueInstance
+        else:
+            result = operation(left, right)
+        if type(left) is type(result) and identifier in scope_env.mutables:
+            scope[identifier] = result
+            return result
+        return env.assign(identifier, result, stmt)
+    return compound_assign
+
+
+def _build_member_assignment(stmt: ast.AssignmentExpression, assignee: ast.MemberExpression) -> Closure:
+    object_closure = build(assignee.object)
+    key_closure = None
+    key_symbol = None
+    if isinstance(assignee.key, ast.Identifier):
+        key_symbol = assignee.key.symbol
+    else:
+        key_closure = build(assignee.key)
+    value = build(stmt.value)
+    operation = inter._assignment_operations.get(stmt.operator)
+
+    def assign(env: Environment) -> RuntimeValue:
+        object = object_closure(env).value
+        if key_closure is None:
+            key = key_symbol
+        else:
+            key = key_closure(env).value
+        right = value(env)
+        left = object[key]
+        if stmt.operator is lexer.ASSIGN:
+            object[key] = right
+            return right
+        if operation is not None:
+            object[key] = operation(left, right)
+            return right
+        statement_error("Statement operator invalid '%s'." % stmt.operator, stmt)
+        return noneValueInstance
+    return assign
+
+
+def build_variable_declaration(stmt: ast.VariableDeclaration) -> Closure:
+    value = build(stmt.value)
+    type = stmt.type
+    identifier = stmt.identifier
+    mutable = stmt.mutable
+    assign_type = inter._assign_Type
+
+    if type:
+        def declare_typed(env: Environment) -> RuntimeValue:
+            return env.declare_local(identifier, assign_type(value(env).value, type), mutable, stmt)
+        return declare_typed
+
+    def declare(env: Environment) -> RuntimeValue:
+        return env.declare_local(identifier, value(env), mutable, stmt)
+    return declare
+
+
+def build_function_declaration(stmt: ast.FunctionDeclaration) -> Closure:
+    # the defaults are evaluated when the function is declared
+    defaults = [(param, build(param.default) if param.default else None) for param in stmt.parameters]
+
+    def declare(env: Environment) -> RuntimeValue:
+        runtime_parameters = []
+        for param, default in defaults:
+            evaluated_default = default(env) if default else None
+            runtime_parameters.append(inter.RuntimeFunctionParameter(param.mutable, param.type, param.identifier, evaluated_default))
+        function = inter.RuntimeFunction(runtime_parameters, stmt.result, stmt.body, stmt)
+        return env.declare_global(stmt.identifier, function, True, stmt)
+    return declare
+
+
+def _function_body(function: inter.RuntimeFunction) -> Closure:
+    # built on the first call. A lazy parsed body is parsed now.
+    if function.closure is None:
+        function.closure = build(function.body)
+    return function.closure
+
+
+def build_call_expression(stmt: ast.CallExpression) -> Closure:
+    caller = build(stmt.caller)
+    arguments = [build(argument) for argument in stmt.arguments]
+    NativeFunction = inter.NativeFunction
+    RuntimeFunction = inter.RuntimeFunction
+
+    def call(env: Environment) -> RuntimeValue:
+        function = caller(env)
+
+        if isinstance(function, NativeFunction):
+            result = function.callback([argument(env) for argument in arguments])
+            if result is None:  # native function might not return anything, fix this here.
+                result = noneValueInstance
+            if not isinstance(result, RuntimeValue):
+                statement_error("Result of native function call is not of a runtime type.", stmt)
+            return result
+
+        if isinstance(function, RuntimeFunction):
+            scope = Environment(env, runtime_function=function)
+            variables = scope.scope
+            for param, argument in itertools.zip_longest(function.parameters, arguments):
+                if param is None:
+                    statement_error("function does not have enough parameters.", stmt)
+                    return noneValueInstance
+                if argument is not None:
+                    value = argument(env)
+                elif param.default is not None:
+                    value = param.default
+                else:
+                    statement_error("Either argument default or a value for argument must be provided", stmt)
+                if param.identifier in variables:
+                    scope.declare_local(param.identifier, value, param.mutable, stmt)  # already defined error
+                variables[param.identifier] = value
+                if param.mutable:
+                    scope.mutables.append(param.identifier)
+
+            body = function.closure or _function_body(function)
+            last = body(scope)
+            state = scope.state
+            if state is envstate.RUN:
+                return noneValueInstance  # block has ran to end
+            env.state = state
+            if state is envstate.BREAK:
+                statement_error("Expression '%s' is not allowed outside loop." % lexer.BREAK, stmt)
+            if state is envstate.CONTINUE:
+                statement_error("Expression '%s' is not allowed outside loop." % lexer.CONTINUE, stmt)
+            # must reset the state because we catched the case and it does not propagate outward
+            env.state = envstate.RUN
+            return last
+
+        statement_error("Function type not implemented.", stmt)
+        return noneValueInstance
+    return call
+
+
+def build_inlined_call_expression(stmt: ast.InlinedCallExpression) -> Closure:
+    # the inlined expression while the caller still finds the function it was taken from
+    caller = build(stmt.call.caller)
+    expression = build(stmt.expression)
+    call = build(stmt.call)
+    declaration = stmt._declaration
+    RuntimeFunction = inter.RuntimeFunction
+
+    def inlined(env: Environment) -> RuntimeValue:
+        function = caller(env)
+        if type(function) is RuntimeFunction and function.declaration is declaration:
+            return expression(env)
+        return call(env)
+    return inlined
+
+
+def build_member_expression(stmt: ast.MemberExpression) -> Closure:
+    object_closure = build(stmt.object)
+    key_closure = None
+    key_symbol = None
+    if isinstance(stmt.key, ast.Identifier):
+        key_symbol = stmt.key.symbol
+    else:
+        key_closure = build(stmt.key)
+
+    def member(env: Environment) -> RuntimeValue:
+        object = object_closure(env).value
+        if key_closure is None:
+            key = key_symbol
+        else:
+            key = key_closure(env).value
+        if isinstance(object, dict):
+            if key in object:
+                return object[key]
+            return noneValueInstance
+        if isinstance(object, list) and isinstance(key, int):
+            return object[key]
+        statement_error("Incompatible Datatype in expression: %s%s%s%s" % (object, lexer.SQUARE_L, key, lexer.SQUARE_R), stmt)
+        return noneValueInstance
+    return member
+
+
+def build_block_expression(stmt: ast.BlockStatement) -> Closure:
+    # A block gives None, or the value of a 'return' in it. A block without a variable declaration
+    # runs in the environment of its parent. A new scope would stay empty.
+    body = [build(statement) for statement in stmt.body]
+    has_scope = any(isinstance(statement, ast.VariableDeclaration) for statement in stmt.body)
+    RUN = envstate.RUN
+    RETURN = envstate.RETURN
+
+    if not _has_control_flow(stmt):
+        if has_scope:
+            def scoped_block(env: Environment) -> RuntimeValue:
+                scope = Environment(env)
+                for statement in body:
+                    statement(scope)
+                return noneValueInstance
+            return scoped_block
+
+        def block(env: Environment) -> RuntimeValue:
+            for statement in body:
+                statement(env)
+            return noneValueInstance
+        return block
+
+    if has_scope:
+        def scoped_flow_block(env: Environment) -> RuntimeValue:
+            scope = Environment(env)
+            for statement in body:
+                last = statement(scope)
+                state = env.state = scope.state  # propagate state outwards
+                if state is not RUN:
+                    if state is RETURN:
+                        return last
+                    return noneValueInstance  # break and continue
+            return noneValueInstance
+        return scoped_flow_block
+
+    def flow_block(env: Environment) -> RuntimeValue:
+        for statement in body:
+            last = statement(env)
+            state = env.state
+            if state is not RUN:
+                if state is RETURN:
+                    return last
+                return noneValueInstance  # break and continue
+        return noneValueInstance
+    return flow_block
+
+
+def build_if_expression(stmt: ast.IfExpression) -> Closure:
+    # the branches give None unless there is a 'return', that is what the 'if' gives too
+    test = build(stmt.test)
+    consequent = build(stmt.consequent)
+    if not stmt.alternate:
+        def if_expression(env: Environment) -> RuntimeValue:
+            if test(env).value:
+                return consequent(env)
+            return noneValueInstance
+        return if_expression
+
+    alternate = build(stmt.alternate)
+
+    def if_else_expression(env: Environment) -> RuntimeValue:
+        if test(env).value:
+            return consequent(env)
+        return alternate(env)
+    return if_else_expression
+
+
+def build_while_expression(stmt: ast.WhileExpression) -> Closure:
+    condition = build(stmt.condition)
+    body = build(stmt.body)
+    RUN = envstate.RUN
+    BREAK = envstate.BREAK
+    RETURN = envstate.RETURN
+
+    if not _has_control_flow(stmt.body):
+        def simple_while(env: Environment) -> RuntimeValue:
+            while condition(env).value:
+                body(env)
+            return noneValueInstance
+        return simple_while
+
+    def while_expression(env: Environment) -> RuntimeValue:
+        while condition(env).value:
+            last = body(env)
+            state = env.state
+            if state is not RUN:
+                if state is RETURN:
+                    return last
+                # must reset the state because we catched the case and it does not propagate outward
+                env.state = RUN
+                if state is BREAK:
+                    break
+        return noneValueInstance
+    return while_expression
+
+
+def build_for_expression(stmt: ast.ForExpression) -> Closure:
+    quantity_min = build(stmt.quantity_min) if stmt.quantity_min else None
+    quantity_max = build(stmt.quantity_max)
+    body = build(stmt.body)
+    has_control_flow = _has_control_flow(stmt.body)
+    type = stmt.type or ast.Type(lexer.Pimitives.INT)  # fallback type
+    is_int = type.type == lexer.Pimitives.INT
+    loopvarname = stmt.identifier
+    assign_type = inter._assign_Type
+    RUN = envstate.RUN
+    BREAK = envstate.BREAK
+    RETURN = envstate.RETURN
+
+    def for_expression(env: Environment) -> RuntimeValue:
+        is_range_iterator = False
+        iterator: typing.Any = 0
+        if quantity_min is None:
+            max = quantity_max(env)
+            if isinstance(max, inter._NumberValue):
+                iterator = range(max.value)
+                is_range_iterator = True
+            elif isinstance(max, inter.ListValue):
+                iterator = max.value
+            else:
+                statement_error("For loop encountered incompatible type to iterate. Can only iterate Numbers and Lists.", stmt)
+        else:
+            i_min: int = quantity_min(env).value
+            i_max: int = quantity_max(env).value
+            iterator = range(i_min, i_max)
+            is_range_iterator = True
+
+        # for loop has the limited scope iteration variable. Make a new Environment for it.
+        scope = Environment(env)
+        scope.declare_local(loopvarname, assign_type(0, type), True, stmt)
+        variables = scope.scope
+        # an int counter needs no type conversion. The loop variable is set directly as long
+        # as it was not deleted by the body.
+        fast = is_range_iterator and is_int
+
+        for i in iterator:
+            if fast and loopvarname in variables:
+                variables[loopvarname] = IntValue(i)
+            else:
+                if is_range_iterator:
+                    scope.assign(loopvarname, IntValue(i), stmt)
+                    value = i  # it is of type numeric (python native)
+                else:
+                    scope.assign(loopvarname, i, stmt)
+                    value = i.value  # it is of type RuntypeValue
+                scope.assign(loopvarname, assign_type(value, type), stmt)
+
+            last = body(scope)
+            if has_control_flow:
+                state = env.state = scope.state  # propagate state outwards
+                if state is not RUN:
+                    if state is RETURN:
+                        return last
+                    # must reset the state because we catched the case and it does not propagate outward
+                    env.state = RUN
+                    scope.state = RUN
+                    if state is BREAK:
+                        break
+        return noneValueInstance
+    return for_expression
+
+
+def build_return_expression(stmt: ast.ReturnExpression) -> Closure:
+    RETURN = envstate.RETURN
+    if not stmt.value:
+        def return_none(env: Environment) -> RuntimeValue:
+            env.state = RETURN
+            return noneValueInstance
+        return return_none
+
+    value = build(stmt.value)
+
+    def return_expression(env: Environment) -> RuntimeValue:
+        last = value(env)
+        # set state to return AFTER interpretation, because interpretation might overwrite state.
+        env.state = RETURN
+        return last
+    return return_expression
+
+
+def build_break_expression(stmt: ast.BreakExpression) -> Closure:
+    def break_expression(env: Environment) -> RuntimeValue:
+        env.state = envstate.BREAK
+        return noneValueInstance
+    return break_expression
+
+
+def build_continue_expression(stmt: ast.ContinueExpression) -> Closure:
+    def continue_expression(env: Environment) -> RuntimeValue:
+        env.state = envstate.CONTINUE
+        return noneValueInstance
+    return continue_expression
+
+
+def build_elvis_expression(stmt: ast.ElvisExpression) -> Closure:
+    test = build(stmt.test)
+    consequent = build(stmt.consequent)
+    alternate = build(stmt.alternate)
+
+    def elvis(env: Environment) -> RuntimeValue:
+        if test(env).value:
+            return consequent(env)
+        return alternate(env)
+    return elvis
+
+
+def build_list_literal(stmt: ast.ListLiteral) -> Closure:
+    values = [build(value) for value in stmt.values]
+    ListValue = inter.ListValue
+    return lambda env: ListValue([value(env) for value in values])
+
+
+def build_object_literal(stmt: ast.ObjectLiteral) -> Closure:
+    properties = [(property.key, build(property.value) if property.value else None) for property in stmt.properties]
+
+    def object_literal(env: Environment) -> RuntimeValue:
+        obj = {}
+        for key, value in properties:
+            if value:
+                obj[key] = value(env)
+            else:
+                obj[key] = env.lookup(key, stmt)
+        return inter.ObjectValue(obj)
+    return object_literal
+
+
+def build_delete_expression(stmt: ast.DeleteExpression) -> Closure:
+    return lambda env: inter.interpret_delete_expression(stmt, env)
+
+
+def build_unreachable_expression(stmt: ast.UnreachableExpression) -> Closure:
+    return lambda env: inter.interpret_unreachable_expression(stmt, env)
+
+
+def build_program(stmt: ast.Program) -> Closure:
+    # see interpreter.interpret_program(..)
+    shebang = stmt.shebang
+    statements = []
+    defer = []  # direct function calls run after everything else is declared
+    for statement in stmt.body:
+        if isinstance(statement, ast.CallExpression):
+            defer.append(build(statement))
+        else:
+            statements.append(build(statement))
+    main: list[Closure] = []
+
+    def check(last: RuntimeValue, env: Environment):
+        if env.state is envstate.BREAK:
+            statement_error("Expression '%s' is not allowed outside loop." % lexer.BREAK, stmt)
+        if env.state is envstate.CONTINUE:
+            statement_error("Expression '%s' is not allowed outside loop." % lexer.CONTINUE, stmt)
+        if env.state is envstate.RETURN:
+            statement_error("Expression '%s' is not allowed outside function." % lexer.RETURN, stmt)
+        if last is None:
+            statement_error("Must return a runtime value.", stmt)  # this is a development check mainly
+
+    def program(env: Environment) -> RuntimeValue:
+        last: RuntimeValue = noneValueInstance
+        if shebang is not None:
+            inter.interpret_shebang_expression(shebang, env)
+        for statement in statements:
+            last = statement(env)
+            check(last, env)
+
+        if env.get_root_env().is_script:
+            # in script mode interpret all function calls in order
+            for statement in defer:
+                last = statement(env)
+                check(last, env)
+        else:
+            # in normal or program mode just call main function only.
+            if len(defer):
+                statement_error("In normal mode the main function gets automatically called. Did you forgot '#!script' shebang?", stmt)
+            if env.has("main"):
+                if not main:
+                    main.append(build(ast.CallExpression(ast.Identifier("main"), [])))
+                last = main[0](env)
+        return last
+    return program
+
+
+# node class to the function building its closure. Subclasses are added by _find_builder(..).
+_builders: dict[type, typing.Callable[[typing.Any], Closure]] = {
+    ast.BinaryExpression: build_binary_expression,
+    ast.UnaryBeforeExpression: build_unary_before_expression,
+    ast.UnaryIdentifierBeforeExpression: build_unary_identifier_before_expression,
+    ast.UnaryIdentifierAfterExpression: build_unary_identifier_after_expression,
+    ast.AssignmentExpression: build_assignment_expression,
+    ast.NumericLiteral: build_numeric_literal,
+    ast.FloatLiteral: build_float_literal,
+    ast.StringLiteral: build_string_literal,
+    ast.Identifier: build_identifier,
+    ast.VariableDeclaration: build_variable_declaration,
+    ast.Program: build_program,
+    ast.FunctionDeclaration: build_function_declaration,
+    ast.CallExpression: build_call_expression,
+    ast.InlinedCallExpression: build_inlined_call_expression,
+    ast.MemberExpression: build_member_expression,
+    ast.IfExpression: build_if_expression,
+    ast.WhileExpression: build_while_expression,
+    ast.ForExpression: build_for_expression,
+    ast.BlockStatement: build_block_expression,
+    ast.ReturnExpression: build_return_expression,
+    ast.BreakExpression: build_break_expression,
+    ast.ContinueExpression: build_continue_expression,
+    ast.ElvisExpression: build_elvis_expression,
+    ast.ListLiteral: build_list_literal,
+    ast.ObjectLiteral: build_object_literal,
+    ast.DeleteExpression: build_delete_expression,
+    ast.UnreachableExpression: build_unreachable_expression,
+}
@@ -1,15 +1,21 @@
 from flolang.console import parse_arguments, print_exception, set_pretty_print
 import sys
-from flolang import tokenize, default_environment, parse, interpret, to_native, eval
+from flolang import tokenize, iter_tokens, default_environment, parse, interpret, to_native, eval
 from flolang.debugtools import print_ast
 from flolang.argument_parser import ArgumentParser
 import os
 from io import TextIOWrapper
+from typing import Iterable, TextIO
+from flolang.lexer import Token
+from flolang.abstract_source_tree import Program
+from flolang.cache import cached_parse, cached_parse_file, cache_directory
+from flolang.intermediate import Program as IntermediateProgram
+from flolang.optimizer import optimize, Report, INLINE_SIZE
 
 
 def declare_arguments(env, arguments):
     # declare argument array in environment
-    command = "static int __argv = " + str(arguments).replace("'", '"')
+    command = "static __argv = " + str(arguments).replace("'", '"')
     eval(command, env=env, shebang=None)
 
 
@@ -31,29 +37,59 @@ def file_ending(file_name, ending):
     return file_name + ending
 
 
-def compile(code: str, f: TextIOWrapper, emit: str | None):
+def _tokens(code: str | TextIO) -> Iterable[Token]:
+    # source code as string is tokenized at once. Files are tokenized lazily.
+    if isinstance(code, str):
+        return tokenize(code)
+    return iter_tokens(code)
+
+
+def _cached_parse(code: str | TextIO) -> tuple[list[Token], Program]:
+    # files use the __flocache__ directory next to them, source code as string is not cached.
+    # A file is read line by line, see cached_parse_file(..)
+    if isinstance(code, str):
+        return cached_parse(code)
+    name = getattr(code, "name", None)
+    if isinstance(name, str):
+        return cached_parse_file(name, directory=cache_directory(name))
+    tok = list(iter_tokens(code))
+    return tok, parse(tok)
+
+
+def _optimize(ast: Program, inline_size: int | None) -> Report:
+    # the functions of the builtin prelude are inlined like when running. None does not optimize.
+    if inline_size is None:
+        return Report()
+    return optimize(ast, default_environment(), inline_size)
+
+
+# gives what the optimizer did, see flolang.optimizer
+def compile(code: str | TextIO, f: TextIOWrapper, emit: str | None, inline_size: int | None = INLINE_SIZE) -> Report:
+    report = Report()
     if emit == "token":
-        tok = tokenize(code)
-        for t in tok:
+        for t in _tokens(code):
             print(t, file=f)
 
     elif emit == "ast":
-        tok = tokenize(code)
-        ast = parse(tok)
+        tok, ast = _cached_parse(code)
+        report = _optimize(ast, inline_size)
         print_ast(ast, file=f)
 
     elif emit == "ir":
-        raise NotImplementedError("emit ir is not supported")
+        tok, ast = _cached_parse(code)
+        report = _optimize(ast, inline_size)
+        print(IntermediateProgram(ast).listing(), file=f)
 
     else:
         raise ValueError(f"Unknown emit type: {emit}")
+    return report
 
 
 def compiler_run(argv: list[str]):
     ap = ArgumentParser(
         argv,
-        ["pretty", "help", "token"],
-        ["emit", "output"],)
+        ["pretty", "help", "token", "report", "no-optimize"],
+        ["emit", "output", "inline"],)
 
     if ap.switch("pretty"):
         set_pretty_print(True)
@@ -66,13 +102,23 @@ def compiler_run(argv: list[str]):
         assert len(ap.args()) == 1, "only one file allowed when output specified"
 
     emit = ap.key("emit")
+    inline = ap.key("inline")
+    inline_size: int | None = INLINE_SIZE
+    if inline is not None:
+        if not inline.isdigit():
+            print("inline size '%s' is not a number" % inline, file=sys.stderr)
+            return
+        inline_size = int(inline)
+    if ap.switch("no-optimize"):
+        inline_size = None
 
     for input_file in ap.args():
         with open(input_file, "r", encoding="utf-8") as f:
-            code = f.read()
             output_file = file_ending(auto_filename(output, input_file), f".{emit}")
             with open(output_file, "w", encoding="utf-8") as out:
-                compile(code, out, emit)
+                report = compile(f, out, emit, inline_size)
+            if ap.switch("report"):
+                print("%s: optimizer %s" % (input_file, report), file=sys.stderr)
 
 
 def main_func_compiler():
@@ -32,13 +32,15 @@ class IntermediateError():
     pass
 
 
+# tokens (see lexer.Token) only resolve filename and line from their line table here,
+# when an error message is actually produced.
 def compile_error(comment: str, loc=None):
     if loc:
-        file = loc.start.symbols.filename
-        line_nr = loc.start.symbols.line_nr
-        full_line = loc.start.symbols.line
-        start = loc.start.symbols.line_pos
-        end = loc.end.symbols.line_pos
+        file = loc.start.filename
+        line_nr = loc.start.line_nr
+        full_line = loc.start.line
+        start = loc.start.line_pos
+        end = loc.end.line_pos
         length = end - start + loc.end.len()
         if length <= 0:
             length = 1
@@ -53,11 +55,11 @@ def compile_error(comment: str, loc=None):
 
 
 def parser_error(comment: str, start_token, end_token):
-    file = start_token.symbols.filename
-    line_nr = start_token.symbols.line_nr
-    full_line = start_token.symbols.line
-    start = start_token.symbols.line_pos
-    end = end_token.symbols.line_pos
+    file = start_token.filename
+    line_nr = start_token.line_nr
+    full_line = start_token.line
+    start = start_token.line_pos
+    end = end_token.line_pos
     length = end - start + end_token.len()
     if length <= 0:
         length = 1
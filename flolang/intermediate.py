@@ -1,5 +1,21 @@
 from flolang import abstract_source_tree as ast
 from flolang.error import compile_error
+import flolang.interpreter as inter
+import flolang.closure as closure
+import flolang.lexer as lexer
+from flolang.interpreter import Environment, RuntimeValue, envstate, noneValueInstance, statement_error
+from array import array
+import itertools
+from typing import Any
+
+
+# Intermediate representation. A program is compiled to a linear stack based bytecode and run
+# by a dispatch loop (see run(..)) with the same semantics as interpreter.interpret(..).
+# An instruction is two ints in Code.code, the opcode and its argument. The argument is an index
+# into the constant pool, the name pool, the operator list or it is the offset of a jump target.
+# Every function body is its own Code, it is a constant of the code declaring the function.
+# Blocks open an Environment (ENTER_SCOPE) only if they declare a variable. 'break' and 'continue'
+# are jumps, 'return' leaves the dispatch loop of the function.
 
 
 def intermediate_error(message, stmt: ast.Statement):
@@ -8,15 +24,80 @@ def intermediate_error(message, stmt: ast.Statement):
 
 
 class NoStatement(ast.Statement):
+    __slots__ = ()
 
     def __repr__(self):
         return "?"
 
 
+# small name because its used as enumeration
+class op:
+    NOP = 0
+    CONST = 1  # push constants[arg]
+    LOAD = 2  # push variable names[arg]
+    STORE = 3  # assign the top to variable names[arg], it stays on the stack
+    POP = 4
+    ASSIGN_TYPE = 5  # pop left and right, push right with the type of left, see '='
+    COMPOUND = 6  # pop left and right, push left <operators[arg]>= right
+    STORE_MEMBER = 7  # pop object, key and value, object[key] <operators[arg]>= value
+    MEMBER = 8  # pop object and key, push object[key]
+    DECLARE = 9  # declare the top with the variable declaration constants[arg]
+    FUNCTION = 10  # pop the defaults, declare the function constants[arg]
+    CALL = 11  # pop function and arg arguments, push the result
+    BINARY = 12  # pop left and right, push left <operators[arg]> right
+    UNARY = 13  # pop value, push <operators[arg]> value
+    PRE_INCREMENT = 14  # ++names[arg]
+    PRE_DECREMENT = 15
+    POST_INCREMENT = 16  # names[arg]++
+    POST_DECREMENT = 17
+    JUMP = 18  # continue at offset arg
+    JUMP_IF_FALSE = 19  # pop value, jump if it is false
+    JUMP_IF_NOT_SCRIPT = 20
+    HAS = 21  # push if names[arg] is defined
+    ENTER_SCOPE = 22
+    LEAVE_SCOPE = 23
+    FOR_INIT = 24  # pop the quantities, open the loop scope and push the iterator of constants[arg]
+    FOR_NEXT = 25  # next value of the iterator to the loop variable, jump to arg when done
+    LIST = 26  # pop arg values, push the list of them
+    OBJECT = 27  # pop the values of the properties constants[arg], push the object
+    DELETE = 28
+    SHEBANG = 29  # configure the interpreter with the shebang constants[arg]
+    INTERPRET = 30  # let the interpreter do constants[arg]
+    ERROR = 31  # raise the error message constants[arg]
+    SIGNAL = 32  # leave the function with a 'break' (arg 0) or 'continue' (arg 1)
+    RETURN = 33  # leave the function with the top
+    END = 34  # end of the code, leave with the top
+    CALLABLE = 35  # the error of a call if the top is no function, before its arguments run
+
+
+opnames = {value: name for name, value in vars(op).items() if not name.startswith("_")}
+
+_jumps = {op.JUMP, op.JUMP_IF_FALSE, op.JUMP_IF_NOT_SCRIPT, op.FOR_NEXT}
+_named = {op.LOAD, op.STORE, op.PRE_INCREMENT, op.PRE_DECREMENT, op.POST_INCREMENT, op.POST_DECREMENT, op.HAS, op.DELETE}
+_constant = {op.CONST, op.DECLARE, op.FUNCTION, op.FOR_INIT, op.OBJECT, op.SHEBANG, op.INTERPRET, op.ERROR}
+_operator = {op.COMPOUND, op.STORE_MEMBER, op.BINARY, op.UNARY}
+
+# every operator by its index, this is the argument of the operator instructions
+operators: list[str] = sorted({lexer.ASSIGN, *inter._binary_operations, *inter._unary_operations, *inter._assignment_operations})
+_operator_index = {operator: i for i, operator in enumerate(operators)}
+_binary_table: list[Any] = [inter._binary_operations.get(operator) for operator in operators]
+_unary_table: list[Any] = [inter._unary_operations.get(operator) for operator in operators]
+_assignment_table: list[Any] = [inter._assignment_operations.get(operator) for operator in operators]
+# operations of two int values, see closure
+_int_binary_table: list[Any] = [closure._int_operations.get(operator) for operator in operators]
+_int_compare_table: list[Any] = [closure._int_comparisons.get(operator) for operator in operators]
+_int_assignment_table: list[Any] = [closure._int_assignment_operations.get(operator) for operator in operators]
+_assign = _operator_index[lexer.ASSIGN]
+_literals = (ast.NumericLiteral, ast.FloatLiteral, ast.StringLiteral)  # cannot fail nor change anything
+_signals = [envstate.BREAK, envstate.CONTINUE]
+
+
 class Instruction:
-    "Intermediate Representation Instruction base class"
-    def __init__(self, stmt: ast.Statement):
-        self.kind = type(self).__name__
+    "Intermediate Representation Instruction, the argument of a jump is a Label until assembled"
+    def __init__(self, opcode: int, argument: Any, stmt: ast.Statement):
+        self.kind = opnames[opcode]
+        self.opcode = opcode
+        self.argument = argument
         self.stmt = stmt
 
     def __repr__(self):
@@ -30,49 +111,769 @@ class Instruction:
         return self
 
 
-class UnreachableInstruction(Instruction):
-    ...
+class Label:
+    "Jump target. Its offset is known when the code is assembled"
+    def __init__(self):
+        self.offset = -1
+
 
+class Code:
+    "Bytecode of the program or a function body"
+    def __init__(self, name: str):
+        self.name = name
+        self.code = array("i")
+        self.constants: list[Any] = []
+        self.names: list[str] = []
+        self.statements: list[ast.Statement] = []  # of every instruction, for the error location
+
+    def __repr__(self):
+        return "<code %s>" % self.name
 
-class ProgramStartInstruction(Instruction):
-    ...
+    def listing(self) -> str:
+        lines = ["code %s:" % self.name]
+        codes = []
+        for offset in range(0, len(self.code), 2):
+            opcode = self.code[offset]
+            argument = self.code[offset + 1]
+            if opcode in _jumps:
+                text = "%d (to %d)" % (argument, argument)
+            elif opcode in _named:
+                text = "%d (%s)" % (argument, self.names[argument])
+            elif opcode in _constant:
+                constant = self.constants[argument]
+                text = "%d (%s)" % (argument, _constant_text(constant))
+                if isinstance(constant, Function):
+                    codes.append(constant.code)
+            elif opcode in _operator:
+                text = "%d (%s)" % (argument, operators[argument])
+            elif opcode == op.NOP or opcode == op.POP or opcode == op.ASSIGN_TYPE or opcode == op.MEMBER \
+                    or opcode == op.ENTER_SCOPE or opcode == op.LEAVE_SCOPE or opcode == op.RETURN or opcode == op.END \
+                    or opcode == op.CALLABLE:
+                text = ""
+            else:
+                text = str(argument)
+            lines.append("%6d  %-18s %s" % (offset, opnames[opcode], text))
+        for code in codes:
+            lines.append("")
+            lines.append(code.listing())
+        return "\n".join(lines)
 
 
-class ProgramEndInstruction(Instruction):
-    ...
+def _constant_text(constant: Any) -> str:
+    if isinstance(constant, ast.Type):
+        return constant.type
+    if isinstance(constant, ast.Statement):
+        return constant.kind
+    if isinstance(constant, tuple):
+        return ", ".join(_constant_text(element) for element in constant)
+    return repr(constant)
+
+
+class Function:
+    "Constant of a function declaration, the function body is compiled to code"
+    def __init__(self, stmt: ast.FunctionDeclaration, code: Code):
+        self.stmt = stmt
+        self.code = code
+        self.defaults = sum(1 for param in stmt.parameters if param.default)
+
+    def __repr__(self):
+        return "<function %s>" % self.stmt.identifier
+
+
+class _Loop:
+    def __init__(self, scope_depth: int, next: Label, exit: Label):
+        self.scope_depth = scope_depth  # of the loop scope, a jump leaves the ones inside
+        self.next = next
+        self.exit = exit
+
+
+class _Builder:
+    "Instructions of one code until they are assembled"
+    def __init__(self, code_name: str, program: ast.Program | None):
+        self.code_name = code_name
+        self.program = program  # the top level code, None in a function body
+        self.list: list[Instruction | Label] = []
+        self.constants: dict[Any, int] = {}
+        self.constant_list: list[Any] = []
+        self.names: dict[str, int] = {}
+        self.loops: list[_Loop] = []
+        self.scope_depth = 0
+
+    def emit(self, opcode: int, argument: Any, stmt: ast.Statement):
+        self.list.append(Instruction(opcode, argument, stmt))
+
+    def place(self, label: Label):
+        self.list.append(label)
+
+    def constant(self, value: Any) -> int:
+        # literal values are shared, everything else is one constant per use
+        key = (type(value), value.value) if isinstance(value, RuntimeValue) else id(value)
+        if key not in self.constants:
+            self.constants[key] = len(self.constant_list)
+            self.constant_list.append(value)
+        return self.constants[key]
+
+    def name(self, name: str) -> int:
+        if name not in self.names:
+            self.names[name] = len(self.names)
+        return self.names[name]
+
+    def assemble(self) -> Code:
+        code = Code(self.code_name)
+        offset = 0
+        for instruction in self.list:
+            if isinstance(instruction, Label):
+                instruction.offset = offset
+            else:
+                offset += 2
+        for instruction in self.list:
+            if isinstance(instruction, Instruction):
+                argument = instruction.argument
+                if isinstance(argument, Label):
+                    argument = argument.offset
+                code.code.append(instruction.opcode)
+                code.code.append(argument)
+                code.statements.append(instruction.stmt)
+        code.constants = self.constant_list
+        code.names = list(self.names)
+        return code
 
 
 class Program:
+    "A program compiled to bytecode"
     def __init__(self, stmt: ast.Program):
-        self.list: list[Instruction] = []
-
         assert isinstance(stmt, ast.Program)
+        self.code = Compiler().dump_program(stmt)
+
+    def listing(self) -> str:
+        return self.code.listing()
 
-        self.dump_program(stmt)
 
-    def dump_program(self, node: ast.Program):
-        self.list.append(ProgramStartInstruction(node))
+_literal_values: dict[type, Any] = {
+    ast.NumericLiteral: inter.IntValue,  # always integer
+    ast.FloatLiteral: inter.FloatValue,
+    ast.StringLiteral: inter.StringValue,
+}
+
+
+class Compiler:
+    "Compiles the nodes with the dump_* methods to the instructions of the current builder"
+    def __init__(self):
+        self.builder = _Builder("", None)
+
+    def dump(self, stmt: ast.Statement):
+        try:
+            dumper = _dumpers[type(stmt)]
+        except KeyError:
+            for base in type(stmt).__mro__:
+                if base in _dumpers:
+                    dumper = _dumpers[type(stmt)] = _dumpers[base]
+                    break
+            else:
+                dumper = Compiler.dump_unknown
+        dumper(self, stmt)
+
+    def dump_statements(self, statements: list[ast.Statement]):
+        for stmt in statements:
+            self.dump(stmt)
+            self.builder.emit(op.POP, 0, stmt)
+
+    def dump_function_body(self, name: str, body: ast.BlockStatement) -> Code:
+        outer = self.builder
+        self.builder = _Builder(name, None)
+        self.dump(body)
+        self.builder.emit(op.END, 0, body)
+        code = self.builder.assemble()
+        self.builder = outer
+        return code
+
+    def dump_program(self, node: ast.Program) -> Code:
+        b = self.builder = _Builder("<program>", node)
+        none = b.constant(noneValueInstance)
+        if node.shebang is not None:
+            b.emit(op.SHEBANG, b.constant(node.shebang), node.shebang)
+
+        # direct function calls are deferred, see interpreter.interpret_program(..)
+        defer = []
+        b.emit(op.CONST, none, node)  # the value of the program if there is no statement
         for stmt in node.body:
-            if isinstance(stmt, ast.ShebangExpression):
-                pass  # shebang does not concern. It is ignored
-            elif isinstance(stmt, ast.VariableDeclaration):
-                self.dump_variable_declaration(stmt)
-            elif isinstance(stmt, ast.FunctionDeclaration):
-                self.dump_function_declaration(stmt)
-            elif isinstance(stmt, ast.ClassDeclaration):
-                self.dump_class_declaration(stmt)
-            elif isinstance(stmt, ast.EnumDeclaration):
-                self.dump_enum_declaration(stmt)
-        self.list.append(ProgramEndInstruction(node))
-
-    def dump_function_declaration(self, stmt: ast.Statement):
-        pass
-
-    def dump_variable_declaration(self, stmt: ast.Statement):
-        pass
+            if isinstance(stmt, ast.CallExpression):
+                defer.append(stmt)
+            else:
+                b.emit(op.POP, 0, stmt)
+                self.dump(stmt)
+
+        normal = Label()
+        end = Label()
+        b.emit(op.JUMP_IF_NOT_SCRIPT, normal, node)
+        for stmt in defer:
+            b.emit(op.POP, 0, stmt)
+            self.dump(stmt)
+        b.emit(op.END, 0, node)
+
+        b.place(normal)
+        if len(defer):
+            b.emit(op.ERROR, b.constant("In normal mode the main function gets automatically called. Did you forgot '#!script' shebang?"), node)
+        main = ast.CallExpression(ast.Identifier("main"), [])
+        b.emit(op.HAS, b.name("main"), node)
+        b.emit(op.JUMP_IF_FALSE, end, node)
+        b.emit(op.POP, 0, node)
+        self.dump(main)
+        b.place(end)
+        b.emit(op.END, 0, node)
+        return b.assemble()
+
+    def dump_variable_declaration(self, stmt: ast.VariableDeclaration):
+        self.dump(stmt.value)
+        self.builder.emit(op.DECLARE, self.builder.constant(stmt), stmt)
+
+    def dump_function_declaration(self, stmt: ast.FunctionDeclaration):
+        for param in stmt.parameters:
+            if param.default:
+                self.dump(param.default)
+        code = self.dump_function_body(stmt.identifier, stmt.body)
+        self.builder.emit(op.FUNCTION, self.builder.constant(Function(stmt, code)), stmt)
 
     def dump_class_declaration(self, stmt: ast.Statement):
-        pass
+        self.dump_unknown(stmt)
 
     def dump_enum_declaration(self, stmt: ast.Statement):
-        pass
+        self.dump_unknown(stmt)
+
+    def dump_unknown(self, stmt: ast.Statement):
+        # the interpreter gives the error of an unsupported statement
+        self.builder.emit(op.INTERPRET, self.builder.constant(stmt), stmt)
+
+    def dump_literal(self, stmt: ast.NumericLiteral | ast.FloatLiteral | ast.StringLiteral):
+        # runtime values are never modified, the literal is made once
+        value = _literal_values[type(stmt)](stmt.value)
+        self.builder.emit(op.CONST, self.builder.constant(value), stmt)
+
+    def dump_identifier(self, stmt: ast.Identifier):
+        self.builder.emit(op.LOAD, self.builder.name(stmt.symbol), stmt)
+
+    def dump_binary_expression(self, stmt: ast.BinaryExpression):
+        self.dump(stmt.left)
+        self.dump(stmt.right)
+        if stmt.operator not in inter._binary_operations:
+            self.builder.emit(op.ERROR, self.builder.constant('Did not found a operation for this expression.'), stmt)
+        else:
+            self.builder.emit(op.BINARY, _operator_index[stmt.operator], stmt)
+
+    def dump_unary_before_expression(self, stmt: ast.UnaryBeforeExpression):
+        self.dump(stmt.expr)
+        if stmt.operator not in inter._unary_operations:
+            self.builder.emit(op.ERROR, self.builder.constant("Statement operator invalid '%s' for unary." % stmt.operator), stmt)
+        else:
+            self.builder.emit(op.UNARY, _operator_index[stmt.operator], stmt)
+
+    def dump_unary_identifier_expression(self, stmt: ast.UnaryIdentifierBeforeExpression | ast.UnaryIdentifierAfterExpression):
+        b = self.builder
+        before = isinstance(stmt, ast.UnaryIdentifierBeforeExpression)
+        if stmt.operator is lexer.INCREMENT:
+            b.emit(op.PRE_INCREMENT if before else op.POST_INCREMENT, b.name(stmt.identifier), stmt)
+        elif stmt.operator is lexer.DECREMENT:
+            b.emit(op.PRE_DECREMENT if before else op.POST_DECREMENT, b.name(stmt.identifier), stmt)
+        else:
+            b.emit(op.LOAD, b.name(stmt.identifier), stmt)
+            message = "Statement operator invalid '%s' for unary." if before else "Statement operator invalid '%s' for unary post expression."
+            b.emit(op.ERROR, b.constant(message % stmt.operator), stmt)
+
+    def dump_assignment_expression(self, stmt: ast.AssignmentExpression):
+        b = self.builder
+        if isinstance(stmt.assignee, ast.Identifier):
+            name = b.name(stmt.assignee.symbol)
+            self.dump(stmt.value)
+            b.emit(op.LOAD, name, stmt)
+            if stmt.operator is lexer.ASSIGN:
+                b.emit(op.ASSIGN_TYPE, 0, stmt)
+            elif stmt.operator in inter._assignment_operations:
+                b.emit(op.COMPOUND, _operator_index[stmt.operator], stmt)
+            else:
+                b.emit(op.ERROR, b.constant("Statement operator invalid '%s'." % stmt.operator), stmt)
+            b.emit(op.STORE, name, stmt)
+        elif isinstance(stmt.assignee, ast.MemberExpression):
+            self.dump_member_key(stmt.assignee)
+            self.dump(stmt.value)
+            if stmt.operator in _operator_index:
+                b.emit(op.STORE_MEMBER, _operator_index[stmt.operator], stmt)
+            else:
+                b.emit(op.ERROR, b.constant("Statement operator invalid '%s'." % stmt.operator), stmt)
+        else:
+            b.emit(op.CONST, b.constant(noneValueInstance), stmt)
+
+    def dump_member_key(self, stmt: ast.MemberExpression):
+        self.dump(stmt.object)
+        if isinstance(stmt.key, ast.Identifier):
+            self.builder.emit(op.CONST, self.builder.constant(inter.StringValue(stmt.key.symbol)), stmt.key)
+        else:
+            self.dump(stmt.key)
+
+    def dump_member_expression(self, stmt: ast.MemberExpression):
+        self.dump_member_key(stmt)
+        self.builder.emit(op.MEMBER, 0, stmt)
+
+    def dump_call_expression(self, stmt: ast.CallExpression):
+        self.dump(stmt.caller)
+        # the interpreter checks the function first, an argument might have effects or fail
+        if any(not isinstance(argument, _literals) for argument in stmt.arguments):
+            self.builder.emit(op.CALLABLE, 0, stmt)
+        for argument in stmt.arguments:
+            self.dump(argument)
+        self.builder.emit(op.CALL, len(stmt.arguments), stmt)
+
+    def dump_inlined_call_expression(self, stmt: ast.InlinedCallExpression):
+        # no test of the function called, the call always runs
+        self.dump(stmt.call)
+
+    def dump_block_expression(self, stmt: ast.BlockStatement):
+        # a block without variable declaration would have an empty scope
+        b = self.builder
+        has_scope = any(isinstance(s, ast.VariableDeclaration) for s in stmt.body)
+        if has_scope:
+            b.emit(op.ENTER_SCOPE, 0, stmt)
+            b.scope_depth += 1
+        self.dump_statements(stmt.body)
+        if has_scope:
+            b.emit(op.LEAVE_SCOPE, 0, stmt)
+            b.scope_depth -= 1
+        b.emit(op.CONST, b.constant(noneValueInstance), stmt)
+
+    def dump_if_expression(self, stmt: ast.IfExpression | ast.ElvisExpression):
+        b = self.builder
+        alternate = Label()
+        end = Label()
+        self.dump(stmt.test)
+        b.emit(op.JUMP_IF_FALSE, alternate, stmt)
+        self.dump(stmt.consequent)
+        b.emit(op.JUMP, end, stmt)
+        b.place(alternate)
+        if stmt.alternate:
+            self.dump(stmt.alternate)
+        else:
+            b.emit(op.CONST, b.constant(noneValueInstance), stmt)
+        b.place(end)
+
+    def dump_while_expression(self, stmt: ast.WhileExpression):
+        b = self.builder
+        loop = _Loop(b.scope_depth, Label(), Label())
+        b.place(loop.next)
+        self.dump(stmt.condition)
+        b.emit(op.JUMP_IF_FALSE, loop.exit, stmt)
+        b.loops.append(loop)
+        self.dump(stmt.body)
+        b.loops.pop()
+        b.emit(op.POP, 0, stmt)
+        b.emit(op.JUMP, loop.next, stmt)
+        b.place(loop.exit)
+        b.emit(op.CONST, b.constant(noneValueInstance), stmt)
+
+    def dump_for_expression(self, stmt: ast.ForExpression):
+        b = self.builder
+        if stmt.quantity_min:
+            self.dump(stmt.quantity_min)
+        self.dump(stmt.quantity_max)
+        type = stmt.type or ast.Type(lexer.Pimitives.INT)  # fallback type
+        b.emit(op.FOR_INIT, b.constant((stmt.identifier, type, bool(stmt.quantity_min))), stmt)
+        b.scope_depth += 1
+        loop = _Loop(b.scope_depth, Label(), Label())
+        b.place(loop.next)
+        b.emit(op.FOR_NEXT, loop.exit, stmt)
+        b.loops.append(loop)
+        self.dump(stmt.body)
+        b.loops.pop()
+        b.emit(op.POP, 0, stmt)
+        b.emit(op.JUMP, loop.next, stmt)
+        b.place(loop.exit)
+        b.scope_depth -= 1
+        b.emit(op.LEAVE_SCOPE, 0, stmt)
+        b.emit(op.POP, 0, stmt)  # the iterator
+        b.emit(op.CONST, b.constant(noneValueInstance), stmt)
+
+    def dump_jump(self, stmt: ast.BreakExpression | ast.ContinueExpression, keyword: str):
+        b = self.builder
+        if b.loops:
+            loop = b.loops[-1]
+            for _ in range(b.scope_depth - loop.scope_depth):
+                b.emit(op.LEAVE_SCOPE, 0, stmt)
+            b.emit(op.JUMP, loop.exit if keyword is lexer.BREAK else loop.next, stmt)
+        elif b.program is None:
+            # the call of the function gives the error
+            b.emit(op.SIGNAL, 0 if keyword is lexer.BREAK else 1, stmt)
+        else:
+            b.emit(op.ERROR, b.constant("Expression '%s' is not allowed outside loop." % keyword), b.program)
+        # never reached, a statement leaves a value on the stack
+        b.emit(op.CONST, b.constant(noneValueInstance), stmt)
+
+    def dump_break_expression(self, stmt: ast.BreakExpression):
+        self.dump_jump(stmt, lexer.BREAK)
+
+    def dump_continue_expression(self, stmt: ast.ContinueExpression):
+        self.dump_jump(stmt, lexer.CONTINUE)
+
+    def dump_return_expression(self, stmt: ast.ReturnExpression):
+        b = self.builder
+        if stmt.value:
+            self.dump(stmt.value)
+        else:
+            b.emit(op.CONST, b.constant(noneValueInstance), stmt)
+        if b.program is None:
+            b.emit(op.RETURN, 0, stmt)
+        else:
+            b.emit(op.ERROR, b.constant("Expression '%s' is not allowed outside function." % lexer.RETURN), b.program)
+
+    def dump_list_literal(self, stmt: ast.ListLiteral):
+        for value in stmt.values:
+            self.dump(value)
+        self.builder.emit(op.LIST, len(stmt.values), stmt)
+
+    def dump_object_literal(self, stmt: ast.ObjectLiteral):
+        b = self.builder
+        for property in stmt.properties:
+            if property.value:
+                self.dump(property.value)
+            else:
+                b.emit(op.LOAD, b.name(property.key), stmt)
+        b.emit(op.OBJECT, b.constant([property.key for property in stmt.properties]), stmt)
+
+    def dump_delete_expression(self, stmt: ast.DeleteExpression):
+        self.builder.emit(op.DELETE, self.builder.name(stmt.identifier), stmt)
+
+
+# node class to the Compiler method compiling it. Subclasses are added by Compiler.dump(..).
+_dumpers: dict[type, Any] = {
+    ast.BinaryExpression: Compiler.dump_binary_expression,
+    ast.UnaryBeforeExpression: Compiler.dump_unary_before_expression,
+    ast.UnaryIdentifierBeforeExpression: Compiler.dump_unary_identifier_expression,
+    ast.UnaryIdentifierAfterExpression: Compiler.dump_unary_identifier_expression,
+    ast.AssignmentExpression: Compiler.dump_assignment_expression,
+    ast.NumericLiteral: Compiler.dump_literal,
+    ast.FloatLiteral: Compiler.dump_literal,
+    ast.StringLiteral: Compiler.dump_literal,
+    ast.Identifier: Compiler.dump_identifier,
+    ast.VariableDeclaration: Compiler.dump_variable_declaration,
+    ast.FunctionDeclaration: Compiler.dump_function_declaration,
+    ast.ClassDeclaration: Compiler.dump_class_declaration,
+    ast.EnumDeclaration: Compiler.dump_enum_declaration,
+    ast.CallExpression: Compiler.dump_call_expression,
+    ast.InlinedCallExpression: Compiler.dump_inlined_call_expression,
+    ast.MemberExpression: Compiler.dump_member_expression,
+    ast.IfExpression: Compiler.dump_if_expression,
+    ast.ElvisExpression: Compiler.dump_if_expression,
+    ast.WhileExpression: Compiler.dump_while_expression,
+    ast.ForExpression: Compiler.dump_for_expression,
+    ast.BlockStatement: Compiler.dump_block_expression,
+    ast.ReturnExpression: Compiler.dump_return_expression,
+    ast.BreakExpression: Compiler.dump_break_expression,
+    ast.ContinueExpression: Compiler.dump_continue_expression,
+    ast.ListLiteral: Compiler.dump_list_literal,
+    ast.ObjectLiteral: Compiler.dump_object_literal,
+    ast.DeleteExpression: Compiler.dump_delete_expression,
+}
+
+
+# ---- virtual machine ---- #
+
+
+def execute(program: ast.Program, env: Environment) -> RuntimeValue:
+    # same as interpreter.interpret(program, env)
+    value, state = run(Program(program).code, env)
+    return value
+
+
+def _function_code(function: inter.RuntimeFunction) -> Code:
+    # a function declared by the interpreter (like the builtin ones) is compiled on its first call
+    if function.code is None:
+        function.code = Compiler().dump_function_body("<function>", function.body)
+    return function.code
+
+
+def run(code: Code, env: Environment) -> tuple[RuntimeValue, str]:
+    # runs the code until it ends or returns, gives the value and the state (RUN, RETURN or
+    # the BREAK and CONTINUE of a function body outside a loop). The opcodes are locals,
+    # comparing them is the dispatch.
+    (LOAD, CONST, POP, BINARY, JUMP, JUMP_IF_FALSE, STORE, ASSIGN_TYPE, COMPOUND, CALL, CALLABLE, FOR_NEXT,
+     PRE_INCREMENT, PRE_DECREMENT, POST_INCREMENT, POST_DECREMENT, ENTER_SCOPE, LEAVE_SCOPE, UNARY,
+     MEMBER, STORE_MEMBER, DECLARE, RETURN, END, FOR_INIT, FUNCTION, LIST, OBJECT,
+     JUMP_IF_NOT_SCRIPT, HAS, DELETE, SHEBANG, INTERPRET, ERROR, SIGNAL, NOP) = (
+        op.LOAD, op.CONST, op.POP, op.BINARY, op.JUMP, op.JUMP_IF_FALSE, op.STORE, op.ASSIGN_TYPE,
+        op.COMPOUND, op.CALL, op.CALLABLE, op.FOR_NEXT, op.PRE_INCREMENT, op.PRE_DECREMENT, op.POST_INCREMENT,
+        op.POST_DECREMENT, op.ENTER_SCOPE, op.LEAVE_SCOPE, op.UNARY, op.MEMBER, op.STORE_MEMBER, op.DECLARE,
+        op.RETURN, op.END, op.FOR_INIT, op.FUNCTION, op.LIST, op.OBJECT, op.JUMP_IF_NOT_SCRIPT, op.HAS,
+        op.DELETE, op.SHEBANG, op.INTERPRET, op.ERROR, op.SIGNAL, op.NOP)
+    IntValue = inter.IntValue
+    instructions = code.code
+    constants = code.constants
+    names = code.names
+    stack: list[Any] = []
+    push = stack.append
+    pop = stack.pop
+    pc = 0
+    while True:
+        opcode = instructions[pc]
+        argument = instructions[pc + 1]
+        pc += 2
+
+        if opcode == LOAD:
+            name = names[argument]
+            scope_env = env
+            while scope_env is not None:
+                if name in scope_env.scope:
+                    push(scope_env.scope[name])
+                    break
+                scope_env = scope_env.parent
+            else:
+                env.lookup(name, code.statements[pc // 2 - 1])  # not defined error
+
+        elif opcode == CONST:
+            push(constants[argument])
+
+        elif opcode == POP:
+            pop()
+
+        elif opcode == BINARY:
+            right = pop()
+            left = pop()
+            if type(left) is IntValue and type(right) is IntValue:
+                int_operation = _int_binary_table[argument]
+                if int_operation is not None:
+                    push(IntValue(int_operation(left.value, right.value)))
+                    continue
+                int_comparison = _int_compare_table[argument]
+                if int_comparison is not None:
+                    push(closure._true if int_comparison(left.value, right.value) else closure._false)
+                    continue
+            try:
+                push(_binary_table[argument](left, right))
+            except TypeError as te:
+                statement_error('Interpreter type error "%s". Unable to resolve operation with given types.' % str(te), code.statements[pc // 2 - 1])
+
+        elif opcode == JUMP_IF_FALSE:
+            if not pop().value:
+                pc = argument
+
+        elif opcode == JUMP:
+            pc = argument
+
+        elif opcode == STORE:
+            # the value stays on the stack. Any error is left to env.assign(..).
+            name = names[argument]
+            value = stack[-1]
+            store_env = closure._find(env, name)
+            if store_env is not None and name in store_env.mutables and type(store_env.scope[name]) is type(value):
+                store_env.scope[name] = value
+            else:
+                env.assign(name, value, code.statements[pc // 2 - 1])
+
+        elif opcode == ASSIGN_TYPE:
+            left = pop()
+            right = pop()
+            if type(left) is IntValue and type(right) is IntValue:
+                push(right)
+            else:
+                push(inter._expression_find_type_everything(left, right, right.value))
+
+        elif opcode == COMPOUND:
+            left = pop()
+            right = pop()
+            int_operation = _int_assignment_table[argument]
+            if int_operation is not None and type(left) is IntValue and type(right) is IntValue:
+                push(IntValue(int_operation(left.value, right.value)))
+            else:
+                push(_assignment_table[argument](left, right))
+
+        elif opcode == CALL:
+            if argument:
+                arguments = stack[-argument:]
+                del stack[-argument:]
+            else:
+                arguments = []
+            push(_call(pop(), arguments, env, code.statements[pc // 2 - 1]))
+
+        elif opcode == CALLABLE:
+            if not isinstance(stack[-1], (inter.RuntimeFunction, inter.NativeFunction)):
+                statement_error("Function type not implemented.", code.statements[pc // 2 - 1])
+
+        elif opcode == FOR_NEXT:
+            loop = stack[-1]
+            try:
+                i = next(loop[0])
+            except StopIteration:
+                pc = argument
+                continue
+            is_range_iterator, loopvarname, loop_type = loop[1], loop[2], loop[3]
+            if is_range_iterator and loop_type.type == lexer.Pimitives.INT and loopvarname in env.scope:
+                # an int counter needs no type conversion, see closure
+                env.scope[loopvarname] = IntValue(i)
+                continue
+            stmt = code.statements[pc // 2 - 1]
+            if is_range_iterator:
+                env.assign(loopvarname, inter.IntValue(i), stmt)
+                value = i  # it is of type numeric (python native)
+            else:
+                env.assign(loopvarname, i, stmt)
+                value = i.value  # it is of type RuntypeValue
+            env.assign(loopvarname, inter._assign_Type(value, loop_type), stmt)
+
+        elif opcode == PRE_INCREMENT or opcode == PRE_DECREMENT or opcode == POST_INCREMENT or opcode == POST_DECREMENT:
+            name = names[argument]
+            stmt = code.statements[pc // 2 - 1]
+            original = env.lookup(name, stmt)
+            step = 1 if opcode == PRE_INCREMENT or opcode == POST_INCREMENT else -1
+            variable = closure._increment(env, name, original, step, stmt)
+            push(variable if opcode == PRE_INCREMENT or opcode == PRE_DECREMENT else original)
+
+        elif opcode == ENTER_SCOPE:
+            env = Environment(env)
+
+        elif opcode == LEAVE_SCOPE:
+            env = env.parent
+
+        elif opcode == UNARY:
+            push(_unary_table[argument](pop()))
+
+        elif opcode == MEMBER:
+            key = pop().value
+            object = pop().value
+            if isinstance(object, dict):
+                push(object[key] if key in object else noneValueInstance)
+            elif isinstance(object, list) and isinstance(key, int):
+                push(object[key])
+            else:
+                statement_error("Incompatible Datatype in expression: %s%s%s%s" % (object, lexer.SQUARE_L, key, lexer.SQUARE_R), code.statements[pc // 2 - 1])
+
+        elif opcode == STORE_MEMBER:
+            right = pop()
+            key = pop().value
+            object = pop().value
+            left = object[key]
+            if argument == _assign:
+                object[key] = right
+            elif _assignment_table[argument] is not None:
+                object[key] = _assignment_table[argument](left, right)
+            else:
+                statement_error("Statement operator invalid '%s'." % operators[argument], code.statements[pc // 2 - 1])
+            push(right)
+
+        elif opcode == DECLARE:
+            stmt = constants[argument]
+            value = pop()
+            if stmt.type:
+                value = inter._assign_Type(value.value, stmt.type)
+            push(env.declare_local(stmt.identifier, value, stmt.mutable, stmt))
+
+        elif opcode == RETURN:
+            return pop(), envstate.RETURN
+
+        elif opcode == END:
+            return pop(), envstate.RUN
+
+        elif opcode == FOR_INIT:
+            loopvarname, loop_type, has_min = constants[argument]
+            stmt = code.statements[pc // 2 - 1]
+            is_range_iterator = False
+            iterator: Any = 0
+            max = pop()
+            if has_min:
+                iterator = range(pop().value, max.value)
+                is_range_iterator = True
+            elif isinstance(max, inter._NumberValue):
+                iterator = range(max.value)
+                is_range_iterator = True
+            elif isinstance(max, inter.ListValue):
+                iterator = max.value
+            else:
+                statement_error("For loop encountered incompatible type to iterate. Can only iterate Numbers and Lists.", stmt)
+            # for loop has the limited scope iteration variable. Make a new Environment for it.
+            env = Environment(env)
+            env.declare_local(loopvarname, inter._assign_Type(0, loop_type), True, stmt)
+            push((iter(iterator), is_range_iterator, loopvarname, loop_type))
+
+        elif opcode == FUNCTION:
+            function = constants[argument]
+            defaults = stack[len(stack) - function.defaults:]
+            del stack[len(stack) - function.defaults:]
+            runtime_parameters = []
+            for param in function.stmt.parameters:
+                evaluated_default = defaults.pop(0) if param.default else None
+                runtime_parameters.append(inter.RuntimeFunctionParameter(param.mutable, param.type, param.identifier, evaluated_default))
+            runtime_function = inter.RuntimeFunction(runtime_parameters, function.stmt.result, function.stmt.body, function.stmt)
+            runtime_function.code = function.code
+            push(env.declare_global(function.stmt.identifier, runtime_function, True, function.stmt))
+
+        elif opcode == LIST:
+            values = stack[len(stack) - argument:]
+            del stack[len(stack) - argument:]
+            push(inter.ListValue(values))
+
+        elif opcode == OBJECT:
+            keys = constants[argument]
+            values = stack[len(stack) - len(keys):]
+            del stack[len(stack) - len(keys):]
+            push(inter.ObjectValue(dict(zip(keys, values))))
+
+        elif opcode == JUMP_IF_NOT_SCRIPT:
+            if not env.get_root_env().is_script:
+                pc = argument
+
+        elif opcode == HAS:
+            push(inter.BooleanValue(env.has(names[argument])))
+
+        elif opcode == DELETE:
+            env.delete(names[argument], code.statements[pc // 2 - 1])
+            push(noneValueInstance)
+
+        elif opcode == SHEBANG:
+            inter.interpret_shebang_expression(constants[argument], env)
+
+        elif opcode == INTERPRET:
+            push(inter.interpret(constants[argument], env))
+
+        elif opcode == ERROR:
+            statement_error(constants[argument], code.statements[pc // 2 - 1])
+
+        elif opcode == SIGNAL:
+            return noneValueInstance, _signals[argument]
+
+        elif opcode != NOP:
+            raise ValueError("Unknown opcode %d" % opcode)
+
+
+def _call(function: RuntimeValue, arguments: list[RuntimeValue], env: Environment, stmt: ast.Statement) -> RuntimeValue:
+    # see interpreter.interpret_call_expression(..), the arguments are already evaluated
+    if isinstance(function, inter.NativeFunction):
+        result = function.callback(arguments)
+        if result is None:  # native function might not return anything, fix this here.
+            result = noneValueInstance
+        if not isinstance(result, RuntimeValue):
+            statement_error("Result of native function call is not of a runtime type.", stmt)
+        return result
+
+    if isinstance(function, inter.RuntimeFunction):
+        scope = Environment(env, runtime_function=function)
+        for param, argument in itertools.zip_longest(function.parameters, arguments):
+            if param is None:
+                statement_error("function does not have enough parameters.", stmt)
+                return noneValueInstance
+            if argument is not None:
+                value = argument
+            elif param.default is not None:
+                value = param.default
+            else:
+                statement_error("Either argument default or a value for argument must be provided", stmt)
+            scope.declare_local(param.identifier, value, param.mutable, stmt)
+
+        last, state = run(function.code or _function_code(function), scope)
+        if state is envstate.RUN:
+            return noneValueInstance  # block has ran to end
+        env.state = state
+        if state is envstate.BREAK:
+            statement_error("Expression '%s' is not allowed outside loop." % lexer.BREAK, stmt)
+        if state is envstate.CONTINUE:
+            statement_error("Expression '%s' is not allowed outside loop." % lexer.CONTINUE, stmt)
+        # must reset the state because we catched the case and it does not propagate outward
+        env.state = envstate.RUN
+        return last
+
+    statement_error("Function type not implemented.", stmt)
+    return noneValueInstance
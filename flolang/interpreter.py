@@ -1,28 +1,39 @@
 import itertools
+import operator
 from flolang.error import compile_error
 import typing  # Callable, Self
 from decimal import Decimal
 from typing import Any
 import flolang.abstract_source_tree as ast
 import flolang.lexer as lexer
+import flolang.resolver as resolver
 
 
+# Runtime values are never modified after they are made. They have __slots__, the name of the
+# class is the class attribute 'variant'. There are only two boolean values and the small ints
+# are made once, so most results of operators are not allocated.
 class RuntimeValue:
-    value: Any = None
+    __slots__ = ("value",)
+    value: Any
+    variant = "RuntimeValue"
 
-    def __init__(self):
-        self.variant = type(self).__name__
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.variant = cls.__name__
 
     def __repr__(self):
         return str(self.json())
 
     def json(self):
-        return vars(self)
+        data = {"variant": self.variant, "value": self.value}
+        data.update(getattr(self, "__dict__", {}))
+        return data
 
 
 class NoneValue(RuntimeValue):
+    __slots__ = ()
+
     def __init__(self):
-        super().__init__()
         self.value = None
 
     def __repr__(self):
@@ -36,32 +47,59 @@ noneValueInstance = NoneValue()
 
 
 class BooleanValue(RuntimeValue):
-    def __init__(self, value: bool):
-        super().__init__()
-        self.value = bool(value)
+    __slots__ = ()
+
+    def __new__(cls, value: bool):
+        # one of the two instances below
+        return trueValueInstance if value else falseValueInstance
+
+    def __getnewargs__(self):
+        return (self.value,)
 
     def __repr__(self):
         return str(self.value)
 
 
+trueValueInstance = object.__new__(BooleanValue)
+trueValueInstance.value = True
+falseValueInstance = object.__new__(BooleanValue)
+falseValueInstance.value = False
+
+
 class _NumberValue(RuntimeValue):
+    __slots__ = ()
+
     def __repr__(self):
         return str(self.value)
 
 
 class IntValue(_NumberValue):
-    def __init__(self, value: int):
-        super().__init__()
-        v = int(value) & 0xFFFFFFFF
-        if v >= 0x80000000:
-            self.value = v - 0xFFFFFFFF - 1
-        else:
-            self.value = v
+    __slots__ = ()
+
+    def __new__(cls, value: int):
+        # 32 bit wrap around
+        v = ((int(value) + 0x80000000) & 0xFFFFFFFF) - 0x80000000
+        if -256 <= v < 1024:
+            return _small_ints[v + 256]
+        self = object.__new__(cls)
+        self.value = v
+        return self
+
+    def __getnewargs__(self):
+        return (self.value,)
+
+
+# IntValue(v) of -256 <= v < 1024
+_small_ints: list[IntValue] = []
+for _v in range(-256, 1024):
+    _small_ints.append(object.__new__(IntValue))
+    _small_ints[-1].value = _v
 
 
 class FloatValue(_NumberValue):
+    __slots__ = ()
+
     def __init__(self, value: int | float):
-        super().__init__()
         self.value = float(value)
 
 
@@ -69,8 +107,9 @@ class FloatValue(_NumberValue):
 
 
 class StringValue(RuntimeValue):
+    __slots__ = ()
+
     def __init__(self, value: str):
-        super().__init__()
         self.value = str(value)
 
     def __repr__(self):
@@ -78,8 +117,9 @@ class StringValue(RuntimeValue):
 
 
 class ListValue(RuntimeValue):
+    __slots__ = ()
+
     def __init__(self, value: list[Any]):
-        super().__init__()
         self.value = list(value)
 
     def __repr__(self):
@@ -88,8 +128,9 @@ class ListValue(RuntimeValue):
 
 
 class ObjectValue(RuntimeValue):
+    __slots__ = ()
+
     def __init__(self, value: object):
-        super().__init__()
         self.value = value
         if not isinstance(value, dict):
             raise Exception("Reqire value to be a object.")
@@ -108,8 +149,10 @@ class ObjectValue(RuntimeValue):
 
 
 class NativeFunction(RuntimeValue):
+    __slots__ = ("callback",)
+
     def __init__(self, callback: typing.Callable):
-        super().__init__()
+        self.value = None
         self.callback = callback
         if not callable(callback):
             raise Exception("Reqire value to be a function.")
@@ -127,12 +170,18 @@ class RuntimeFunctionParameter:
 
 
 class RuntimeFunction(RuntimeValue):
-    def __init__(self, parameters: list[RuntimeFunctionParameter], result: ast.Type, body: ast.BlockStatement):
-        super().__init__()
+    def __init__(self, parameters: list[RuntimeFunctionParameter], result: ast.Type, body: ast.BlockStatement,
+                 declaration: ast.FunctionDeclaration | None = None):
+        self.value = None
         self.parameters = parameters
         self.result = result
         self.body = body
+        self.declaration = declaration  # the statement declaring the function, see optimizer
         self.env: Environment
+        self.plan: _CallPlan | None = None  # binding of the arguments, made by the tree interpreter on the first call
+        self.closure: typing.Callable | None = None  # body built by the closure engine
+        self.code: Any = None  # bytecode of the body, see intermediate
+        self.python: typing.Callable | None = None  # body transpiled to a python function, see transpiler
 
     def __repr__(self):
         return "<runtime_function>"
@@ -152,10 +201,22 @@ class envstate:
 
 
 class Environment:
+    # a resolved block, for loop or call keeps its variables in 'slots', see resolver.
+    # 'names' gives the slot of a name, an unset slot is None.
+    names: dict[str, int] = {}
+    slots: list[RuntimeValue | None] = []
+    mutable_slots = 0  # bit of a slot is set if the variable is mutable
+    allocations = 0  # number of environments made, the tree interpreter reuses them
+    local_names: set[str]  # of a root environment, see resolver
+
     def __init__(self, parent_environment_self=None, runtime_function: RuntimeFunction | None = None):
+        Environment.allocations += 1
         self.scope: dict[str, RuntimeValue] = {}
         self.mutables: list[str] = []
         self.parent = parent_environment_self  # cannot use typing.Self on older python versions
+        self.root = parent_environment_self.root if parent_environment_self else self
+        if parent_environment_self is None:
+            self.local_names = set()
         self.state = envstate.RUN
         self.runtime_function = runtime_function
         self.is_script = False
@@ -187,6 +248,9 @@ class Environment:
     def _declare(self, name: str, value: RuntimeValue, is_mutable: bool, stmt: ast.Statement) -> RuntimeValue:
         if self.scope.get(name):
             statement_error("Variable '%s' is already defined." % name, stmt)
+        if self.parent is not None and name not in self.root.local_names:
+            self.root.local_names.add(name)
+            _invalidate_calls()  # it might hide a function of the root environment
         self.scope[name] = value
         if is_mutable:
             self.mutables.append(name)
@@ -195,14 +259,24 @@ class Environment:
     def assign(self, name: str, value: RuntimeValue, stmt: ast.Statement, force=False) -> RuntimeValue:
         env = self._resolve(name)
         if env:
-            if name not in env.mutables:
-                statement_error("Variable '%s' is not mutable. Use '%s' keyword on declaration to make it mutable." % (name, lexer.MUT), stmt)
-            if not force:
-                # check assignment type
+            slot = None if name in env.scope else env.names[name]
+            if slot is None:
+                mutable = name in env.mutables
                 old = env.scope[name]
-                if type(old) is not type(value):
-                    statement_error("Variable assigned to '%s' must be of same type." % (name), stmt)
-            env.scope[name] = value
+            else:
+                mutable = env.mutable_slots >> slot & 1
+                old = env.slots[slot]
+            if not mutable:
+                statement_error("Variable '%s' is not mutable. Use '%s' keyword on declaration to make it mutable." % (name, lexer.MUT), stmt)
+            # check assignment type
+            if not force and type(old) is not type(value):
+                statement_error("Variable assigned to '%s' must be of same type." % (name), stmt)
+            if slot is None:
+                env.scope[name] = value
+                if env.parent is None and isinstance(old, (RuntimeFunction, NativeFunction)):
+                    _invalidate_calls()
+            else:
+                env.slots[slot] = value
             return value
         statement_error("Variable '%s' is not defined." % name, stmt)
         return noneValueInstance
@@ -210,7 +284,9 @@ class Environment:
     def lookup(self, name: str, stmt: ast.Statement):
         env = self._resolve(name)
         if env:
-            return env.scope[name]
+            if name in env.scope:
+                return env.scope[name]
+            return env.slots[env.names[name]]
         statement_error("Variable '%s' is not defined." % name, stmt)
 
     def delete(self, name: str, stmt: ast.Statement):
@@ -218,7 +294,12 @@ class Environment:
             statement_error("Delete Expression '%s' is only allowed in script mode. Did you forgot '#!script' shebang?" % (lexer.DELETE), stmt)
         env = self._resolve(name)
         if env:
-            del env.scope[name]
+            if name in env.scope:
+                del env.scope[name]
+                if env.parent is None:
+                    _invalidate_calls()
+            else:
+                env.slots[env.names[name]] = None
             return noneValueInstance
         statement_error("Variable '%s' is not defined." % name, stmt)
 
@@ -226,84 +307,65 @@ class Environment:
         return self._resolve(name)
 
     def get_root_env(self):
-        if self.parent:
-            return self.parent.get_root_env()
-        return self
+        return self.root
 
     def _resolve(self, name: str):
-        if name in self.scope:
-            return self
-        if self.parent:
-            return self.parent._resolve(name)
+        env = self
+        while env is not None:
+            if name in env.scope:
+                return env
+            slot = env.names.get(name)
+            if slot is not None and env.slots[slot] is not None:
+                return env
+            env = env.parent
         return None
 
 
+# Environments of finished blocks, loops and calls are used again for the next ones. Nothing
+# keeps an environment of the tree interpreter after its block ran.
+_free_environments: list[Environment] = []
+
+
+def _enter(parent: Environment, runtime_function: RuntimeFunction | None, names: dict[str, int], mutable_slots: int,
+           slots: list[RuntimeValue | None] | None = None) -> Environment:
+    # the environment of a resolved block, loop or call. The slots are not set if not given.
+    if _free_environments:
+        env = _free_environments.pop()
+        env.parent = parent
+        env.root = parent.root
+        env.state = envstate.RUN
+        env.runtime_function = runtime_function
+        if env.scope or env.mutables:  # variables declared by name
+            env.scope = {}
+            env.mutables = []
+    else:
+        env = Environment(parent, runtime_function)
+    env.names = names
+    env.slots = [None] * len(names) if slots is None else slots
+    env.mutable_slots = mutable_slots
+    return env
+
+
 def interpret(stmt: ast.Statement, env: Environment) -> RuntimeValue:
+    # the handler is found by the exact class of the node, see _interpreters
+    try:
+        handler = _interpreters[type(stmt)]
+    except KeyError:
+        handler = _find_interpreter(type(stmt))
+    return handler(stmt, env)
+
 
-    # if isinstance(stmt, ast.DynamicVariableDeclaration):
-    #     return interpret_dynamic_variable_declaration(stmt, env)
-    if isinstance(stmt, ast.BinaryExpression):
-        return interpret_binary_expression(stmt, env)
-    if isinstance(stmt, ast.UnaryBeforeExpression):
-        return interpret_unary_before_expression(stmt, env)
-    if isinstance(stmt, ast.UnaryIdentifierBeforeExpression):
-        return interpret_unary_identifier_before_expression(stmt, env)
-    if isinstance(stmt, ast.UnaryIdentifierAfterExpression):
-        return interpret_unary_identifier_after_expression(stmt, env)
-    if isinstance(stmt, ast.AssignmentExpression):
-        return interpret_assignment_expression(stmt, env)
-
-    if isinstance(stmt, ast.NumericLiteral):  # always integer
-        return IntValue(stmt.value)
-    if isinstance(stmt, ast.FloatLiteral):
-        return FloatValue(stmt.value)
-    if isinstance(stmt, ast.StringLiteral):
-        return StringValue(stmt.value)
-    if isinstance(stmt, ast.Identifier):
-        return env.lookup(stmt.symbol, stmt)
-
-    # if isinstance(stmt, ast.GlobalVariableDeclaration):
-    #     return interpret_global_variable_declaration(stmt, env)
-    if isinstance(stmt, ast.VariableDeclaration):
-        return interpret_variable_declaration(stmt, env)
-
-    if isinstance(stmt, ast.Program):
-        return interpret_program(stmt, env)
-    if isinstance(stmt, ast.FunctionDeclaration):
-        return interpret_function_declare(stmt, env)
-    if isinstance(stmt, ast.CallExpression):
-        return interpret_call_expression(stmt, env)
-    if isinstance(stmt, ast.MemberExpression):
-        return interpret_member_expression(stmt, env)
-    if isinstance(stmt, ast.IfExpression):
-        return interpret_if_expression(stmt, env)
-    if isinstance(stmt, ast.WhileExpression):
-        return interpret_while_expression(stmt, env)
-    if isinstance(stmt, ast.ForExpression):
-        return interpret_for_expression(stmt, env)
-    if isinstance(stmt, ast.BlockStatement):
-        return interpret_block_expression(stmt, env)
-    if isinstance(stmt, ast.ReturnExpression):
-        return interpret_return_expression(stmt, env)
-    if isinstance(stmt, ast.BreakExpression):
-        return interpret_break_expression(stmt, env)
-    if isinstance(stmt, ast.ContinueExpression):
-        return interpret_continue_expression(stmt, env)
-    if isinstance(stmt, ast.ElvisExpression):
-        return interpret_elvis_expression(stmt, env)
-
-    if isinstance(stmt, ast.ListLiteral):
-        return interpret_list_literal(stmt, env)
-    if isinstance(stmt, ast.ObjectLiteral):
-        return interpret_object_literal(stmt, env)
-    # if isinstance(stmt, ast.TupleLiteral):
-    #     return interpret_tuple_literal(stmt, env)
-
-    if isinstance(stmt, ast.DeleteExpression):
-        return interpret_delete_expression(stmt, env)
-    if isinstance(stmt, ast.UnreachableExpression):
-        statement_error("Reached unreachable expression.", stmt)
+def _find_interpreter(cls: type) -> typing.Callable:
+    # a subclass of a node (like a lazy function body) is interpreted as its base class.
+    # Remembered for the next time.
+    for base in cls.__mro__:
+        if base in _interpreters:
+            _interpreters[cls] = _interpreters[base]
+            return _interpreters[cls]
+    return interpret_unknown
 
+
+def interpret_unknown(stmt: ast.Statement, env: Environment) -> RuntimeValue:
     statement_error("Unable to interpret AST node '%s'." % stmt.kind, stmt)
     return noneValueInstance
 
@@ -337,6 +399,33 @@ def interpret_variable_declaration(stmt: ast.VariableDeclaration, env: Environme
     return env.declare_local(stmt.identifier, value, stmt.mutable, stmt)
 
 
+def interpret_slot_variable_declaration(stmt: ast.SlotVariableDeclaration, env: Environment) -> RuntimeValue:
+    # the resolver gives every declaration of a block its own slot, it is not set yet
+    value = _interpreted_value_assign_type(stmt.value, stmt.type, env)
+    env.slots[stmt.slot] = value
+    return value
+
+
+def _slot_environment(env: Environment, depth: int) -> Environment:
+    while depth:
+        env = env.parent
+        depth -= 1
+    return env
+
+
+def _assign_slot(env: Environment, slot: int, value: RuntimeValue, name: str, stmt: ast.Statement) -> RuntimeValue:
+    # same checks as Environment.assign(..)
+    old = env.slots[slot]
+    if old is None:  # deleted, assigned by name like an unresolved variable
+        return env.assign(name, value, stmt)
+    if not env.mutable_slots >> slot & 1:
+        statement_error("Variable '%s' is not mutable. Use '%s' keyword on declaration to make it mutable." % (name, lexer.MUT), stmt)
+    if type(old) is not type(value):
+        statement_error("Variable assigned to '%s' must be of same type." % (name), stmt)
+    env.slots[slot] = value
+    return value
+
+
 # def interpret_global_variable_declaration(stmt: ast.GlobalVariableDeclaration, env: Environment) -> RuntimeValue:
 #     value = _interpreted_value_assign_type(stmt.value, stmt.type, env)
 #     return env.declare_global(stmt.identifier, value, stmt.mutable, stmt)
@@ -369,58 +458,75 @@ def _expression_find_type_everything(left: RuntimeValue, right: RuntimeValue, va
     raise Exception("cannot assign this")
 
 
+def _add(left: RuntimeValue, right: RuntimeValue) -> RuntimeValue:
+    if isinstance(left, StringValue) and isinstance(right, StringValue):
+        return StringValue(left.value + right.value)
+    return _expression_find_type(left, right, left.value + right.value)
+
+
+# binary operator to the function evaluating it from the left and right runtime value
+_binary_operations: dict[str, typing.Callable[[Any, Any], RuntimeValue]] = {
+    lexer.OR: lambda a, b: BooleanValue(a.value or b.value),
+    lexer.AND: lambda a, b: BooleanValue(a.value and b.value),
+    lexer.BITOR: lambda a, b: IntValue(a.value | b.value),
+    lexer.XOR: lambda a, b: IntValue(a.value ^ b.value),
+    lexer.BITAND: lambda a, b: IntValue(a.value & b.value),
+    lexer.COMPARE: lambda a, b: BooleanValue(a.value == b.value),
+    lexer.NOTCOMPARE: lambda a, b: BooleanValue(a.value != b.value),
+    lexer.BIGGEREQ: lambda a, b: BooleanValue(a.value >= b.value),
+    lexer.SMALLEREQ: lambda a, b: BooleanValue(a.value <= b.value),
+    lexer.BIGGER: lambda a, b: BooleanValue(a.value > b.value),
+    lexer.SMALLER: lambda a, b: BooleanValue(a.value < b.value),
+    lexer.SHIFTRIGHT: lambda a, b: IntValue(a.value >> b.value),
+    lexer.SHIFTLEFT: lambda a, b: IntValue(a.value << b.value),
+    lexer.PLUS: _add,
+    lexer.MINUS: lambda a, b: _expression_find_type(a, b, a.value - b.value),
+    lexer.MUL: lambda a, b: _expression_find_type(a, b, a.value * b.value),
+    lexer.DIV: lambda a, b: FloatValue(a.value / b.value),
+    lexer.MOD: lambda a, b: IntValue(a.value % b.value),
+    lexer.INTDIV: lambda a, b: IntValue(int(a.value // b.value)),
+    lexer.POW: lambda a, b: _expression_find_type(a, b, a.value ** b.value),
+}
+
+
+# operations of two int values, same result as _binary_operations without the type promotion
+_int_operations: dict[str, typing.Callable[[int, int], RuntimeValue]] = {
+    lexer.BITOR: lambda a, b: IntValue(a | b),
+    lexer.XOR: lambda a, b: IntValue(a ^ b),
+    lexer.BITAND: lambda a, b: IntValue(a & b),
+    lexer.COMPARE: lambda a, b: trueValueInstance if a == b else falseValueInstance,
+    lexer.NOTCOMPARE: lambda a, b: trueValueInstance if a != b else falseValueInstance,
+    lexer.BIGGEREQ: lambda a, b: trueValueInstance if a >= b else falseValueInstance,
+    lexer.SMALLEREQ: lambda a, b: trueValueInstance if a <= b else falseValueInstance,
+    lexer.BIGGER: lambda a, b: trueValueInstance if a > b else falseValueInstance,
+    lexer.SMALLER: lambda a, b: trueValueInstance if a < b else falseValueInstance,
+    lexer.SHIFTRIGHT: lambda a, b: IntValue(a >> b),
+    lexer.SHIFTLEFT: lambda a, b: IntValue(a << b),
+    lexer.PLUS: lambda a, b: IntValue(a + b),
+    lexer.MINUS: lambda a, b: IntValue(a - b),
+    lexer.MUL: lambda a, b: IntValue(a * b),
+    lexer.MOD: lambda a, b: IntValue(a % b),
+    lexer.INTDIV: lambda a, b: IntValue(a // b),
+}
+
+
 def interpret_binary_expression(stmt: ast.BinaryExpression, env: Environment) -> RuntimeValue:
     left = interpret(stmt.left, env)
     right = interpret(stmt.right, env)
 
-    if stmt.operator is lexer.PLUS and isinstance(left, StringValue) and isinstance(right, StringValue):
-        return StringValue(left.value + right.value)
+    if type(left) is IntValue and type(right) is IntValue:
+        int_operation = _int_operations.get(stmt.operator)
+        if int_operation is not None:
+            return int_operation(left.value, right.value)
 
+    operation = _binary_operations.get(stmt.operator)
+    if operation is None:
+        statement_error('Did not found a operation for this expression.', stmt)
+        return noneValueInstance
     try:
-        if stmt.operator is lexer.OR:
-            return BooleanValue(left.value or right.value)
-        if stmt.operator is lexer.AND:
-            return BooleanValue(left.value and right.value)
-        if stmt.operator is lexer.BITOR:
-            return IntValue(left.value | right.value)
-        if stmt.operator is lexer.XOR:
-            return IntValue(left.value ^ right.value)
-        if stmt.operator is lexer.BITAND:
-            return IntValue(left.value & right.value)
-        if stmt.operator is lexer.COMPARE:
-            return BooleanValue(left.value == right.value)
-        if stmt.operator is lexer.NOTCOMPARE:
-            return BooleanValue(left.value != right.value)
-        if stmt.operator is lexer.BIGGEREQ:
-            return BooleanValue(left.value >= right.value)
-        if stmt.operator is lexer.SMALLEREQ:
-            return BooleanValue(left.value <= right.value)
-        if stmt.operator is lexer.BIGGER:
-            return BooleanValue(left.value > right.value)
-        if stmt.operator is lexer.SMALLER:
-            return BooleanValue(left.value < right.value)
-        if stmt.operator is lexer.SHIFTRIGHT:
-            return IntValue(left.value >> right.value)
-        if stmt.operator is lexer.SHIFTLEFT:
-            return IntValue(left.value << right.value)
-        if stmt.operator is lexer.PLUS:
-            return _expression_find_type(left, right, left.value + right.value)
-        if stmt.operator is lexer.MINUS:
-            return _expression_find_type(left, right, left.value - right.value)
-        if stmt.operator is lexer.MUL:
-            return _expression_find_type(left, right, left.value * right.value)
-        if stmt.operator is lexer.DIV:
-            return FloatValue(left.value / right.value)
-        if stmt.operator is lexer.MOD:
-            return IntValue(left.value % right.value)
-        if stmt.operator is lexer.INTDIV:
-            return IntValue(int(left.value // right.value))
-        if stmt.operator is lexer.POW:
-            return _expression_find_type(left, right, left.value ** right.value)
+        return operation(left, right)
     except TypeError as te:
         statement_error('Interpreter type error "%s". Unable to resolve operation with given types.' % str(te), stmt)
-
-    statement_error('Did not found a operation for this expression.', stmt)
     return noneValueInstance
 
 
@@ -433,46 +539,115 @@ def _expression_unary_find_type(expression: RuntimeValue, value: Any):
     return IntValue(value)
 
 
+_unary_operations: dict[str, typing.Callable[[Any], RuntimeValue]] = {
+    lexer.NOT: lambda a: BooleanValue(not a.value),
+    lexer.BITNOT: lambda a: IntValue(~a.value),
+    lexer.PLUS: lambda a: a,  # does nothing
+    lexer.MINUS: lambda a: _expression_unary_find_type(a, -a.value),
+}
+
+# increment and decrement operator to the step
+_increment_steps = {
+    lexer.INCREMENT: 1,
+    lexer.DECREMENT: -1,
+}
+
+
 def interpret_unary_before_expression(stmt: ast.UnaryBeforeExpression, env: Environment) -> RuntimeValue:
     expression = interpret(stmt.expr, env)
-    if stmt.operator is lexer.NOT:
-        return BooleanValue(not expression.value)
-    if stmt.operator is lexer.BITNOT:
-        return IntValue(~expression.value)
-    if stmt.operator is lexer.PLUS:
-        return expression  # does nothing
-    if stmt.operator is lexer.MINUS:
-        return _expression_unary_find_type(expression, -expression.value)
-    statement_error("Statement operator invalid '%s' for unary." % stmt.operator, stmt)
-    return noneValueInstance
+    operation = _unary_operations.get(stmt.operator)
+    if operation is None:
+        statement_error("Statement operator invalid '%s' for unary." % stmt.operator, stmt)
+        return noneValueInstance
+    return operation(expression)
 
 
 def interpret_unary_identifier_before_expression(stmt: ast.UnaryIdentifierBeforeExpression, env: Environment) -> RuntimeValue:
     variable = env.lookup(stmt.identifier, stmt)
-    if stmt.operator is lexer.INCREMENT:
-        variable = _expression_unary_find_type(variable, variable.value + 1)
-        env.assign(stmt.identifier, variable, stmt)
-        return variable
-    if stmt.operator is lexer.DECREMENT:
-        variable = _expression_unary_find_type(variable, variable.value - 1)
-        env.assign(stmt.identifier, variable, stmt)
-        return variable
-    statement_error("Statement operator invalid '%s' for unary." % stmt.operator, stmt)
-    return noneValueInstance
+    step = _increment_steps.get(stmt.operator)
+    if step is None:
+        statement_error("Statement operator invalid '%s' for unary." % stmt.operator, stmt)
+        return noneValueInstance
+    variable = _expression_unary_find_type(variable, variable.value + step)
+    env.assign(stmt.identifier, variable, stmt)
+    return variable
+
+
+def interpret_slot_unary_identifier_before_expression(stmt: ast.SlotUnaryIdentifierBeforeExpression, env: Environment) -> RuntimeValue:
+    frame = _slot_environment(env, stmt.depth)
+    slot = stmt.slot
+    variable = frame.slots[slot] if slot is not None else None
+    if slot is None or variable is None:
+        return interpret_unary_identifier_before_expression(stmt, frame)
+    step = _increment_steps.get(stmt.operator)
+    if step is None:
+        statement_error("Statement operator invalid '%s' for unary." % stmt.operator, stmt)
+        return noneValueInstance
+    variable = _expression_unary_find_type(variable, variable.value + step)
+    return _assign_slot(frame, slot, variable, stmt.identifier, stmt)
 
 
 def interpret_unary_identifier_after_expression(stmt: ast.UnaryIdentifierAfterExpression, env: Environment) -> RuntimeValue:
     variable_original = env.lookup(stmt.identifier, stmt)
-    if stmt.operator is lexer.INCREMENT:
-        variable = _expression_unary_find_type(variable_original, variable_original.value + 1)
-        env.assign(stmt.identifier, variable, stmt)
-        return variable_original
-    if stmt.operator is lexer.DECREMENT:
-        variable = _expression_unary_find_type(variable_original, variable_original.value - 1)
-        env.assign(stmt.identifier, variable, stmt)
-        return variable_original
-    statement_error("Statement operator invalid '%s' for unary post expression." % stmt.operator, stmt)
-    return noneValueInstance
+    step = _increment_steps.get(stmt.operator)
+    if step is None:
+        statement_error("Statement operator invalid '%s' for unary post expression." % stmt.operator, stmt)
+        return noneValueInstance
+    variable = _expression_unary_find_type(variable_original, variable_original.value + step)
+    env.assign(stmt.identifier, variable, stmt)
+    return variable_original
+
+
+def interpret_slot_unary_identifier_after_expression(stmt: ast.SlotUnaryIdentifierAfterExpression, env: Environment) -> RuntimeValue:
+    frame = _slot_environment(env, stmt.depth)
+    slot = stmt.slot
+    variable_original = frame.slots[slot] if slot is not None else None
+    if slot is None or variable_original is None:
+        return interpret_unary_identifier_after_expression(stmt, frame)
+    step = _increment_steps.get(stmt.operator)
+    if step is None:
+        statement_error("Statement operator invalid '%s' for unary post expression." % stmt.operator, stmt)
+        return noneValueInstance
+    variable = _expression_unary_find_type(variable_original, variable_original.value + step)
+    _assign_slot(frame, slot, variable, stmt.identifier, stmt)
+    return variable_original
+
+
+# compound assignment of a variable or of a list or object member to the function evaluating the
+# new runtime value
+_assignment_operations: dict[str, typing.Callable[[Any, Any], RuntimeValue]] = {
+    lexer.ASSIGNADD: _add,
+    lexer.ASSIGNSUB: _binary_operations[lexer.MINUS],
+    lexer.ASSIGNMUL: _binary_operations[lexer.MUL],
+    lexer.ASSIGNDIV: lambda a, b: _expression_find_type(a, b, a.value / b.value),
+    lexer.ASSIGNREM: _binary_operations[lexer.MOD],
+    lexer.ASSIGNBITAND: _binary_operations[lexer.BITAND],
+    lexer.ASSIGNBITXOR: _binary_operations[lexer.XOR],
+    lexer.ASSIGNBITOR: _binary_operations[lexer.BITOR],
+    lexer.ASSIGNBITSHIFTR: _binary_operations[lexer.SHIFTRIGHT],
+    lexer.ASSIGNBITSHIFTL: _binary_operations[lexer.SHIFTLEFT],
+}
+
+
+def _assignment_value(stmt: ast.AssignmentExpression, left: RuntimeValue, right: RuntimeValue) -> RuntimeValue:
+    if stmt.operator is lexer.ASSIGN:
+        return _expression_find_type_everything(left, right, right.value)
+    operation = _assignment_operations.get(stmt.operator)
+    if operation is None:
+        statement_error("Statement operator invalid '%s'." % stmt.operator, stmt)
+        return noneValueInstance
+    return operation(left, right)
+
+
+def interpret_slot_assignment_expression(stmt: ast.SlotAssignmentExpression, env: Environment) -> RuntimeValue:
+    right = interpret(stmt.value, env)
+    frame = _slot_environment(env, stmt.depth)
+    identifier = stmt.assignee.symbol  # type: ignore[attr-defined]
+    slot = stmt.slot
+    left = frame.slots[slot] if slot is not None else None
+    if slot is None or left is None:
+        return frame.assign(identifier, _assignment_value(stmt, frame.lookup(identifier, stmt), right), stmt)
+    return _assign_slot(frame, slot, _assignment_value(stmt, left, right), identifier, stmt)
 
 
 def interpret_assignment_expression(stmt: ast.AssignmentExpression, env: Environment) -> RuntimeValue:
@@ -480,31 +655,7 @@ def interpret_assignment_expression(stmt: ast.AssignmentExpression, env: Environ
         identifier = stmt.assignee.symbol
         right = interpret(stmt.value, env)
         left = env.lookup(identifier, stmt)
-        if stmt.operator is lexer.ASSIGN:
-            return env.assign(identifier, _expression_find_type_everything(left, right, right.value), stmt)
-        if stmt.operator is lexer.ASSIGNADD and isinstance(left, StringValue) and isinstance(right, StringValue):
-            return env.assign(identifier, StringValue(left.value + right.value), stmt)
-        if stmt.operator is lexer.ASSIGNADD:
-            return env.assign(identifier, _expression_find_type(left, right, left.value + right.value), stmt)
-        if stmt.operator is lexer.ASSIGNSUB:
-            return env.assign(identifier, _expression_find_type(left, right, left.value - right.value), stmt)
-        if stmt.operator is lexer.ASSIGNMUL:
-            return env.assign(identifier, _expression_find_type(left, right, left.value * right.value), stmt)
-        if stmt.operator is lexer.ASSIGNDIV:
-            return env.assign(identifier, _expression_find_type(left, right, left.value / right.value), stmt)
-        if stmt.operator is lexer.ASSIGNREM:
-            return env.assign(identifier, IntValue(left.value % right.value), stmt)
-        if stmt.operator is lexer.ASSIGNBITAND:
-            return env.assign(identifier, IntValue(left.value & right.value), stmt)
-        if stmt.operator is lexer.ASSIGNBITXOR:
-            return env.assign(identifier, IntValue(left.value ^ right.value), stmt)
-        if stmt.operator is lexer.ASSIGNBITOR:
-            return env.assign(identifier, IntValue(left.value | right.value), stmt)
-        if stmt.operator is lexer.ASSIGNBITSHIFTR:
-            return env.assign(identifier, IntValue(left.value >> right.value), stmt)
-        if stmt.operator is lexer.ASSIGNBITSHIFTL:
-            return env.assign(identifier, IntValue(left.value << right.value), stmt)
-        statement_error("Statement operator invalid '%s'." % stmt.operator, stmt)
+        return env.assign(identifier, _assignment_value(stmt, left, right), stmt)
     elif isinstance(stmt.assignee, ast.MemberExpression):
         object = interpret(stmt.assignee.object, env).value
         if isinstance(stmt.assignee.key, ast.Identifier):
@@ -516,35 +667,9 @@ def interpret_assignment_expression(stmt: ast.AssignmentExpression, env: Environ
         if stmt.operator is lexer.ASSIGN:
             object[key] = right
             return right
-        if stmt.operator is lexer.ASSIGNADD:
-            object[key] = left.value + right.value
-            return right
-        if stmt.operator is lexer.ASSIGNSUB:
-            object[key] = left.value - right.value
-            return right
-        if stmt.operator is lexer.ASSIGNMUL:
-            object[key] = left.value * right.value
-            return right
-        if stmt.operator is lexer.ASSIGNDIV:
-            object[key] = left.value / right.value
-            return right
-        if stmt.operator is lexer.ASSIGNREM:
-            object[key] = left.value % right.value
-            return right
-        if stmt.operator is lexer.ASSIGNBITAND:
-            object[key] = left.value & right.value
-            return right
-        if stmt.operator is lexer.ASSIGNBITXOR:
-            object[key] = left.value ^ right.value
-            return right
-        if stmt.operator is lexer.ASSIGNBITOR:
-            object[key] = left.value | right.value
-            return right
-        if stmt.operator is lexer.ASSIGNBITSHIFTR:
-            object[key] = left.value >> right.value
-            return right
-        if stmt.operator is lexer.ASSIGNBITSHIFTL:
-            object[key] = left.value << right.value
+        member_operation = _assignment_operations.get(stmt.operator)
+        if member_operation is not None:
+            object[key] = member_operation(left, right)
             return right
         statement_error("Statement operator invalid '%s'." % stmt.operator, stmt)
     return noneValueInstance
@@ -552,6 +677,11 @@ def interpret_assignment_expression(stmt: ast.AssignmentExpression, env: Environ
 
 def interpret_program(stmt: ast.Program, env: Environment) -> RuntimeValue:
     last: RuntimeValue = noneValueInstance
+    local_names = env.root.local_names
+    names = len(local_names)
+    resolver.resolve(stmt, local_names)
+    if len(local_names) != names:
+        _invalidate_calls()
 
     if stmt.shebang is not None:
         interpret_shebang_expression(stmt.shebang, env)
@@ -610,12 +740,104 @@ def interpret_function_declare(stmt: ast.FunctionDeclaration, env: Environment)
         runtime_parameters.append(RuntimeFunctionParameter(param.mutable, param.type, param.identifier, evaluated_default))
 
     # function declarations are always constant and globally declared
-    return env.declare_global(stmt.identifier, RuntimeFunction(runtime_parameters, stmt.result, stmt.body), True, stmt)
+    return env.declare_global(stmt.identifier, RuntimeFunction(runtime_parameters, stmt.result, stmt.body, stmt), True, stmt)
+
+
+# Inline cache of the call sites, see _callee(..). A function found by name in the root environment
+# is kept on the CallExpression with the root and the epoch. The name finds the same function until
+# the epoch changes: when a function of a root environment is assigned or deleted, or when a name
+# becomes a local variable somewhere (see resolver) which could hide it from a callee.
+_call_epoch = 0
+_uncached = (-1, None, None)
+
+
+def _invalidate_calls():
+    global _call_epoch
+    _call_epoch += 1
+
+
+class _CallPlan:
+    # binding of the arguments to the parameters of a runtime function, made on its first call.
+    # Without a name used by two parameters these are the first slots of the call environment.
+    __slots__ = ("body", "count", "required", "defaults")
+
+    def __init__(self, body: ast.ScopeFunctionBody, parameters: list[RuntimeFunctionParameter]):
+        self.body = body
+        self.count = len(parameters) if len(body.parameter_names) == len(parameters) else -1
+        # the number of arguments needed, the parameters following have a default
+        self.required = max((index + 1 for index, param in enumerate(parameters) if param.default is None), default=0)
+        self.defaults = [param.default for param in parameters]
+
+
+def _call_plan(function: RuntimeFunction, env: Environment) -> _CallPlan:
+    local_names = env.root.local_names
+    names = len(local_names)
+    body = function.body = resolver.resolve_function(function.parameters, function.body, local_names)
+    if len(local_names) != names:
+        _invalidate_calls()
+    function.plan = _CallPlan(body, function.parameters)
+    return function.plan
+
+
+def _callee(stmt: ast.CallExpression, env: Environment) -> RuntimeValue:
+    # the function called. Kept on the node if it is found by name in the root environment.
+    caller = stmt.caller
+    function = interpret(caller, env)
+    stmt._callee = _uncached
+    if isinstance(caller, ast.Identifier) and isinstance(function, (RuntimeFunction, NativeFunction)):
+        if caller.symbol not in env.root.local_names and env.root.scope.get(caller.symbol) is function:
+            stmt._callee = (_call_epoch, env.root, function)
+    return function
+
+
+def _bind_arguments(stmt: ast.CallExpression, function: RuntimeFunction, body: ast.ScopeFunctionBody, env: Environment) -> Environment:
+    # the call environment of a call which does not fit the plan: the errors, a name of two parameters
+    scope = _enter(env, function, body.parameter_names, body.parameter_mutables)
+    for param, argument in itertools.zip_longest(function.parameters, stmt.arguments):
+        # make sure the function has enough parameters if not, that is fatal
+        if param is None:
+            statement_error("function does not have enough parameters.", stmt)
+
+        # evaluate value of provided argument (if provided)
+        # evaluate value per provided function default (if provided)
+        if argument is not None:
+            value = interpret(argument, env)
+        elif param.default is not None:
+            # is pre interpreted at declaration time. so this is already a runtime variable
+            value = param.default
+        else:
+            statement_error("Either argument default or a value for argument must be provided", stmt)
+
+        slot = scope.names.get(param.identifier)
+        if slot is None:  # a name used by more than one parameter
+            scope.declare_local(param.identifier, value, param.mutable, stmt)
+        else:
+            scope.slots[slot] = value
+    return scope
+
+
+def interpret_inlined_call_expression(stmt: ast.InlinedCallExpression, env: Environment) -> RuntimeValue:
+    # the inlined expression while the caller still finds the function it was taken from
+    call = stmt.call
+    try:
+        epoch, root, function = call._callee
+    except AttributeError:
+        epoch = -1
+    if epoch != _call_epoch or root is not env.root:
+        function = _callee(call, env)
+    if type(function) is RuntimeFunction and function.declaration is stmt._declaration:
+        return interpret(stmt.expression, env)
+    return interpret_call_expression(call, env)
 
 
 def interpret_call_expression(stmt: ast.CallExpression, env: Environment) -> RuntimeValue:
-    # need the function identifier name. interpret the caller expression
-    function = interpret(stmt.caller, env)
+    # need the function identifier name. interpret the caller expression, or take the cached one
+    try:
+        epoch, root, function = stmt._callee
+    except AttributeError:
+        epoch = -1
+    if epoch != _call_epoch or root is not env.root:
+        function = _callee(stmt, env)
 
     if isinstance(function, NativeFunction):
         argument_list = [interpret(s, env) for s in stmt.arguments]
@@ -630,46 +852,32 @@ def interpret_call_expression(stmt: ast.CallExpression, env: Environment) -> Run
         # create new function scope
         # optionally this scope could be passed from function runtime variable, but that is a script
         # thing to do and not how C works. To keep compatibility with C, need to do it the boring way.
-        scope = Environment(env, runtime_function=function)
-        for param, argument in itertools.zip_longest(function.parameters, stmt.arguments):
-            # make sure the function has enough parameters if not, that is fatal
-            if param is None:
-                statement_error("function does not have enough parameters.", stmt)
-                return noneValueInstance
-
+        plan = function.plan
+        if plan is None:
+            plan = _call_plan(function, env)
+        body = plan.body
+        arguments = stmt.arguments
+        if plan.required <= len(arguments) <= plan.count:
             # TODO: use the type
-            if True:
-                # if param.type.type is lexer.INT:
-
-                # evaluate value of provided argument (if provided)
-                # evaluate value per provided function default (if provided)
-                if argument is not None:
-                    value = interpret(argument, env)
-                elif param.default is not None:
-                    # is pre interpreted at declaration time. so this is already a runtime variable
-                    value = param.default
-                else:
-                    statement_error("Either argument default or a value for argument must be provided", stmt)
-
-                scope.declare_local(param.identifier, value, param.mutable, stmt)
-
-            # TODO: use the type
-            # else:
-                # statement_error("(Function) variable type to declare not implemented '%s'" % param.type.type, stmt)
+            values: list[RuntimeValue | None] = [interpret(argument, env) for argument in arguments]
+            if len(values) < plan.count:
+                values.extend(plan.defaults[len(values):])
+            scope = _enter(env, function, body.parameter_names, body.parameter_mutables, values)
+        else:
+            scope = _bind_arguments(stmt, function, body, env)
 
         # go through all statements and execute
-        last = interpret_block_expression(function.body, scope)
-        env.state = scope.state  # propagate state outwards
-        # check for any flow interrupt conditions condition on environment
-        if env.state is envstate.BREAK:
+        last = interpret_block_expression(body, scope)
+        state = scope.state
+        _free_environments.append(scope)
+        # check for any flow interrupt conditions of the call. They do not propagate outward.
+        if state is envstate.RUN:
+            return noneValueInstance  # block has ran to end
+        if state is envstate.BREAK:
             statement_error("Expression '%s' is not allowed outside loop." % lexer.BREAK, stmt)
-        if env.state is envstate.CONTINUE:
+        if state is envstate.CONTINUE:
             statement_error("Expression '%s' is not allowed outside loop." % lexer.CONTINUE, stmt)
-        if env.state is envstate.RETURN:
-            # must reset the state because we catched the case and it does not propagate outward
-            env.state = envstate.RUN
-            return last
-        return noneValueInstance  # block has ran to end
+        return last
 
     statement_error("Function type not implemented.", stmt)
     return noneValueInstance
@@ -696,21 +904,13 @@ def interpret_if_expression(stmt: ast.IfExpression, env: Environment) -> Runtime
     # make the conditional check
     if condition.value:
         last = interpret_block_expression(stmt.consequent, env)
-        if env.state is envstate.BREAK:
-            return noneValueInstance  # not allowed here, but might be a loop somewhere on the callstack
-        if env.state is envstate.CONTINUE:
-            return noneValueInstance  # not allowed here, but might be a loop somewhere on the callstack
-        if env.state is envstate.RETURN:
-            return last
+    elif stmt.alternate:
+        last = interpret(stmt.alternate, env)
     else:
-        if stmt.alternate:
-            last = interpret(stmt.alternate, env)
-            if env.state is envstate.BREAK:
-                return noneValueInstance  # not allowed here, but might be a loop somewhere on the callstack
-            if env.state is envstate.CONTINUE:
-                return noneValueInstance  # not allowed here, but might be a loop somewhere on the callstack
-            if env.state is envstate.RETURN:
-                return last
+        return noneValueInstance
+    # a break or continue is not allowed here, but might be a loop somewhere on the callstack
+    if env.state is envstate.RETURN:
+        return last
     return noneValueInstance
 
 
@@ -719,16 +919,15 @@ def interpret_while_expression(stmt: ast.WhileExpression, env: Environment) -> R
     # must do this every time
     while interpret(stmt.condition, env).value:
         last = interpret_block_expression(stmt.body, env)
-        if env.state is envstate.BREAK:
-            # must reset the state because we catched the case and it does not propagate outward
-            env.state = envstate.RUN
-            break
-        if env.state is envstate.CONTINUE:
-            # must reset the state because we catched the case and it does not propagate outward
-            env.state = envstate.RUN
+        if env.state is envstate.RUN:
             continue
         if env.state is envstate.RETURN:
             return last
+        # must reset the state because we catched the case and it does not propagate outward
+        is_break = env.state is envstate.BREAK
+        env.state = envstate.RUN
+        if is_break:
+            break
     return noneValueInstance
 
 
@@ -755,55 +954,90 @@ def interpret_for_expression(stmt: ast.ForExpression, env: Environment) -> Runti
         stmt.type = ast.Type(lexer.Pimitives.INT)
 
     # for loop has the limited scope iteration variable. Make a new Environment for it.
-    scope = Environment(env)
+    # A resolved loop of an unused '_' has none, the body runs in the environment of the loop.
     loopvarname = stmt.identifier
-    scope.declare_local(loopvarname, _assign_Type(0, stmt.type), True, stmt)
+    slotted = isinstance(stmt, ast.ScopeForExpression)
+    if slotted and stmt.names is None:  # type: ignore[attr-defined]
+        scope = env
+    elif slotted:
+        scope = _enter(env, None, stmt.names, 1)  # type: ignore[attr-defined]
+        scope.slots[0] = _assign_Type(0, stmt.type)
+    else:
+        scope = Environment(env)
+        scope.declare_local(loopvarname, _assign_Type(0, stmt.type), True, stmt)
+    # the int of a range has the type of an int variable, it is assigned once to its slot
+    slots = scope.slots
+    is_int_range = is_range_iterator and stmt.type.type == lexer.Pimitives.INT and not stmt.type.is_array
 
     # do the loop
     for i in iterator:
-        if is_range_iterator:
-            scope.assign(loopvarname, IntValue(i), stmt)
-        else:
-            scope.assign(loopvarname, i, stmt)
-
-        if is_range_iterator:
-            value = i  # it is of type numeric (python native)
+        if scope is env:
+            if not is_range_iterator and type(i) is not IntValue:
+                statement_error("Variable assigned to '%s' must be of same type." % (loopvarname), stmt)
+        elif slotted and is_int_range and slots[0] is not None:
+            slots[0] = IntValue(i)
         else:
-            value = i.value  # it is of type RuntypeValue
-        scope.assign(loopvarname, _assign_Type(value, stmt.type), stmt)
+            if is_range_iterator:
+                current = IntValue(i)
+                value = i  # it is of type numeric (python native)
+            else:
+                current = i
+                value = i.value  # it is of type RuntypeValue
+            if slotted:
+                _assign_slot(scope, 0, current, loopvarname, stmt)
+                _assign_slot(scope, 0, _assign_Type(value, stmt.type), loopvarname, stmt)
+            else:
+                scope.assign(loopvarname, current, stmt)
+                scope.assign(loopvarname, _assign_Type(value, stmt.type), stmt)
 
         last = interpret_block_expression(stmt.body, scope)
-        env.state = scope.state  # propagate state outwards
         # check for any flow interrupt conditions condition on environment
-        if env.state is envstate.BREAK:
-            # must reset the state because we catched the case and it does not propagate outward
-            env.state = envstate.RUN
-            break
-        if env.state is envstate.CONTINUE:
-            # must reset the state because we catched the case and it does not propagate outward
-            env.state = envstate.RUN
+        if scope.state is envstate.RUN:
             continue
-        if env.state is envstate.RETURN:
+        if scope.state is envstate.RETURN:
+            env.state = envstate.RETURN  # propagate state outwards
+            if scope is not env:
+                _free_environments.append(scope)
             return last
+        # must reset the state because we catched the case and it does not propagate outward
+        is_break = scope.state is envstate.BREAK
+        scope.state = envstate.RUN
+        if is_break:
+            break
+    if slotted and scope is not env:
+        _free_environments.append(scope)
     return noneValueInstance
 
 
 def interpret_block_expression(stmt: ast.BlockStatement, env: Environment) -> RuntimeValue:
     # create a new local environment. C has this, so we need too.
-    scope = Environment(env)
+    # A resolved block which declares no variable runs in the environment of its parent.
+    if not isinstance(stmt, ast.ScopeBlockStatement):
+        scope = Environment(env)
+    elif stmt.names is None:
+        scope = env
+    else:
+        scope = _enter(env, None, stmt.names, stmt.mutables)
     # go through all statements and execute
     last: RuntimeValue = noneValueInstance
-    for statement in stmt.body:
-        last = interpret(statement, scope)
-        env.state = scope.state  # propagate state outwards
-        # check for any flow interrupt conditions condition on environment
-        if env.state is envstate.BREAK:
-            return noneValueInstance
-        if env.state is envstate.CONTINUE:
-            return noneValueInstance
-        if env.state is envstate.RETURN:
-            return last
-    return noneValueInstance
+    if getattr(stmt, "interrupts", True):
+        for statement in stmt.body:
+            last = interpret(statement, scope)
+            # check for any flow interrupt conditions condition on environment
+            if scope.state is not envstate.RUN:
+                env.state = scope.state  # propagate state outwards
+                if scope.state is not envstate.RETURN:
+                    last = noneValueInstance
+                break
+        else:
+            last = noneValueInstance
+    else:
+        # the resolver found no 'break', 'continue' or 'return' leaving the block
+        for statement in stmt.body:
+            interpret(statement, scope)
+    if scope is not env:
+        _free_environments.append(scope)
+    return last
 
 
 def interpret_return_expression(stmt: ast.ReturnExpression, env: Environment) -> RuntimeValue:
@@ -876,3 +1110,83 @@ def interpret_delete_expression(stmt: ast.DeleteExpression, env: Environment):
     identifier = stmt.identifier
     env.delete(identifier, stmt)
     return noneValueInstance
+
+
+# the runtime value of a literal is made once and kept on the node
+def interpret_numeric_literal(stmt: ast.NumericLiteral, env: Environment) -> RuntimeValue:
+    try:
+        return stmt._constant
+    except AttributeError:
+        stmt._constant = IntValue(stmt.value)  # always integer
+        return stmt._constant
+
+
+def interpret_float_literal(stmt: ast.FloatLiteral, env: Environment) -> RuntimeValue:
+    try:
+        return stmt._constant
+    except AttributeError:
+        stmt._constant = FloatValue(stmt.value)
+        return stmt._constant
+
+
+def interpret_string_literal(stmt: ast.StringLiteral, env: Environment) -> RuntimeValue:
+    try:
+        return stmt._constant
+    except AttributeError:
+        stmt._constant = StringValue(stmt.value)
+        return stmt._constant
+
+
+def interpret_identifier(stmt: ast.Identifier, env: Environment) -> RuntimeValue:
+    return env.lookup(stmt.symbol, stmt)
+
+
+def interpret_slot_identifier(stmt: ast.SlotIdentifier, env: Environment) -> RuntimeValue:
+    frame = _slot_environment(env, stmt.depth)
+    slot = stmt.slot
+    value = frame.slots[slot] if slot is not None else None
+    if value is None:  # a variable of the program or deleted
+        return frame.lookup(stmt.symbol, stmt)
+    return value
+
+
+def interpret_unreachable_expression(stmt: ast.UnreachableExpression, env: Environment) -> RuntimeValue:
+    statement_error("Reached unreachable expression.", stmt)
+    return noneValueInstance
+
+
+# node class to the function interpreting it. Subclasses are added by _find_interpreter(..).
+_interpreters: dict[type, typing.Callable[[Any, Environment], RuntimeValue]] = {
+    ast.BinaryExpression: interpret_binary_expression,
+    ast.UnaryBeforeExpression: interpret_unary_before_expression,
+    ast.UnaryIdentifierBeforeExpression: interpret_unary_identifier_before_expression,
+    ast.UnaryIdentifierAfterExpression: interpret_unary_identifier_after_expression,
+    ast.AssignmentExpression: interpret_assignment_expression,
+    ast.NumericLiteral: interpret_numeric_literal,
+    ast.FloatLiteral: interpret_float_literal,
+    ast.StringLiteral: interpret_string_literal,
+    ast.Identifier: interpret_identifier,
+    ast.VariableDeclaration: interpret_variable_declaration,
+    ast.SlotIdentifier: interpret_slot_identifier,
+    ast.SlotVariableDeclaration: interpret_slot_variable_declaration,
+    ast.SlotAssignmentExpression: interpret_slot_assignment_expression,
+    ast.SlotUnaryIdentifierBeforeExpression: interpret_slot_unary_identifier_before_expression,
+    ast.SlotUnaryIdentifierAfterExpression: interpret_slot_unary_identifier_after_expression,
+    ast.Program: interpret_program,
+    ast.FunctionDeclaration: interpret_function_declare,
+    ast.CallExpression: interpret_call_expression,
+    ast.InlinedCallExpression: interpret_inlined_call_expression,
+    ast.MemberExpression: interpret_member_expression,
+    ast.IfExpression: interpret_if_expression,
+    ast.WhileExpression: interpret_while_expression,
+    ast.ForExpression: interpret_for_expression,
+    ast.BlockStatement: interpret_block_expression,
+    ast.ReturnExpression: interpret_return_expression,
+    ast.BreakExpression: interpret_break_expression,
+    ast.ContinueExpression: interpret_continue_expression,
+    ast.ElvisExpression: interpret_elvis_expression,
+    ast.ListLiteral: interpret_list_literal,
+    ast.ObjectLiteral: interpret_object_literal,
+    ast.DeleteExpression: interpret_delete_expression,
+    ast.UnreachableExpression: interpret_unreachable_expression,
+}
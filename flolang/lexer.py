@@ -1,5 +1,10 @@
+import concurrent.futures
+import functools
+import itertools
+import mmap
+import os
 import re
-from typing import Any
+from typing import Any, Iterator, TextIO
 from flolang.error import error_symbol
 from flolang.error import LocationError
 from flolang.error import Symbols
@@ -155,35 +160,92 @@ class Pimitives:
 SHEBANG = "#!"
 
 
+# The tokenizer is driven by one precompiled pattern. Every alternative is a named group,
+# so 'lastgroup' tells which kind of token was found. The alternatives are separated by
+# their first character, so the order only matters for hex before decimal numbers.
+_symbolic_tokens = sorted(set(string_tokens + small_tokens), key=len, reverse=True)
+_token_pattern = re.compile("|".join([
+    "(?P<ignore>[ \\t\\n\\r]+)",
+    "(?P<symbolic>" + "|".join(re.escape(s) for s in _symbolic_tokens) + ")",
+    "(?P<alloc>" + re.escape(ALLOC) + ")(?![^\\W_])",
+    "(?P<word>[a-zA-Z_][a-zA-Z_0-9]*)",
+    "(?P<hex>0x[0-9a-fA-F]+)",
+    "(?P<number>[0-9][0-9\\.]*(?:E[0-9]+)?)",
+    "(?P<string>" + "|".join(
+        "%s(?:[^%s\\\\]*(?:\\\\.[^%s\\\\]*)*)%s" % (q, q, q, q) for q in ['"', "'", "`"]
+    ) + ")",
+]))
+
+# removes the comments from the source line.
+# note that it is enforced that the '#' has a space before and after.
+# except the comment is at the start of the input.
+# "(?:^| * )#(?: .*|$|!.*)" would allow shebang
+_comment_pattern = re.compile("(?:^| * )#(?: .*|$)")
+
+# dict lookups returning the canonical token constants. The parser compares
+# token types with 'is', so the matched text itself must never end up as type.
+_symbolic_lookup = {s: s for s in _symbolic_tokens}
+_keyword_lookup = {s: s for s in keyword_tokens}
+_reserved_lookup = frozenset(potentially_reserved_keywords)
+
+# the symbolic tokens in the order the tokenizer always tried them.
+# It contains POW twice, which is significant for the chaining below.
+_symbolic_order = sorted(string_tokens + small_tokens, reverse=True)
+
+
+@functools.cache
+def _symbolic_chain(previous: int, longest: str) -> tuple[str, int, bool]:
+    # Symbolic tokens directly following each other are matched as one chain.
+    # Each token of a chain is searched further down the reverse sorted token list than
+    # the one before. If only a shorter token is found there, it wins over the longest
+    # match (e.g. '<<<=' gives '<<', '<', '='). All tokens of a chain share the position
+    # of its first token. This keeps the token stream of the original tokenizer.
+    # Returns the token, its index in '_symbolic_order' and if it continues the chain.
+    if previous >= 0:
+        for index in range(previous + 1, len(_symbolic_order)):
+            if longest.startswith(_symbolic_order[index]):
+                return _symbolic_lookup[_symbolic_order[index]], index, True
+    return _symbolic_lookup[longest], _symbolic_order.index(longest), False
+
+
 # Counts the number of leading spaces in a string.
 def count_leading_spaces(string: str) -> int:
-    count = 0
-    for char in string:
-        if char != ' ':
-            break
-        count += 1
-    return count
-
+    return len(string) - len(string.lstrip(" "))
 
-def count_idents(string: str, symbols: Symbols) -> int:
-    spaces = count_leading_spaces(string)
-    if spaces % 4 == 0:
-        return spaces // 4
-    error_symbol("indentation is not a multiple of 4 (its %d)." % spaces, symbols)
-    return 0  # never reach because above we throw exception
 
+class LineTable:
+    # filename and source lines of a tokenized file. All tokens of the file share it.
+    # lines is a list indexed by line number or a dict when only some lines are kept.
+    __slots__ = ("filename", "lines")
 
-def consume_idents(line: str, ident: int) -> str:
-    return line[(ident * 4):]
+    def __init__(self, filename: str, lines: list[str] | dict[int, str]):
+        self.filename = filename
+        self.lines = lines
 
 
 class Token:
+    # tokens only keep the position. The debug symbols are resolved from the
+    # line table when needed for an error or a location representation.
+    __slots__ = ("type", "value", "table", "line_nr", "line_pos")
+
     def __init__(self, symbols: Symbols, type: int | str, value: Any = None):
         self.type = type
         self.value = value
-        # debug symbols. If anything goes wrong, want to have the information which line is affected
-        # self.filename, self.line_nr, self.line_pos, self.line = symbols
-        self.symbols = symbols
+        self.table = LineTable(symbols.filename, {symbols.line_nr: symbols.line})
+        self.line_nr = symbols.line_nr
+        self.line_pos = symbols.line_pos
+
+    @property
+    def filename(self) -> str:
+        return self.table.filename
+
+    @property
+    def line(self) -> str:
+        return self.table.lines[self.line_nr]
+
+    @property
+    def symbols(self) -> Symbols:
+        return Symbols(self.table.filename, self.line_nr, self.line_pos, self.table.lines[self.line_nr])
 
     def __repr__(self):
         type_str = ""
@@ -217,21 +279,15 @@ class Token:
         return 1
 
 
-def remove_comments(line):
-    # removes the comments from the source line.
-    # note that it is enforced that the '#' has a space before and after.
-    # except the comment is at the start of the input.
-
-    # return re.sub("(?:^| * )#(?: .*|$|!.*)", "", line)  # allow shebang
-    return re.sub("(?:^| * )#(?: .*|$)", "", line)  # do not allow shebang
-
-
-def starts_with_alphanumeric(string, prefix):
-    if string.startswith(prefix):
-        if len(string) > len(prefix):
-            return not string[len(prefix)].isalnum()
-        return True  # end of input, keyword still matches
-    return False
+def _token(table: LineTable, line_nr: int, line_pos: int, type: int | str, value: Any = None, _new=Token.__new__) -> Token:
+    # creates a token without going through Symbols. Used by the tokenizer.
+    token = _new(Token)
+    token.type = type
+    token.value = value
+    token.table = table
+    token.line_nr = line_nr
+    token.line_pos = line_pos
+    return token
 
 
 def check_numeric_expression_for_dotdot(string):
@@ -252,171 +308,313 @@ def string_escape(input):
     return input.replace("\\'", "'").replace('\\"', '"').replace('\\`', '`').replace('\\\\', '\\')
 
 
-def tokenize(sourcecode: str, filename: str = "__unspecified__") -> list[Token]:
-    tokens = []
-    tokenlist_symbolic = string_tokens + small_tokens
-    tokenlist_symbolic.sort()
-    tokenlist_symbolic.reverse()
-    tokenlist_alphanumeric = keyword_tokens  # + variable_tokens
-    tokenlist_alphanumeric.sort()
-    tokenlist_alphanumeric.reverse()
-    lines = sourcecode.splitlines()
-    current_ident = 0  # everything starts out as not idented
-    for line_nr, full_line in enumerate(lines):
-
-        symbols = Symbols(filename, line_nr, 0, full_line)
-
-        # must parse shebang before comment removal
-        # as its syntax might interfere with the comments
-        if full_line.startswith(SHEBANG):
-            tokens.append(Token(symbols, SHEBANG, full_line.strip()))
-            full_line = ""
+def _tokenize_line(tokens: list[Token], table: LineTable, full_line: str, line_nr: int, current_ident: int) -> tuple[int, int]:
+    # tokenizes one line of the source code and appends the tokens to 'tokens'.
+    # full_line is the line line_nr of the line table. The table might only get it later.
+    # returns the new indentation level and the position where the last token
+    # (or ignored whitespace) started. That one is used for the trailing block endings.
+
+    # must parse shebang before comment removal
+    # as its syntax might interfere with the comments
+    if full_line.startswith(SHEBANG):
+        tokens.append(_token(table, line_nr, 0, SHEBANG, full_line.strip()))
+        return current_ident, 0
+
+    comment = _comment_pattern.search(full_line)
+    source = full_line[:comment.start()] if comment else full_line
+
+    # if only whitespace remains after the comment do not interpret the line, as it might mess up glock tokenizing
+    if not source or source.isspace():
+        return current_ident, 0
+
+    # evaluate indentation changes
+    spaces = count_leading_spaces(source)
+    if spaces % 4 != 0:
+        error_symbol("indentation is not a multiple of 4 (its %d)." % spaces, Symbols(table.filename, line_nr, 0, full_line))
+    ident = spaces // 4
+    while ident > current_ident:
+        tokens.append(_token(table, line_nr, 0, BLOCKSTART))
+        current_ident += 1
+    while ident < current_ident:
+        tokens.append(_token(table, line_nr, 0, BLOCKEND))
+        current_ident -= 1
 
-        source = remove_comments(full_line)
+    line_pos = spaces
+    line_end = len(source)
+    last_pos = line_pos
+    chain_index = -1
+    chain_end = -1
+    while line_pos < line_end:
+        match = _token_pattern.match(source, line_pos)
+        if match is None:
+            error_symbol("Encountered unknown token in sourcecode.", Symbols(table.filename, line_nr, line_pos, full_line))
+            break  # never reach because above we throw exception
+        kind = match.lastgroup
+        text = match.group()
+
+        if kind == "ignore":
+            # every ignored character counts as its own step
+            last_pos = match.end() - 1
+            line_pos = match.end()
+            continue
 
-        # if only whitespace remains after the comment do not interpret the line, as it might mess up glock tokenizing
-        if source.strip() == "":
+        if kind == "symbolic":
+            # this is combined to be able to distinguish '+' from '+='.
+            if line_pos != chain_end:
+                chain_index = -1
+            token_type, chain_index, chained = _symbolic_chain(chain_index, text)
+            if not chained:
+                last_pos = line_pos
+            tokens.append(_token(table, line_nr, last_pos, token_type))
+            line_pos += len(token_type)
+            chain_end = line_pos
             continue
 
-        source_len = len(source)
+        last_pos = line_pos
+        if kind == "word":
+            # search for keywords and names.
+            # a keyword is matched in front of a '_', e.g. 'fn_foo' is 'fn' followed by '_foo'
+            underscore = text.find("_", 1)
+            if underscore > 0 and text[:underscore] in _keyword_lookup:
+                text = text[:underscore]
+            keyword = _keyword_lookup.get(text)
+            if keyword is not None:
+                tokens.append(_token(table, line_nr, line_pos, keyword))
+            elif text in _reserved_lookup:
+                tokens.append(_token(table, line_nr, line_pos, RESERVED_IDENTIFIER, text))
+            else:
+                tokens.append(_token(table, line_nr, line_pos, IDENTIFIER, text))
+        elif kind == "number":
+            # search for floats or integers
+            text = check_numeric_expression_for_dotdot(text)
+            if "E" in text or "." in text:
+                tokens.append(_token(table, line_nr, line_pos, FLOAT, text))
+            else:
+                tokens.append(_token(table, line_nr, line_pos, NUMBER, text))
+        elif kind == "hex":
+            # it is a valid integer but given in hex format
+            tokens.append(_token(table, line_nr, line_pos, NUMBER, text))
+        elif kind == "string":
+            # a string literal with any of the quotes " ' `
+            tokens.append(_token(table, line_nr, line_pos, STRING, string_escape(text[1:-1])))
+        else:
+            tokens.append(_token(table, line_nr, line_pos, ALLOC))
+        line_pos += len(text)
 
-        # evaluate indentation changes
-        ident = count_idents(source, symbols)
-        source = consume_idents(source, ident)
-        while ident > current_ident:
-            tokens.append(Token(symbols, BLOCKSTART))
-            current_ident += 1
-        while ident < current_ident:
-            tokens.append(Token(symbols, BLOCKEND))
-            current_ident -= 1
+    last_token = tokens[-1]
+    if last_token.type is RETURN:
+        last_token.value = 1
 
-        while len(source):
-            line_pos = source_len - len(source)
-            found = False
-            symbols = Symbols(filename, line_nr, line_pos, full_line)
+    return current_ident, last_pos
 
-            # search the basic symbolic tokens
-            # this is combined to be able to distinguish '+' from '+='.
-            # it is also the reason the tokenlist is sorted and reversed to first match '+'
-            for s in tokenlist_symbolic:
-                # if source.startswith(s):
-                if source.startswith(s):
-                    tokens.append(Token(symbols, s))
-                    source = source[len(s):]
-                    found = True
-
-            # search for the basic alphanumeric tokens
-            # also includes builtin type matches
-            # this is combined to be able to distinguish 'in' from 'int'.
-            # it is also the reason the tokenlist is sorted and reversed to first match 'in'
-            # this uses starts_with_alphanumeric(..) to make sure a keyword is not mached in a
-            # identifier: e.g keyword 'fn' must not match in identifier 'function'
-            if not found:
-                for s in tokenlist_alphanumeric:
-                    if starts_with_alphanumeric(source, s):
-                        tokens.append(Token(symbols, s))
-                        source = source[len(s):]
-                        found = True
-                        break
-
-            # search for names
-            if not found:
-                match = re.search("^[a-zA-Z_]+[a-zA-Z_0-9]*", source)
-                if match:
-                    identifier = match[0]
-                    if identifier not in potentially_reserved_keywords:
-                        tokens.append(Token(symbols, IDENTIFIER, identifier))
-                        source = source[len(identifier):]
-                        found = True
-                    else:
-                        tokens.append(Token(symbols, RESERVED_IDENTIFIER, identifier))
-                        source = source[len(identifier):]
-                        found = True
-
-            # search for hex integers
-            if not found:
-                match = re.search("^0x[0-9a-fA-F]+", source)
-                if match:
-                    number = match[0]
-                    # it is a valid integer but given in hex format
-                    tokens.append(Token(symbols, NUMBER, number))
-                    source = source[len(number):]
-                    found = True
 
-            # search for floats or integers
-            if not found:
-                match = re.search("^[0-9\\.]+(E[0-9]+|)", source)
-                if match:
-                    number = match[0]
-                    number = check_numeric_expression_for_dotdot(number)
-                    match2 = re.search("E|\\.", number)
-                    if (match2):
-                        # found a float
-                        tokens.append(Token(symbols, FLOAT, number))
-                        source = source[len(number):]
-                        found = True
-                    else:
-                        # it is still a valid integer
-                        tokens.append(Token(symbols, NUMBER, number))
-                        source = source[len(number):]
-                        found = True
-
-            # search for a string literal with double quotes "
-            if not found:
-                match = re.search('^"((?:[^"\\\\]*(?:\\\\.[^"\\\\]*)*))"', source)
-                if match:
-                    string = match[1]  # need group 1 containing the string without "
-                    string = string_escape(string)  # escape it
-                    tokens.append(Token(symbols, STRING, string))
-                    source = source[len(match[0]):]
-                    found = True
-
-            # search for a string literal with single quotes '
-            if not found:
-                match = re.search("^'((?:[^'\\\\]*(?:\\\\.[^'\\\\]*)*))'", source)
-                if match:
-                    string = match[1]  # need group 1 containing the string without "
-                    string = string_escape(string)  # escape it
-                    tokens.append(Token(symbols, STRING, string))
-                    source = source[len(match[0]):]
-                    found = True
-
-            # search for a string literal with tilted quotes `
-            if not found:
-                match = re.search("^`((?:[^`\\\\]*(?:\\\\.[^`\\\\]*)*))`", source)
-                if match:
-                    string = match[1]  # need group 1 containing the string without "
-                    string = string_escape(string)  # escape it
-                    tokens.append(Token(symbols, STRING, string))
-                    source = source[len(match[0]):]
-                    found = True
-
-            # ignore ignores if need be
-            if not found:
-                if source[0] in ignores:
-                    source = source[1:]
-                    found = True
-
-            # assert any remaining problems
-            if not found:
-                error_symbol("Encountered unknown token in sourcecode.", symbols)
-
-        if len(tokens):
-            last_token = tokens[-1]
-            if last_token.type is RETURN:
-                last_token.value = 1
+def _tokenize_end(tokens: list[Token], table: LineTable, line_nr: int, last_pos: int, current_ident: int):
+    # line_nr is the last line of the source code in the line table. -1 for an empty source.
 
     # insert the needed amount of block endings according current operating ident.
     while current_ident > 0:
-        tokens.append(Token(symbols, BLOCKEND))
+        tokens.append(_token(table, line_nr, last_pos, BLOCKEND))
         current_ident -= 1
 
-    if len(lines):
-        line_pos = len(lines[-1]) - 1
+    if line_nr >= 0:
+        line_pos = len(table.lines[line_nr]) - 1
         if line_pos < 0:
             line_pos = 0
-        symbols = Symbols(filename, len(lines) - 1, line_pos, lines[-1])
+        tokens.append(_token(table, line_nr, line_pos, EOF))
     else:
-        symbols = Symbols(filename, 0, 0, "")
-    tokens.append(Token(symbols, EOF))
+        tokens.append(_token(LineTable(table.filename, [""]), 0, 0, EOF))
+
+
+def tokenize(sourcecode: str, filename: str = "__unspecified__", workers: int = 1) -> list[Token]:
+    # with workers > 1 large sources are tokenized in parallel by that many processes.
+    lines = sourcecode.splitlines()
+    table = LineTable(filename, lines)
+    if workers > 1:
+        chunks = _split_top_level(lines, workers * 4)
+        if len(chunks) > 1:
+            return _tokenize_parallel(table, lines, chunks, workers)
+
+    tokens: list[Token] = []
+    current_ident = 0  # everything starts out as not idented
+    last_pos = 0
+    for line_nr, full_line in enumerate(lines):
+        current_ident, last_pos = _tokenize_line(tokens, table, full_line, line_nr, current_ident)
+    _tokenize_end(tokens, table, len(lines) - 1, last_pos, current_ident)
+    return tokens
+
+
+def _split_top_level(lines: list[str], count: int) -> list[tuple[int, int]]:
+    # splits the lines in about count chunks of (first_line, end_line).
+    # Every chunk but the first starts at a top level line which has code at column 0.
+    # The indentation is 0 there, so the chunks can be tokenized independently.
+    size = max(len(lines) // count, 1)
+    chunks = []
+    first = 0
+    candidate = size
+    while candidate < len(lines):
+        full_line = lines[candidate]
+        if full_line and not full_line[0].isspace() and full_line[0] != "#":
+            chunks.append((first, candidate))
+            first = candidate
+            candidate += size
+        else:
+            candidate += 1
+    chunks.append((first, len(lines)))
+    return chunks
+
+
+def _tokenize_chunk(filename: str, first_line: int, lines: list[str]) -> tuple[list, list, list[int], list[int], int, int]:
+    # runs in a worker process. Returns the tokens as columns, because tokens with their
+    # line table are expensive to send back. The indentation level starts at 0 for a chunk.
+    tokens: list[Token] = []
+    table = LineTable(filename, {})
+    current_ident = 0
+    last_pos = 0
+    for line_nr, full_line in enumerate(lines, first_line):
+        current_ident, last_pos = _tokenize_line(tokens, table, full_line, line_nr, current_ident)
+    return ([t.type for t in tokens], [t.value for t in tokens], [t.line_nr for t in tokens],
+            [t.line_pos for t in tokens], current_ident, last_pos)
+
+
+# token types are compared with 'is'. Types coming back from a worker process
+# are copies and need to be replaced with the canonical constants again.
+_canonical_types = {t: t for t in string_tokens + small_tokens + keyword_tokens + [SHEBANG]}
+
+
+def _tokenize_parallel(table: LineTable, lines: list[str], chunks: list[tuple[int, int]], workers: int) -> list[Token]:
+    tokens: list[Token] = []
+    current_ident = 0
+    last_pos = 0
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_tokenize_chunk, table.filename, first, lines[first:end]) for first, end in chunks]
+        # results are taken in order, so the first error in the source is raised
+        for (first, end), future in zip(chunks, futures):
+            types, values, line_nrs, line_positions, chunk_ident, chunk_last_pos = future.result()
+            # the block endings of the previous chunk are at the first line of this chunk
+            while current_ident > 0:
+                tokens.append(_token(table, first, 0, BLOCKEND))
+                current_ident -= 1
+            for type, value, line_nr, line_pos in zip(types, values, line_nrs, line_positions):
+                tokens.append(_token(table, line_nr, line_pos, _canonical_types.get(type, type), value))
+            current_ident = chunk_ident
+            last_pos = chunk_last_pos
+    _tokenize_end(tokens, table, len(lines) - 1, last_pos, current_ident)
     return tokens
+
+
+def _iter_lines(source: TextIO | mmap.mmap) -> Iterator[str]:
+    # same lines as str.splitlines() would give on the whole source.
+    # A file line might contain additional line breaks like '\f' which splitlines knows.
+    if isinstance(source, mmap.mmap):
+        for raw in iter(source.readline, b""):
+            yield from raw.decode("utf-8").splitlines()
+    else:
+        for physical_line in source:
+            yield from physical_line.splitlines()
+
+
+def iter_tokens(source: str | os.PathLike | TextIO | mmap.mmap, filename: str = "__unspecified__") -> Iterator[Token]:
+    # lazily tokenizes a text stream, a memory mapped file or the file given by its path.
+    # Yields the same tokens as tokenize(..) but only holds one line at a time.
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "r", encoding="utf-8") as f:
+            yield from iter_tokens(f, filename)
+        return
+
+    # every line gets its own line table, so a line is released together with its tokens
+    tokens: list[Token] = []
+    table = LineTable(filename, {})
+    current_ident = 0  # everything starts out as not idented
+    last_pos = 0
+    line_nr = -1
+    for full_line in _iter_lines(source):
+        line_nr += 1
+        table = LineTable(filename, {line_nr: full_line})
+        current_ident, last_pos = _tokenize_line(tokens, table, full_line, line_nr, current_ident)
+        yield from tokens
+        tokens.clear()
+    _tokenize_end(tokens, table, line_nr, last_pos, current_ident)
+    yield from tokens
+
+
+class IncrementalTokenizer:
+    # Tokenizes a source code and keeps the tokens per line. An edit replaces a range of lines
+    # and only tokenizes the new lines again. The following line with code is tokenized again as
+    # well if the indentation level going into it has changed, because its block start and end
+    # tokens depend on it. Edits which add or remove lines renumber the tokens after the edit.
+    def __init__(self, sourcecode: str = "", filename: str = "__unspecified__"):
+        self.filename = filename
+        self.lines: list[str] = []
+        self._table = LineTable(filename, self.lines)  # shares the list of lines, edits change it in place
+        self._line_tokens: list[list[Token]] = []  # tokens created by each line
+        self._idents: list[int] = []  # indentation level after each line
+        self._last_pos: list[int] = []  # start of the last token or whitespace of each line
+        self._end_tokens: list[Token] = []  # BLOCKEND and EOF tokens closing the source
+        self._end_line: list[Token] | None = None  # tokens of the last line the above belong to
+        self.edit(0, 0, sourcecode)
+
+    def tokens(self) -> list[Token]:
+        # the complete token stream, same as tokenize(..) gives for the current lines.
+        # Tokens of unchanged lines are the same objects as the last time.
+        tokens = list(itertools.chain.from_iterable(self._line_tokens))
+        if self.lines:
+            last_line = self._line_tokens[-1]
+            if self._end_tokens and self._end_line is last_line:
+                # the last line is unchanged, so are the closing tokens. Only renumber them.
+                for token in self._end_tokens:
+                    token.line_nr = len(self.lines) - 1
+            else:
+                self._end_tokens = []
+                _tokenize_end(self._end_tokens, self._table, len(self.lines) - 1, self._last_pos[-1], self._idents[-1])
+                self._end_line = last_line
+            tokens.extend(self._end_tokens)
+        else:
+            _tokenize_end(tokens, self._table, -1, 0, 0)
+        return tokens
+
+    def _ident_before(self, line_nr: int) -> int:
+        if line_nr > 0:
+            return self._idents[line_nr - 1]
+        return 0
+
+    def edit(self, first_line: int, last_line: int, text: str):
+        # replaces the lines from first_line up to (excluding) last_line with the lines of text.
+        # edit(n, n, text) inserts before line n, edit(n, n + 1, "") deletes line n.
+        if not 0 <= first_line <= last_line <= len(self.lines):
+            raise ValueError("Edit line range %d..%d is outside of the %d lines." % (first_line, last_line, len(self.lines)))
+        new_lines = text.splitlines()
+        shift = len(new_lines) - (last_line - first_line)
+
+        # tokenize into new lists first, an error must not leave a half edited state
+        line_tokens: list[list[Token]] = []
+        idents: list[int] = []
+        last_pos: list[int] = []
+        ident = self._ident_before(first_line)
+        for offset, full_line in enumerate(new_lines):
+            tokens: list[Token] = []
+            ident, pos = _tokenize_line(tokens, self._table, full_line, first_line + offset, ident)
+            line_tokens.append(tokens)
+            idents.append(ident)
+            last_pos.append(pos)
+
+        # re-sync the indentation state with the lines following the edit
+        resync = last_line
+        while resync < len(self.lines) and ident != self._ident_before(resync):
+            full_line = self.lines[resync]
+            tokens = []
+            ident, pos = _tokenize_line(tokens, self._table, full_line, resync + shift, ident)
+            new_lines.append(full_line)
+            line_tokens.append(tokens)
+            idents.append(ident)
+            last_pos.append(pos)
+            resync += 1
+
+        self.lines[first_line:resync] = new_lines
+        self._line_tokens[first_line:resync] = line_tokens
+        self._idents[first_line:resync] = idents
+        self._last_pos[first_line:resync] = last_pos
+
+        if shift:
+            for line_nr in range(resync + shift, len(self.lines)):
+                for token in self._line_tokens[line_nr]:
+                    token.line_nr = line_nr
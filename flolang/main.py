@@ -11,12 +11,13 @@ if __name__ == "__main__":
     sys.path.append(os.path.dirname(SCRIPT_DIR))
 
 
-from flolang import tokenize, default_environment, parse, interpret, to_native, eval
+from flolang import tokenize, default_environment, parse, interpret, to_native, eval, execute, engines, INLINE_SIZE
+from flolang.cache import cached_parse_file, cache_directory
 
 from flolang.console import parse_arguments, print_exception, set_pretty_print
 
 
-def main_console(arguments=None):
+def main_console(arguments=None, engine=None, inline_size=INLINE_SIZE):
     print("flolang v0.1 by ftobler")
     env = default_environment()
     env.declare_global("_", interpret(parse(tokenize("None")), env), True, None)
@@ -24,43 +25,41 @@ def main_console(arguments=None):
     if arguments:
         declare_arguments(env, arguments)
     while True:
-        tok_copy = None
+        tok = None
         ast = None
         value = None
         try:
             print("# ", end="")
+            # the parser does not modify the token list, it can be printed on error
             tok = tokenize(input(), filename="__interpreter__")
-            tok_copy = tok.copy()
             ast = parse(tok)
-            value = interpret(ast, env)
+            value = execute(ast, env, engine, inline_size)
             env.assign("_", value, None, force=True)
             print(to_native(value))
         except Exception as e:
-            print_exception(e, tok_copy, ast, value)
+            print_exception(e, tok, ast, value)
 
 
 def declare_arguments(env, arguments):
     # declare argument array in environment
-    command = "static int __argv = " + str(arguments).replace("'", '"')
+    command = "static __argv = " + str(arguments).replace("'", '"')
     eval(command, env=env, shebang=None)
 
 
-def main_execute(script_file, arguments):
-    with open(script_file, "r") as f:
-        tok_copy = None
-        ast = None
-        value = None
-        try:
-            code = f.read()
-            tok = tokenize(code)
-            tok_copy = tok.copy()
-            ast = parse(tok)
-            env = default_environment()
-            declare_arguments(env, arguments)
-            value = interpret(ast, env)
-            # print(value)
-        except Exception as e:
-            print_exception(e, tok_copy, ast, value)
+def main_execute(script_file, arguments, engine=None, inline_size=INLINE_SIZE):
+    tok = None
+    ast = None
+    value = None
+    try:
+        # an unchanged script is loaded from the __flocache__ directory next to it.
+        # Function bodies are only parsed when called.
+        tok, ast = cached_parse_file(script_file, lazy=True, directory=cache_directory(script_file))
+        env = default_environment()
+        declare_arguments(env, arguments)
+        value = execute(ast, env, engine, inline_size)
+        # print(value)
+    except Exception as e:
+        print_exception(e, tok, ast, value)
 
 
 def get_help():
@@ -78,6 +77,12 @@ additional switches:
     -c --compile       compile script
     -h --help          prints help (this text)
     -i --interactive   prints help (this text)
+    --engine=closure   run compiled to python closures (faster)
+    --engine=tree      run by walking the AST (default)
+    --engine=vm        run compiled to bytecode
+    --engine=py        run transpiled to python code (fastest)
+    --inline=16        inline calls of functions up to this size (default), 0 inlines nothing
+    --no-optimize      run the script as parsed, see flolang.optimizer
 """
 
 
@@ -95,19 +100,38 @@ def main():
         print_help()
         return
 
+    engine = None
+    for switch in switches:
+        if switch.startswith("--engine="):
+            engine = switch[len("--engine="):]
+            if engine not in engines:
+                print("unknown engine '%s', use one of: %s" % (engine, ", ".join(engines)))
+                return
+
+    inline_size: int | None = INLINE_SIZE
+    for switch in switches:
+        if switch.startswith("--inline="):
+            inline = switch[len("--inline="):]
+            if not inline.isdigit():
+                print("inline size '%s' is not a number" % inline)
+                return
+            inline_size = int(inline)
+    if "--no-optimize" in switches:
+        inline_size = None
+
     if "--compile" in switches or "c" in switches:
         raise Exception("compiling is unimplemented")
 
     if "--interactive" in switches or "i" in switches:
-        main_console(args)
+        main_console(args, engine, inline_size)
         return
 
     if len(args):
         script_file = args[0]
         arguments = args[1:]
-        main_execute(script_file, arguments)
+        main_execute(script_file, arguments, engine, inline_size)
     else:
-        main_console()
+        main_console(engine=engine, inline_size=inline_size)
 
 
 def main_func_interpreter():
@@ -6,6 +6,7 @@ import random
 from flolang.lexer import tokenize
 from flolang.abstract_source_tree import Parser
 import flolang.interpreter as inter
+import flolang.optimizer as optimizer
 
 
 def to_native(val: inter.RuntimeValue):
@@ -126,6 +127,7 @@ def create_default_environment():
 def _run_builtin_code(env: inter.Environment):
     tok = tokenize(builtin)
     ast = Parser().parse(tok)
+    optimizer.optimize(ast)
     inter.interpret(ast, env)
 
 
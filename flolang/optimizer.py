@@ -0,0 +1,508 @@
+import flolang.abstract_source_tree as ast
+import flolang.interpreter as inter
+import flolang.lexer as lexer
+from flolang.error import ParserError, TokenError
+from flolang.interpreter import RuntimeValue, IntValue, FloatValue, StringValue, Environment
+from typing import Any, Callable, Iterator
+
+
+# Optimization of the AST before it is run or compiled, in place. Gives a report of what it did.
+# - An expression of literals is folded to one literal. It is computed by the operations of the
+#   interpreter, an int wraps around at 32 bit. An expression giving an error is kept, the error
+#   shows up when running it.
+# - A variable declared without 'mut' is replaced with its value in the statements following its
+#   declaration in the block. Not in the functions declared there: the free variables of a function
+#   are found in the environment of the caller (flolang scopes dynamically). A name which is
+#   deleted somewhere in the program or in a function of the environment is never replaced. Not from one statement of the program to
+#   another in a program of the IncrementalParser, a statement is used again after an edit.
+# - An 'if' (or 'elif') branch which never runs is removed. So are the statements of a block
+#   following one which always ends in a 'return', 'break' or 'continue'.
+# - A call of a small function which only returns an expression (maybe after 'if' tests, see
+#   _returned(..)) is replaced with the expression, its parameters replaced with the arguments.
+#   The function is declared before in the program or it is one of the environment, like the
+#   ones of the builtin prelude. Its name is not declared, assigned or deleted anywhere else in
+#   the program. The expression calls nothing and changes nothing. The arguments are literals or
+#   variables known to be declared, so nothing runs or fails in another order. The other
+#   variables of the expression are found from the call like they were from the function
+#   (dynamic scoping). A function body outlives its program, a later one running in the same
+#   environment might delete or declare the name again, or a caller might declare it. So the
+#   call is kept with the expression (ast.InlinedCallExpression), the expression is used while
+#   the caller finds the function inlined, else the call runs.
+#   A call which is a statement of the program is not inlined, it is deferred.
+# The function bodies of a lazy parse which are not parsed yet are optimized when they are parsed,
+# as they would have been now. The report does not count them.
+
+INLINE_SIZE = 16  # the number of nodes of the largest function expression inlined
+_LAZY_TOKENS = 4  # tokens per node of a function body not parsed yet which might be inlined
+
+
+def _nodes(node: ast.Statement) -> Iterator[ast.Statement]:
+    # the node and all nodes below it. Does not parse a lazy function body.
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        yield node
+        if not isinstance(node, ast.LazyBlockStatement) or node.is_parsed():
+            stack.extend(ast.iter_children(node))
+
+
+def _size(node: ast.Statement) -> int:
+    return sum(1 for _ in _nodes(node))
+
+
+def _deleted(node: ast.Statement) -> set[str]:
+    # the names of all 'delete' expressions, the ones in function bodies not parsed yet too
+    names = set()
+    for node in _nodes(node):
+        if isinstance(node, ast.DeleteExpression):
+            names.add(node.identifier)
+        elif isinstance(node, ast.LazyBlockStatement) and not node.is_parsed():
+            tokens = node._tokens
+            names.update(str(tokens[i + 1].value) for i in range(len(tokens) - 1) if tokens[i].type == lexer.DELETE)
+    return names
+
+
+def _bound(program: ast.Program) -> set[str]:
+    # the names declared, assigned or deleted anywhere other than a function of the program.
+    # In the function bodies not parsed yet all names which are not called.
+    names = set()
+    functions = set()
+    for statement in program.body:
+        if isinstance(statement, ast.FunctionDeclaration):
+            if statement.identifier in functions:
+                names.add(statement.identifier)
+            functions.add(statement.identifier)
+    top = {id(statement) for statement in program.body}
+    for node in _nodes(program):
+        if isinstance(node, (ast.VariableDeclaration, ast.ParameterStatement, ast.ForExpression, ast.DeleteExpression,
+                             ast.UnaryIdentifierBeforeExpression, ast.UnaryIdentifierAfterExpression)):
+            names.add(node.identifier)
+        elif isinstance(node, ast.FunctionDeclaration) and id(node) not in top:
+            names.add(node.identifier)
+        elif isinstance(node, ast.AssignmentExpression) and isinstance(node.assignee, ast.Identifier):
+            names.add(node.assignee.symbol)
+        elif isinstance(node, ast.ClassDeclaration):
+            names.add(node.classname)
+        elif isinstance(node, ast.EnumDeclaration):
+            names.add(node.enumname)
+        elif isinstance(node, ast.LazyBlockStatement) and not node.is_parsed():
+            tokens = node._tokens
+            names.update(str(tokens[i].value) for i in range(len(tokens) - 1)
+                         if tokens[i].type == lexer.IDENTIFIER and tokens[i + 1].type != lexer.COURVE_L)
+    return names
+
+
+def _declared(body: list[ast.Statement]) -> set[str]:
+    # the names a block declares in its environment
+    names = set()
+    for statement in body:
+        if isinstance(statement, (ast.VariableDeclaration, ast.FunctionDeclaration)):
+            names.add(statement.identifier)
+        elif isinstance(statement, ast.ClassDeclaration):
+            names.add(statement.classname)
+        elif isinstance(statement, ast.EnumDeclaration):
+            names.add(statement.enumname)
+    return names
+
+
+def _leaves(statement: ast.Statement) -> bool:
+    # the statements following it in the block never run
+    if isinstance(statement, (ast.ReturnExpression, ast.BreakExpression, ast.ContinueExpression)):
+        return True
+    if isinstance(statement, ast.IfExpression):
+        return statement.alternate is not None and _leaves(statement.consequent) and _leaves(statement.alternate)
+    if isinstance(statement, ast.BlockStatement) and not isinstance(statement, ast.LazyBlockStatement):
+        return bool(statement.body) and _leaves(statement.body[-1])
+    return False
+
+
+# the nodes of an expression which calls nothing and changes nothing
+_pure = (ast.NumericLiteral, ast.FloatLiteral, ast.StringLiteral, ast.Identifier,
+         ast.BinaryExpression, ast.UnaryBeforeExpression, ast.ElvisExpression)
+
+
+def _returned(body: list[ast.Statement]) -> ast.Statement | None:
+    # the expression given by statements which only return. An 'if' gives an elvis expression.
+    if not body:
+        return None
+    statement = body[0]
+    if isinstance(statement, ast.ReturnExpression):
+        return statement.value
+    if isinstance(statement, ast.BlockStatement):
+        return _returned(statement.body + body[1:])
+    if not isinstance(statement, ast.IfExpression):
+        return None
+    consequent = _returned(statement.consequent.body)
+    if isinstance(statement.alternate, ast.IfExpression):
+        alternate = _returned([statement.alternate] + body[1:])
+    elif statement.alternate is not None:
+        alternate = _returned(statement.alternate.body + body[1:])
+    else:
+        alternate = _returned(body[1:])
+    if consequent is None or alternate is None:
+        return None
+    elvis = ast.ElvisExpression(statement.test, consequent, alternate)
+    elvis.loc = statement.loc
+    return elvis
+
+
+def _template(function: ast.FunctionDeclaration, inline_size: int) -> ast.Statement | None:
+    # the expression a call of the function gives, None if it cannot be inlined
+    body = function.body
+    if isinstance(body, ast.LazyBlockStatement) and not body.is_parsed():
+        # a body of a lazy parse is parsed now if it is short enough, a call would parse it anyway
+        if len(body._tokens) > _LAZY_TOKENS * inline_size:
+            return None
+        try:
+            body.body
+        except (ParserError, TokenError):  # shows up when it is called
+            return None
+    if len({parameter.identifier for parameter in function.parameters}) != len(function.parameters):
+        return None
+    expression = _returned(body.body)
+    if expression is None or not all(isinstance(node, _pure) for node in _nodes(expression)):
+        return None
+    return expression
+
+
+def _substitute(node: ast.Statement, arguments: dict[str, ast.Statement]) -> Any:
+    # a copy of the expression with the parameters replaced by a copy of their argument
+    if isinstance(node, ast.Identifier) and node.symbol in arguments:
+        return _substitute(arguments[node.symbol], {})
+    copy = object.__new__(type(node))
+    copy.loc = node.loc
+    for field in node._fields:
+        value = getattr(node, field)
+        if field in node._children and value is not None:
+            value = _substitute(value, arguments)
+        setattr(copy, field, value)
+    return copy
+
+
+def _literal(value: RuntimeValue) -> ast.Literal | None:
+    # the literal node giving the runtime value, None if there is no literal for it
+    if type(value) is IntValue:
+        return ast.NumericLiteral(str(value.value))
+    if type(value) is FloatValue:
+        return ast.FloatLiteral(repr(value.value))
+    if type(value) is StringValue:
+        return ast.StringLiteral(value.value)
+    return None
+
+
+class Report:
+    # what optimize(..) did to a program
+    def __init__(self, removed: int = 0, inlined: dict[str, int] | None = None):
+        self.removed = removed  # number of nodes, less the ones an inlined expression adds
+        self.inlined = inlined or {}  # function name to the number of calls inlined
+
+    def __str__(self):
+        inlined = ", ".join("%s %d times" % item for item in sorted(self.inlined.items()))
+        return "removed %d nodes, inlined %s" % (self.removed, inlined or "nothing")
+
+
+class _Optimizer:
+    def __init__(self, deleted: set[str], bound: set[str], functions: dict[str, ast.FunctionDeclaration], defined: set[str], inline_size: int):
+        self.deleted = deleted
+        self.bound = bound  # the names of functions which cannot be inlined
+        self.constants: dict[str, RuntimeValue] = {}  # the variables with a known value in the current block
+        self.defined = defined  # the variables known to be declared in the current block
+        self.globals = defined  # the ones of the program, declared when its functions are called
+        self.known: dict[ast.Statement, RuntimeValue] = {}  # expressions with a known value but no literal for it
+        self.functions = functions  # the functions which can be inlined by name
+        self.templates: dict[ast.FunctionDeclaration, tuple[ast.Statement | None, int]] = {}
+        self.inline_size = inline_size
+        self.removed = 0
+        self.inlined: dict[str, int] = {}
+
+    def optimize(self, node: Any) -> Any:
+        method = getattr(self, "optimize_" + node.kind, None)
+        if method is not None:
+            return method(node)
+        self.optimize_children(node)
+        return node
+
+    def optimize_children(self, node: ast.Statement):
+        for field in node._children:
+            value = getattr(node, field)
+            if isinstance(value, list):
+                value[:] = [self.optimize(child) for child in value]
+            elif value is not None:
+                setattr(node, field, self.optimize(value))
+
+    def value(self, node: ast.Statement) -> RuntimeValue | None:
+        # the value of an optimized expression if it is known before running
+        if isinstance(node, ast.Identifier):
+            return self.constants.get(node.symbol)
+        if isinstance(node, ast.NumericLiteral):
+            return IntValue(node.value)
+        if isinstance(node, ast.FloatLiteral):
+            return FloatValue(node.value)
+        if isinstance(node, ast.StringLiteral):
+            return StringValue(node.value)
+        return self.known.get(node)
+
+    def constant(self, node: ast.Expression, value: RuntimeValue) -> ast.Expression:
+        # replaces the expression with the literal of its value
+        literal = _literal(value)
+        if literal is None:
+            self.known[node] = value
+            return node
+        literal.loc = node.loc
+        self.removed += _size(node) - 1
+        return literal
+
+    def statements(self, body: list[ast.Statement]) -> list[ast.Statement]:
+        # the statements of a block
+        statements = []
+        for index, statement in enumerate(body):
+            statement = self.optimize(statement)
+            if statement is None:
+                continue
+            statements.append(statement)
+            if _leaves(statement):
+                self.removed += sum(_size(unreachable) for unreachable in body[index + 1:])
+                break
+        return statements
+
+    def enter(self, hidden: set[str], defined: set[str]) -> tuple[dict[str, RuntimeValue], set[str]]:
+        # a nested environment declaring the hidden names. Gives what leave(..) restores.
+        scope = self.constants, self.defined
+        self.constants = {name: value for name, value in self.constants.items() if name not in hidden}
+        self.defined = self.defined | (defined - self.deleted)
+        return scope
+
+    def leave(self, scope: tuple[dict[str, RuntimeValue], set[str]]):
+        self.constants, self.defined = scope
+
+    def inline(self, node: ast.CallExpression) -> ast.Statement:
+        # the expression of the function called with the arguments, see _template(..)
+        if not isinstance(node.caller, ast.Identifier):
+            return node
+        name = node.caller.symbol
+        function = self.functions.get(name)
+        if function is None:
+            return node
+        if function not in self.templates:
+            template = _template(function, self.inline_size)
+            self.templates[function] = template, _size(template) if template else 0
+        template, size = self.templates[function]
+        if template is None or size > self.inline_size or len(node.arguments) > len(function.parameters):
+            return node
+        arguments: dict[str, ast.Statement] = {}
+        argument: ast.Statement | None
+        for index, parameter in enumerate(function.parameters):
+            if index < len(node.arguments):
+                argument = node.arguments[index]
+                if isinstance(argument, ast.Identifier) and argument.symbol in self.defined:
+                    arguments[parameter.identifier] = argument
+                    continue
+            else:
+                argument = parameter.default  # evaluated on declaration
+            if not isinstance(argument, (ast.NumericLiteral, ast.FloatLiteral, ast.StringLiteral)):
+                return node
+            arguments[parameter.identifier] = argument
+        expression = _substitute(template, arguments)
+        self.removed -= 1 + _size(expression)
+        self.inlined[name] = self.inlined.get(name, 0) + 1
+        inlined = ast.InlinedCallExpression(node, self.optimize(expression), function)
+        inlined.loc = node.loc
+        return inlined
+
+    def later(self) -> Callable[[ast.BlockStatement], Any]:
+        # optimizes a block parsed later, in the state of now
+        optimizer = _Optimizer(self.deleted, self.bound, self.functions, self.globals, self.inline_size)
+        optimizer.constants = dict(self.constants)
+        optimizer.defined = set(self.defined)
+        return optimizer.optimize_BlockStatement
+
+    def optimize_Program(self, node: ast.Program) -> ast.Program:
+        body = []
+        for statement in node.body:
+            if node._incremental:
+                self.constants = {}
+            if isinstance(statement, ast.CallExpression):
+                optimized = self.optimize_arguments(statement)  # deferred, see interpreter
+            else:
+                optimized = self.optimize(statement)
+            if isinstance(optimized, ast.FunctionDeclaration):
+                self.defined.add(optimized.identifier)
+                if optimized.identifier not in self.bound:
+                    self.functions[optimized.identifier] = optimized
+            if optimized is not None:
+                body.append(optimized)
+        if node.body and optimized is None:
+            # the last statement gives the value of the program, a removed 'if' gives none
+            block = ast.BlockStatement([])
+            block.loc = node.body[-1].loc
+            body.append(block)
+            self.removed -= 1
+        node.body = body
+        return node
+
+    def optimize_BlockStatement(self, node: ast.BlockStatement) -> ast.BlockStatement:
+        if isinstance(node, ast.LazyBlockStatement) and not node.is_parsed():
+            node._on_parse = self.later()
+            return node
+        scope = self.enter(_declared(node.body), set())
+        node.body = self.statements(node.body)
+        self.leave(scope)
+        return node
+
+    def optimize_ForExpression(self, node: ast.ForExpression) -> ast.ForExpression:
+        if node.quantity_min is not None:
+            node.quantity_min = self.optimize(node.quantity_min)
+        node.quantity_max = self.optimize(node.quantity_max)
+        scope = self.enter({node.identifier}, {node.identifier})
+        node.body = self.optimize(node.body)
+        self.leave(scope)
+        return node
+
+    def optimize_FunctionDeclaration(self, node: ast.FunctionDeclaration) -> ast.FunctionDeclaration:
+        # the defaults are evaluated on declaration, the body sees the variables of the caller
+        for parameter in node.parameters:
+            if parameter.default is not None:
+                parameter.default = self.optimize(parameter.default)
+        parameters = {parameter.identifier for parameter in node.parameters}
+        scope = self.enter(set(self.constants), parameters)
+        self.defined = self.globals | (parameters - self.deleted)
+        node.body = self.optimize(node.body)
+        self.leave(scope)
+        return node
+
+    optimize_ClassMemberFunctionDeclaration = optimize_FunctionDeclaration
+
+    def optimize_ClassDeclaration(self, node: ast.Statement) -> ast.Statement:
+        scope = self.enter(set(self.constants), set())
+        self.optimize_children(node)
+        self.leave(scope)
+        return node
+
+    optimize_EnumDeclaration = optimize_ClassDeclaration
+
+    def optimize_VariableDeclaration(self, node: ast.VariableDeclaration) -> ast.VariableDeclaration:
+        node.value = self.optimize(node.value)
+        if node.identifier not in self.deleted:
+            self.defined.add(node.identifier)
+        value = self.value(node.value)
+        if value is None or node.mutable or node.dynamic or node.identifier in self.deleted:
+            return node
+        if node.type is not None:
+            if node.type.is_array:
+                return node
+            try:
+                value = inter._assign_Type(value.value, node.type)
+            except Exception:  # an error shows up when running it
+                return node
+        self.constants[node.identifier] = value
+        return node
+
+    def optimize_IfExpression(self, node: ast.IfExpression) -> ast.Statement | None:
+        node.test = self.optimize(node.test)
+        test = self.value(node.test)
+        if test is None:
+            node.consequent = self.optimize(node.consequent)
+            if node.alternate is not None:
+                node.alternate = self.optimize(node.alternate)
+            return node
+        # only one branch runs, if any
+        taken = node.consequent if test.value else node.alternate
+        if taken is None:
+            self.removed += _size(node)
+            return None
+        self.removed += _size(node) - _size(taken)
+        return self.optimize(taken)
+
+    def optimize_ElvisExpression(self, node: ast.ElvisExpression) -> ast.Statement:
+        node.test = self.optimize(node.test)
+        test = self.value(node.test)
+        if test is None:
+            node.consequent = self.optimize(node.consequent)
+            node.alternate = self.optimize(node.alternate)
+            return node
+        taken = node.consequent if test.value else node.alternate
+        self.removed += _size(node) - _size(taken)
+        return self.optimize(taken)
+
+    def optimize_Identifier(self, node: ast.Identifier) -> ast.Expression:
+        value = self.constants.get(node.symbol)
+        if value is None:
+            return node
+        literal = _literal(value)
+        if literal is None:
+            return node  # value(..) knows it
+        literal.loc = node.loc
+        return literal
+
+    def optimize_AssignmentExpression(self, node: ast.AssignmentExpression) -> ast.AssignmentExpression:
+        if not isinstance(node.assignee, ast.Identifier):
+            node.assignee = self.optimize(node.assignee)
+        node.value = self.optimize(node.value)
+        return node
+
+    def optimize_arguments(self, node: ast.CallExpression) -> ast.CallExpression:
+        if not isinstance(node.caller, ast.Identifier):
+            node.caller = self.optimize(node.caller)
+        node.arguments = [self.optimize(argument) for argument in node.arguments]
+        return node
+
+    def optimize_CallExpression(self, node: ast.CallExpression) -> ast.Statement:
+        return self.inline(self.optimize_arguments(node))
+
+    def optimize_InlinedCallExpression(self, node: ast.InlinedCallExpression) -> ast.InlinedCallExpression:
+        node.expression = self.optimize(node.expression)
+        return node
+
+    def optimize_MemberExpression(self, node: ast.MemberExpression) -> ast.MemberExpression:
+        if not isinstance(node.object, ast.Identifier):
+            node.object = self.optimize(node.object)
+        if node.computed:  # a name key is not a variable
+            node.key = self.optimize(node.key)
+        return node
+
+    def optimize_BinaryExpression(self, node: ast.BinaryExpression) -> ast.Expression:
+        node.left = self.optimize(node.left)
+        node.right = self.optimize(node.right)
+        left = self.value(node.left)
+        right = self.value(node.right)
+        operation = inter._binary_operations.get(node.operator)
+        if left is None or right is None or operation is None:
+            return node
+        try:
+            value = operation(left, right)
+        except Exception:  # an error shows up when running it
+            return node
+        return self.constant(node, value)
+
+    def optimize_UnaryBeforeExpression(self, node: ast.UnaryBeforeExpression) -> ast.Expression:
+        node.expr = self.optimize(node.expr)
+        expression = self.value(node.expr)
+        operation = inter._unary_operations.get(node.operator)
+        if expression is None or operation is None:
+            return node
+        try:
+            value = operation(expression)
+        except Exception:  # an error shows up when running it
+            return node
+        return self.constant(node, value)
+
+
+def optimize(program: ast.Program, env: Environment | None = None, inline_size: int = INLINE_SIZE) -> Report:
+    # optimizes the program in place. Can be called again on the same program.
+    # The program runs in the environment, the functions declared there before (like the ones of
+    # the builtin prelude) can be inlined as well.
+    deleted = _deleted(program)
+    bound = _bound(program)
+    functions = {}
+    defined = set()
+    if env is not None:
+        for name, value in env.root.scope.items():
+            if isinstance(value, inter.RuntimeFunction) and value.declaration is not None:
+                # a function declared before can delete a variable of its caller (dynamic scoping)
+                deleted |= _deleted(value.declaration)
+                if name not in bound:
+                    functions[name] = value.declaration
+        defined = set(env.root.scope) - deleted
+    optimizer = _Optimizer(deleted, bound, functions, defined, inline_size)
+    optimizer.optimize(program)
+    return Report(optimizer.removed, optimizer.inlined)
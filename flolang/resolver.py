@@ -0,0 +1,247 @@
+import collections
+import flolang.abstract_source_tree as ast
+import flolang.lexer as lexer
+from typing import Any
+
+
+# Static scope resolution for the tree interpreter. Running a block, a for loop or a function
+# call makes an environment, see interpreter. The variables declared in these are known before
+# running, so they get a slot in a list of the environment instead of a key in its dict.
+# A use of a variable which sees its declaration in the source is bound to (depth, slot):
+# 'depth' environments up from the using one, at index 'slot'. Outside of functions any other
+# variable is in the environment of the program, 'depth' up with slot None. Its variables stay in
+# the dict, they are shared with the natives and the following programs. The free variables of a
+# function are looked up by name, they are found in the environment of the caller (flolang
+# scopes dynamically).
+# The environment knows the names of its slots. Lookups by name (a callee, 'delete') find them.
+# A slot which is not set (deleted) falls back to the lookup by name.
+# A block which declares no variable makes no environment, it runs in the one of its parent.
+# The variable '_' of an int for loop is not bound if nothing in the loop can see it. The loop
+# makes no environment then.
+# A block knows if a 'break', 'continue' or 'return' can leave it. The others run without
+# checking the state of the environment after each statement.
+# 'local_names' of a root environment are all names ever declared in an environment below it, by
+# the resolver or by name when running. The resolver adds the names of what it resolves to the
+# set given, also of the parts resolved before (running the same program in another environment).
+# Any other name found in the root environment always is, see the inline cache of the calls in
+# the interpreter.
+
+
+class _Frame:
+    # an environment made when running, with the variables declared so far
+    def __init__(self, shared: set[str], local_names: set[str]):
+        self.names: dict[str, int] = {}
+        self.mutables = 0
+        self.shared = shared  # declared more than once, these are looked up by name
+        self.local_names = local_names
+
+    def declare(self, name: str, mutable: bool) -> int | None:
+        self.local_names.add(name)
+        if name in self.shared:
+            return None
+        slot = self.names[name] = len(self.names)
+        if mutable:
+            self.mutables |= 1 << slot
+        return slot
+
+
+def _shared(names: list[str]) -> set[str]:
+    return {name for name, count in collections.Counter(names).items() if count > 1}
+
+
+def _resolved_names(node: ast.Statement, local_names: set[str]):
+    # the names declared below a node resolved before
+    for child in ast.walk(node):
+        if isinstance(child, (ast.ScopeBlockStatement, ast.ScopeForExpression)) and child.names:
+            local_names.update(child.names)
+        if isinstance(child, ast.ScopeFunctionBody):
+            local_names.update(child.parameter_names)
+
+
+def _unused(node: ast.ForExpression) -> bool:
+    # the loop variable is '_' and the body does not use it. A call might, flolang scopes dynamically.
+    # The int of a range needs no conversion, the ones of a list are checked when running.
+    if node.identifier != "_" or (node.type is not None and (node.type.type != lexer.Pimitives.INT or node.type.is_array)):
+        return False
+    for child in ast.walk(node.body):
+        if isinstance(child, (ast.CallExpression, ast.FunctionDeclaration, ast.ClassDeclaration)):
+            return False
+        if isinstance(child, ast.ForExpression):
+            continue  # declares its own variable, the rest of it is checked
+        if getattr(child, "symbol", None) == "_" or getattr(child, "identifier", None) == "_":
+            return False
+    return True
+
+
+def _interrupts(node: ast.Statement, in_loop: bool = False) -> bool:
+    # a 'break', 'continue' or 'return' in the node leaves it. A loop keeps the first two.
+    if isinstance(node, ast.ReturnExpression):
+        return True
+    if isinstance(node, (ast.BreakExpression, ast.ContinueExpression)):
+        return not in_loop
+    if isinstance(node, ast.FunctionDeclaration):
+        return False
+    in_loop = in_loop or isinstance(node, (ast.WhileExpression, ast.ForExpression))
+    return any(_interrupts(child, in_loop) for child in ast.iter_children(node))
+
+
+class _Resolver:
+    def __init__(self, program: bool, local_names: set[str]):
+        self.frames: list[_Frame] = []  # innermost last
+        self.program = program  # the outermost frame is the environment of the program
+        self.local_names = local_names
+
+    def find(self, name: str) -> tuple[int, int | None] | None:
+        for depth, frame in enumerate(reversed(self.frames)):
+            if name in frame.shared:
+                return None
+            slot = frame.names.get(name)
+            if slot is not None:
+                return depth, slot
+        if self.program:
+            return len(self.frames), None
+        return None
+
+    def resolve(self, node: Any) -> Any:
+        method = getattr(self, "resolve_" + node.kind, None)
+        if method is not None:
+            return method(node)
+        self.resolve_children(node)
+        return node
+
+    def resolve_children(self, node: ast.Statement):
+        for field in node._children:
+            value = getattr(node, field)
+            if isinstance(value, list):
+                value[:] = [self.resolve(child) for child in value]
+            elif value is not None:
+                setattr(node, field, self.resolve(value))
+
+    def block(self, block: ast.BlockStatement) -> tuple[list[ast.Statement], _Frame | None]:
+        declared = [s.identifier for s in block.body if isinstance(s, ast.VariableDeclaration)]
+        if not declared:
+            return [self.resolve(statement) for statement in block.body], None
+        frame = _Frame(_shared(declared), self.local_names)
+        self.frames.append(frame)
+        body = [self.resolve(statement) for statement in block.body]
+        self.frames.pop()
+        return body, frame
+
+    def resolve_BlockStatement(self, node: ast.BlockStatement) -> ast.BlockStatement:
+        if isinstance(node, ast.ScopeBlockStatement):
+            _resolved_names(node, self.local_names)
+            return node  # resolved before, in the same place
+        body, frame = self.block(node)
+        names, mutables = (frame.names, frame.mutables) if frame else (None, 0)
+        block = ast.ScopeBlockStatement(body, names, mutables, any(_interrupts(statement) for statement in body))
+        block.loc = node.loc
+        return block
+
+    def resolve_ForExpression(self, node: ast.ForExpression) -> ast.ForExpression:
+        if isinstance(node, ast.ScopeForExpression):
+            _resolved_names(node, self.local_names)
+            return node
+        if node.quantity_min is not None:
+            node.quantity_min = self.resolve(node.quantity_min)
+        node.quantity_max = self.resolve(node.quantity_max)
+        if _unused(node):
+            loop = ast.ScopeForExpression(node.type, node.identifier, self.resolve(node.body), node.quantity_min, node.quantity_max, False)
+            loop.loc = node.loc
+            return loop
+        frame = _Frame(set(), self.local_names)
+        frame.declare(node.identifier, True)
+        self.frames.append(frame)
+        body = self.resolve(node.body)
+        self.frames.pop()
+        loop = ast.ScopeForExpression(node.type, node.identifier, body, node.quantity_min, node.quantity_max)
+        loop.loc = node.loc
+        return loop
+
+    def resolve_FunctionDeclaration(self, node: ast.FunctionDeclaration) -> ast.FunctionDeclaration:
+        # the defaults are evaluated on declaration, the body is resolved on the first call
+        for parameter in node.parameters:
+            if parameter.default is not None:
+                parameter.default = self.resolve(parameter.default)
+        return node
+
+    resolve_ClassMemberFunctionDeclaration = resolve_FunctionDeclaration
+
+    def resolve_VariableDeclaration(self, node: ast.VariableDeclaration) -> ast.VariableDeclaration:
+        node.value = self.resolve(node.value)
+        slot = self.frames[-1].declare(node.identifier, node.mutable) if self.frames else None
+        if slot is None:
+            return node
+        declaration = ast.SlotVariableDeclaration(node.mutable, node.dynamic, node.type, node.identifier, node.value, node.is_global, slot)
+        declaration.loc = node.loc
+        return declaration
+
+    def resolve_Identifier(self, node: ast.Identifier) -> ast.Identifier:
+        binding = self.find(node.symbol)
+        if binding is None:
+            return node
+        identifier = ast.SlotIdentifier(node.symbol, *binding)
+        identifier.loc = node.loc
+        return identifier
+
+    def resolve_AssignmentExpression(self, node: ast.AssignmentExpression) -> ast.AssignmentExpression:
+        node.value = self.resolve(node.value)
+        assignee = node.assignee
+        if isinstance(assignee, ast.MemberExpression):
+            node.assignee = self.resolve(assignee)
+            return node
+        if not isinstance(assignee, ast.Identifier):
+            return node
+        binding = self.find(assignee.symbol)
+        if binding is None:
+            return node
+        assignment = ast.SlotAssignmentExpression(assignee, node.value, node.operator, *binding)
+        assignment.loc = node.loc
+        return assignment
+
+    def resolve_UnaryIdentifierBeforeExpression(self, node: ast.UnaryIdentifierBeforeExpression) -> ast.Expression:
+        binding = self.find(node.identifier)
+        if binding is None:
+            return node
+        increment = ast.SlotUnaryIdentifierBeforeExpression(node.identifier, node.operator, *binding)
+        increment.loc = node.loc
+        return increment
+
+    def resolve_UnaryIdentifierAfterExpression(self, node: ast.UnaryIdentifierAfterExpression) -> ast.Expression:
+        binding = self.find(node.identifier)
+        if binding is None:
+            return node
+        increment = ast.SlotUnaryIdentifierAfterExpression(node.identifier, node.operator, *binding)
+        increment.loc = node.loc
+        return increment
+
+    def resolve_MemberExpression(self, node: ast.MemberExpression) -> ast.MemberExpression:
+        node.object = self.resolve(node.object)
+        if not isinstance(node.key, ast.Identifier):  # a name key is not a variable
+            node.key = self.resolve(node.key)
+        return node
+
+
+def resolve(program: ast.Program, local_names: set[str] | None = None) -> ast.Program:
+    # binds the variables of the blocks of the program. Can be called again on the same program.
+    _Resolver(True, set() if local_names is None else local_names).resolve_children(program)
+    return program
+
+
+def resolve_function(parameters: list[Any], body: ast.BlockStatement, local_names: set[str] | None = None) -> ast.ScopeFunctionBody:
+    # the parameters (of a runtime function or a declaration) are the slots of the call environment
+    if local_names is None:
+        local_names = set()
+    if isinstance(body, ast.ScopeFunctionBody):
+        _resolved_names(body, local_names)
+        return body
+    resolver = _Resolver(False, local_names)
+    arguments = _Frame(_shared([parameter.identifier for parameter in parameters]), local_names)
+    for parameter in parameters:
+        arguments.declare(parameter.identifier, parameter.mutable)
+    resolver.frames.append(arguments)
+    statements, frame = resolver.block(body)
+    names, mutables = (frame.names, frame.mutables) if frame else (None, 0)
+    interrupts = any(_interrupts(statement) for statement in statements)
+    function = ast.ScopeFunctionBody(statements, names, mutables, interrupts, arguments.names, arguments.mutables)
+    function.loc = body.loc
+    return function
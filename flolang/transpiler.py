@@ -0,0 +1,1281 @@
+import ast as pyast
+import itertools
+import typing
+import flolang.abstract_source_tree as ast
+import flolang.interpreter as inter
+import flolang.lexer as lexer
+from flolang.interpreter import Environment, RuntimeValue, noneValueInstance, statement_error
+
+
+# Python transpiling execution engine. The AST is written as python source, compiled with
+# compile(..) and run as python code. Flolang functions become python functions and the loops
+# python loops. Every line of the python code is mapped back to the line of the flolang
+# statement it is made of, a python exception points into the flolang source.
+#
+# Values are python values (int, float, bool, str and None), lists, objects and functions stay
+# runtime values. They are converted to runtime values only when they go into the environment,
+# a list, an object or a native function. Variables of the blocks and functions are python
+# locals, the ones of the program are copied into the environment when it ends. A variable
+# stays in the environment when it is used without a declaration by any function (the scope
+# is dynamic, the callee sees the variables of its caller) or is deleted.
+#
+# When the type of a value is known, like of a declared 'int' variable, the operation is
+# written inline: the 32 bit wrap around of int, the float promotion and the type and
+# mutability checks of an assignment. Otherwise a helper does it like the interpreter.
+# A function with typed parameters has a second body for the call with values of these types.
+
+INT = lexer.Pimitives.INT
+FLOAT = lexer.Pimitives.FLOAT
+BOOL = lexer.Pimitives.BOOL
+STR = lexer.Pimitives.STR
+
+_INTEGERS = (INT, BOOL)
+_NUMBERS = (INT, BOOL, FLOAT)
+_SCALARS = (INT, BOOL, FLOAT, STR)
+_python_types = {INT: "int", FLOAT: "float", BOOL: "bool", STR: "str"}
+
+# not given, like a missing argument
+_UNSET = typing.cast(typing.Any, object())
+
+# operators written as the python operator when the types of both values are known
+_python_operators = {
+    lexer.PLUS: "+",
+    lexer.MINUS: "-",
+    lexer.MUL: "*",
+    lexer.DIV: "/",
+    lexer.MOD: "%",
+    lexer.INTDIV: "//",
+    lexer.POW: "**",
+    lexer.BITOR: "|",
+    lexer.XOR: "^",
+    lexer.BITAND: "&",
+    lexer.SHIFTRIGHT: ">>",
+    lexer.SHIFTLEFT: "<<",
+    lexer.COMPARE: "==",
+    lexer.NOTCOMPARE: "!=",
+    lexer.BIGGEREQ: ">=",
+    lexer.SMALLEREQ: "<=",
+    lexer.BIGGER: ">",
+    lexer.SMALLER: "<",
+}
+
+_comparisons = (lexer.COMPARE, lexer.NOTCOMPARE, lexer.BIGGEREQ, lexer.SMALLEREQ, lexer.BIGGER, lexer.SMALLER)
+
+# type of the result of the interpreter operation, whatever the values are
+_result_kinds = {
+    lexer.OR: BOOL,
+    lexer.AND: BOOL,
+    lexer.BITOR: INT,
+    lexer.XOR: INT,
+    lexer.BITAND: INT,
+    lexer.SHIFTRIGHT: INT,
+    lexer.SHIFTLEFT: INT,
+    lexer.DIV: FLOAT,
+    lexer.MOD: INT,
+    lexer.INTDIV: INT,
+    **{operator: BOOL for operator in _comparisons},
+}
+
+# compound assignment to the binary operator
+_compound_operators = {
+    lexer.ASSIGNADD: lexer.PLUS,
+    lexer.ASSIGNSUB: lexer.MINUS,
+    lexer.ASSIGNMUL: lexer.MUL,
+    lexer.ASSIGNDIV: lexer.DIV,
+    lexer.ASSIGNREM: lexer.MOD,
+    lexer.ASSIGNBITAND: lexer.BITAND,
+    lexer.ASSIGNBITXOR: lexer.XOR,
+    lexer.ASSIGNBITOR: lexer.BITOR,
+    lexer.ASSIGNBITSHIFTR: lexer.SHIFTRIGHT,
+    lexer.ASSIGNBITSHIFTL: lexer.SHIFTLEFT,
+}
+
+
+def _wrap(code: str) -> str:
+    # same as the IntValue(..) 32 bit wrap around of the python int
+    return "(((%s + 2147483648) & 4294967295) - 2147483648)" % code
+
+
+# ---- runtime ---- #
+
+
+_boxes: dict[type, typing.Callable[[typing.Any], RuntimeValue]] = {
+    int: inter.IntValue,
+    float: inter.FloatValue,
+    bool: inter.BooleanValue,
+    str: inter.StringValue,
+}
+_unboxed = {inter.IntValue, inter.FloatValue, inter.BooleanValue, inter.StringValue, inter.NoneValue}
+
+
+def _box(value: typing.Any) -> RuntimeValue:
+    # the runtime value of a python value
+    if value is None:
+        return noneValueInstance
+    box = _boxes.get(type(value))
+    if box is None:
+        return value
+    return box(value)
+
+
+def _unbox(value: RuntimeValue) -> typing.Any:
+    # the python value of a runtime value, lists, objects and functions stay runtime values
+    if type(value) in _unboxed:
+        return value.value
+    return value
+
+
+def _value(value: typing.Any) -> typing.Any:
+    # like the .value of the runtime value
+    if isinstance(value, RuntimeValue):
+        return value.value
+    return value
+
+
+def _truth(value: typing.Any) -> bool:
+    return bool(_value(value))
+
+
+def _error(message: str, stmt: ast.Statement) -> typing.Any:
+    statement_error(message, stmt)
+
+
+def _fail(value: typing.Any, message: str, stmt: ast.Statement) -> typing.Any:
+    # the error after the value is evaluated
+    statement_error(message, stmt)
+
+
+def _lookup(env: Environment, name: str, stmt: ast.Statement) -> typing.Any:
+    while env is not None:
+        scope = env.scope
+        if name in scope:
+            value = scope[name]
+            if type(value) in _unboxed:
+                return value.value
+            return value
+        env = env.parent
+    statement_error("Variable '%s' is not defined." % name, stmt)
+
+
+def _declare(env: Environment, name: str, value: typing.Any, mutable: bool, stmt: ast.Statement) -> typing.Any:
+    env.declare_local(name, _box(value), mutable, stmt)
+    return value
+
+
+def _defined(value: typing.Any, name: str, stmt: ast.Statement) -> typing.Any:
+    statement_error("Variable '%s' is already defined." % name, stmt)
+
+
+def _store(env: Environment, name: str, value: typing.Any):
+    # a variable of the program goes back into the environment
+    if value is not _UNSET:
+        env.scope[name] = _box(value)
+
+
+def _assign_type(value: typing.Any, type: ast.Type) -> typing.Any:
+    return _unbox(inter._assign_Type(_value(value), type))
+
+
+def _same_type(value: typing.Any, old: typing.Any, name: str, stmt: ast.Statement) -> typing.Any:
+    if type(value) is not type(old):
+        statement_error("Variable assigned to '%s' must be of same type." % name, stmt)
+    return value
+
+
+def _not_mutable(value: typing.Any, name: str, stmt: ast.Statement) -> typing.Any:
+    statement_error("Variable '%s' is not mutable. Use '%s' keyword on declaration to make it mutable." % (name, lexer.MUT), stmt)
+
+
+def _assign_value(right: typing.Any, left: typing.Any) -> typing.Any:
+    boxed = _box(right)
+    return _unbox(inter._expression_find_type_everything(_box(left), boxed, boxed.value))
+
+
+def _assign(right: typing.Any, left: typing.Any, name: str, stmt: ast.Statement) -> typing.Any:
+    return _same_type(_assign_value(right, left), left, name, stmt)
+
+
+def _compound_value(left: typing.Any, right: typing.Any, operation: typing.Callable) -> typing.Any:
+    return _unbox(operation(_box(left), _box(right)))
+
+
+def _compound(left: typing.Any, right: typing.Any, operation: typing.Callable, name: str, stmt: ast.Statement) -> typing.Any:
+    return _same_type(_compound_value(left, right, operation), left, name, stmt)
+
+
+def _increment_value(value: typing.Any, step: int) -> typing.Any:
+    boxed = _box(value)
+    return _unbox(inter._expression_unary_find_type(boxed, boxed.value + step))
+
+
+def _increment(value: typing.Any, step: int, name: str, stmt: ast.Statement) -> typing.Any:
+    return _same_type(_increment_value(value, step), value, name, stmt)
+
+
+def _assign_env(env: Environment, name: str, right: typing.Any, stmt: ast.Statement) -> typing.Any:
+    boxed = _box(right)
+    left = env.lookup(name, stmt)
+    return _unbox(env.assign(name, inter._expression_find_type_everything(left, boxed, boxed.value), stmt))
+
+
+def _compound_env(env: Environment, name: str, right: typing.Any, operation: typing.Callable, stmt: ast.Statement) -> typing.Any:
+    boxed = _box(right)
+    return _unbox(env.assign(name, operation(env.lookup(name, stmt), boxed), stmt))
+
+
+def _increment_env(env: Environment, name: str, step: int, after: bool, stmt: ast.Statement) -> typing.Any:
+    original = env.lookup(name, stmt)
+    value = env.assign(name, inter._expression_unary_find_type(original, original.value + step), stmt)
+    return _unbox(original if after else value)
+
+
+def _binary(left: typing.Any, right: typing.Any, operation: typing.Callable, stmt: ast.Statement) -> typing.Any:
+    try:
+        return _unbox(operation(_box(left), _box(right)))
+    except TypeError as te:
+        statement_error('Interpreter type error "%s". Unable to resolve operation with given types.' % str(te), stmt)
+
+
+def _unary(value: typing.Any, operation: typing.Callable) -> typing.Any:
+    return _unbox(operation(_box(value)))
+
+
+def _or(left: typing.Any, right: typing.Any) -> bool:
+    # both values are evaluated like the interpreter does
+    return bool(_value(left) or _value(right))
+
+
+def _and(left: typing.Any, right: typing.Any) -> bool:
+    return bool(_value(left) and _value(right))
+
+
+def _member(object: typing.Any, key: typing.Any, stmt: ast.Statement) -> typing.Any:
+    object = _value(object)
+    key = _value(key)
+    if isinstance(object, dict):
+        if key in object:
+            return _unbox(object[key])
+        return None
+    if isinstance(object, list) and isinstance(key, int):
+        return _unbox(object[key])
+    statement_error("Incompatible Datatype in expression: %s%s%s%s" % (object, lexer.SQUARE_L, key, lexer.SQUARE_R), stmt)
+
+
+def _store_member(object: typing.Any, key: typing.Any, right: typing.Any, operation: typing.Callable | None) -> typing.Any:
+    object = _value(object)
+    key = _value(key)
+    left = object[key]
+    if operation is None:
+        object[key] = _box(right)
+    else:
+        object[key] = operation(left, _box(right))
+    return right
+
+
+def _list(*values: typing.Any) -> inter.ListValue:
+    return inter.ListValue([_box(value) for value in values])
+
+
+def _callable(function: typing.Any, stmt: ast.Statement) -> typing.Any:
+    # the interpreter checks the function before the arguments run
+    if not isinstance(function, (inter.NativeFunction, inter.RuntimeFunction)):
+        statement_error("Function type not implemented.", stmt)
+    return function
+
+
+def _call(function: typing.Any, arguments: list[typing.Any], env: Environment, stmt: ast.Statement) -> typing.Any:
+    # any call which is not to a transpiled function with matching arguments
+    if isinstance(function, inter.NativeFunction):
+        result = function.callback([_box(argument) for argument in arguments])
+        if result is None:  # native function might not return anything, fix this here.
+            return None
+        if not isinstance(result, RuntimeValue):
+            statement_error("Result of native function call is not of a runtime type.", stmt)
+        return _unbox(result)
+    if isinstance(function, inter.RuntimeFunction):
+        python = function.python or compile_function(function, env)
+        values = []
+        for param, argument in itertools.zip_longest(function.parameters, arguments, fillvalue=_UNSET):
+            if param is _UNSET:
+                statement_error("function does not have enough parameters.", stmt)
+            if argument is not _UNSET:
+                values.append(argument)
+            elif param.default is not None:
+                values.append(_unbox(param.default))
+            else:
+                statement_error("Either argument default or a value for argument must be provided", stmt)
+        return python(function, env, stmt, *values)
+    statement_error("Function type not implemented.", stmt)
+
+
+def _function(env: Environment, stmt: ast.FunctionDeclaration, python: typing.Callable, *defaults: typing.Any) -> inter.RuntimeFunction:
+    parameters = [inter.RuntimeFunctionParameter(param.mutable, param.type, param.identifier, None if default is _UNSET else _box(default))
+                  for param, default in zip(stmt.parameters, defaults)]
+    function = inter.RuntimeFunction(parameters, stmt.result, stmt.body, stmt)
+    function.python = python
+    return env.declare_global(stmt.identifier, function, True, stmt)
+
+
+def _for_values(minimum: typing.Any, maximum: typing.Any, loop_type: ast.Type, stmt: ast.ForExpression) -> typing.Iterator[typing.Any]:
+    # the values of the loop variable, checked like the interpreter assigns them
+    is_range_iterator = True
+    if minimum is _UNSET:
+        if isinstance(maximum, (int, float)) and not isinstance(maximum, bool):
+            iterator = range(maximum)  # type: ignore[arg-type]
+        elif isinstance(maximum, inter.ListValue):
+            iterator = maximum.value
+            is_range_iterator = False
+        else:
+            statement_error("For loop encountered incompatible type to iterate. Can only iterate Numbers and Lists.", stmt)
+    else:
+        iterator = range(_value(minimum), _value(maximum))
+    expected = inter._assign_Type(0, loop_type)
+    return _for_checked(iterator, is_range_iterator, expected, loop_type, stmt)
+
+
+def _for_checked(iterator: typing.Iterable, is_range_iterator: bool, expected: RuntimeValue, loop_type: ast.Type, stmt: ast.ForExpression) -> typing.Iterator[typing.Any]:
+    for i in iterator:
+        if is_range_iterator:
+            if not isinstance(expected, inter.IntValue):
+                statement_error("Variable assigned to '%s' must be of same type." % stmt.identifier, stmt)
+            yield i
+        else:
+            if type(i) is not type(expected):
+                statement_error("Variable assigned to '%s' must be of same type." % stmt.identifier, stmt)
+            yield _unbox(inter._assign_Type(i.value, loop_type))
+
+
+def _for_declare(env: Environment, loop_type: ast.Type, stmt: ast.ForExpression) -> Environment:
+    scope = Environment(env)
+    scope.declare_local(stmt.identifier, inter._assign_Type(0, loop_type), True, stmt)
+    return scope
+
+
+def _shebang(stmt: ast.ShebangExpression, env: Environment):
+    inter.interpret_shebang_expression(stmt, env)
+
+
+def _is_script(env: Environment) -> bool:
+    return env.get_root_env().is_script
+
+
+def _interpret(stmt: ast.Statement, env: Environment) -> typing.Any:
+    return _unbox(inter.interpret(stmt, env))
+
+
+_runtime = {
+    "_box": _box,
+    "_unbox": _unbox,
+    "_truth": _truth,
+    "_error": _error,
+    "_fail": _fail,
+    "_lookup": _lookup,
+    "_declare": _declare,
+    "_defined": _defined,
+    "_store": _store,
+    "_assign_type": _assign_type,
+    "_same_type": _same_type,
+    "_not_mutable": _not_mutable,
+    "_assign_value": _assign_value,
+    "_assign": _assign,
+    "_compound_value": _compound_value,
+    "_compound": _compound,
+    "_increment_value": _increment_value,
+    "_increment": _increment,
+    "_assign_env": _assign_env,
+    "_compound_env": _compound_env,
+    "_increment_env": _increment_env,
+    "_binary": _binary,
+    "_unary": _unary,
+    "_or": _or,
+    "_and": _and,
+    "_member": _member,
+    "_store_member": _store_member,
+    "_list": _list,
+    "_call": _call,
+    "_callable": _callable,
+    "_function": _function,
+    "_for_values": _for_values,
+    "_for_declare": _for_declare,
+    "_shebang": _shebang,
+    "_is_script": _is_script,
+    "_interpret": _interpret,
+    "_UNSET": _UNSET,
+    "_Environment": Environment,
+    "_RuntimeFunction": inter.RuntimeFunction,
+    "_ObjectValue": inter.ObjectValue,
+    "_FloatValue": inter.FloatValue,
+    "_BooleanValue": inter.BooleanValue,
+    "_StringValue": inter.StringValue,
+    "_IntValue": inter.IntValue,
+}
+
+# the runtime value of a python value of known type
+_box_functions = {INT: "_IntValue", FLOAT: "_FloatValue", BOOL: "_BooleanValue", STR: "_StringValue"}
+
+
+# ---- names kept in the environment ---- #
+
+
+class _Names:
+    # the names used by a function without declaring them and the deleted names.
+    # The scopes are the sets of names declared by the blocks of the function.
+    def __init__(self):
+        self.free: set[str] = set()
+        self.deleted: set[str] = set()
+
+    def function(self, parameters: list[typing.Any], body: ast.BlockStatement):
+        self.scan(body, [set(param.identifier for param in parameters)])
+
+    def use(self, name: str, scopes: list[set[str]] | None):
+        if scopes is not None and not any(name in scope for scope in scopes):
+            self.free.add(name)
+
+    def scan(self, node: ast.Statement, scopes: list[set[str]] | None):
+        # scopes is None outside of a function
+        if isinstance(node, ast.Identifier):
+            self.use(node.symbol, scopes)
+        elif isinstance(node, ast.VariableDeclaration):
+            self.scan(node.value, scopes)
+            if scopes is not None:
+                scopes[-1].add(node.identifier)
+        elif isinstance(node, ast.BlockStatement):
+            inner = None if scopes is None else scopes + [set()]
+            for statement in node.body:
+                self.scan(statement, inner)
+        elif isinstance(node, ast.ForExpression):
+            if node.quantity_min:
+                self.scan(node.quantity_min, scopes)
+            self.scan(node.quantity_max, scopes)
+            self.scan(node.body, None if scopes is None else scopes + [{node.identifier}])
+        elif isinstance(node, ast.FunctionDeclaration):
+            for param in node.parameters:
+                if param.default:
+                    self.scan(param.default, scopes)
+            self.function(node.parameters, node.body)
+        elif isinstance(node, ast.AssignmentExpression):
+            if isinstance(node.assignee, ast.Identifier):
+                self.use(node.assignee.symbol, scopes)
+            else:
+                self.scan(node.assignee, scopes)
+            self.scan(node.value, scopes)
+        elif isinstance(node, (ast.UnaryIdentifierBeforeExpression, ast.UnaryIdentifierAfterExpression)):
+            self.use(node.identifier, scopes)
+        elif isinstance(node, ast.DeleteExpression):
+            self.deleted.add(node.identifier)
+            self.use(node.identifier, scopes)
+        elif isinstance(node, ast.MemberExpression):
+            self.scan(node.object, scopes)
+            if not isinstance(node.key, ast.Identifier):
+                self.scan(node.key, scopes)
+        elif isinstance(node, ast.ObjectLiteral):
+            for property in node.properties:
+                if property.value:
+                    self.scan(property.value, scopes)
+                else:
+                    self.use(property.key, scopes)
+        else:
+            for child in ast.iter_children(node):
+                self.scan(child, scopes)
+
+
+def _environment_names(node: ast.Statement | None, env: Environment | None) -> set[str]:
+    # the names which stay in the environment: used by a function of the program or
+    # the environment without a declaration, or deleted.
+    names = _Names()
+    if node is not None:
+        names.scan(node, None)
+    while env is not None:
+        for value in env.scope.values():
+            if isinstance(value, inter.RuntimeFunction):
+                names.function(value.parameters, value.body)
+        env = env.parent
+    return names.free | names.deleted | {"main"}
+
+
+class _Contains(ast.NodeVisitor):
+    # finds a node of the classes in a function body, not in the functions declared by it
+    def __init__(self, classes: tuple[type, ...]):
+        super().__init__()
+        self.classes = classes
+        self.found = False
+
+    def generic_visit(self, node):
+        if isinstance(node, self.classes):
+            self.found = True
+        if isinstance(node, ast.FunctionDeclaration):
+            return False
+
+
+def _contains(node: ast.Statement, *classes: type) -> bool:
+    finder = _Contains(classes)
+    for child in ast.iter_children(node):
+        finder.visit(child)
+    return finder.found
+
+
+# ---- python source ---- #
+
+
+class _Variable:
+    __slots__ = ("python", "mutable", "kind")
+
+    def __init__(self, python: str | None, mutable: bool, kind: str | None):
+        self.python = python  # name of the python local, None if it is in the environment
+        self.mutable = mutable
+        self.kind = kind  # type of the value if known, see _SCALARS
+
+
+class _Scope:
+    # the variables declared by a block. The scope of a function has no parent.
+    def __init__(self, parent: "_Scope | None" = None):
+        self.parent = parent
+        self.variables: dict[str, _Variable] = {}
+
+    def find(self, name: str) -> _Variable | None:
+        scope: _Scope | None = self
+        while scope is not None:
+            if name in scope.variables:
+                return scope.variables[name]
+            scope = scope.parent
+        return None
+
+
+class _Writer:
+    # the lines of a python function and the flolang statement of every line
+    def __init__(self):
+        self.lines: list[str] = []
+        self.statements: list[ast.Statement] = []
+        self.indent = 0
+        self.loops = 0
+
+
+class Transpiler:
+    # writes the python source of a program or a function. 'names' are the names which
+    # stay in the environment, see _environment_names(..).
+    def __init__(self, names: set[str]):
+        self.names = names
+        self.namespace: dict[str, typing.Any] = dict(_runtime)
+        self.constants: dict[int, str] = {}
+        self.functions: dict[int, str] = {}
+        self.pending: list[tuple[str, ast.FunctionDeclaration]] = []
+        self.done: list[_Writer] = []
+        self.writer = _Writer()
+        self.statement_node: ast.Statement = ast.Statement()
+        self.counter = 0
+        self.is_function = False
+        self.program: ast.Statement = ast.Statement()
+        self.mirrors: list[tuple[str, str]] = []
+
+    # -- helpers -- #
+
+    def line(self, text: str):
+        self.writer.lines.append("    " * self.writer.indent + text)
+        self.writer.statements.append(self.statement_node)
+
+    def unique(self, name: str) -> str:
+        self.counter += 1
+        return "%s_%d" % (name, self.counter)
+
+    def constant(self, value: typing.Any) -> str:
+        # name of a value in the namespace of the python code
+        key = id(value)
+        if key not in self.constants:
+            self.constants[key] = self.unique("_c")
+            self.namespace[self.constants[key]] = value
+        return self.constants[key]
+
+    def function_name(self, stmt: ast.FunctionDeclaration) -> str:
+        key = id(stmt)
+        if key not in self.functions:
+            self.functions[key] = self.unique("_function_" + stmt.identifier)
+            self.pending.append((self.functions[key], stmt))
+        return self.functions[key]
+
+    def source(self) -> tuple[str, list[ast.Statement]]:
+        lines: list[str] = []
+        statements: list[ast.Statement] = []
+        for writer in self.done:
+            lines += writer.lines
+            statements += writer.statements
+        return "\n".join(lines) + "\n", statements
+
+    def compile(self, filename: str) -> dict[str, typing.Any]:
+        # the python code has the line numbers of the flolang statements
+        source, statements = self.source()
+        tree = pyast.parse(source, filename)
+        for node in pyast.walk(tree):
+            if hasattr(node, "lineno"):
+                line_nr = _line_number(statements[node.lineno - 1])
+                node.lineno = node.end_lineno = line_nr  # type: ignore[attr-defined]
+                node.col_offset = node.end_col_offset = 0  # type: ignore[attr-defined]
+        exec(compile(tree, filename, "exec"), self.namespace)
+        return self.namespace
+
+    # -- statements -- #
+
+    def statement(self, stmt: ast.Statement, scope: _Scope, target: str | None = None):
+        # target is the python variable which gets the value of the statement
+        previous = self.statement_node
+        if stmt.loc.start is not None:
+            self.statement_node = stmt
+        try:
+            method = _statements[type(stmt)]
+        except KeyError:
+            method = _find_method(_statements, type(stmt), Transpiler.statement_expression)
+        method(self, stmt, scope, target)
+        self.statement_node = previous
+
+    def statement_expression(self, stmt: ast.Statement, scope: _Scope, target: str | None):
+        code, kind = self.expression(stmt, scope)
+        if target:
+            self.line("%s = %s" % (target, code))
+        else:
+            self.line(code)
+
+    def statement_none(self, target: str | None):
+        if target:
+            self.line("%s = None" % target)
+
+    def block(self, stmt: ast.BlockStatement, scope: _Scope):
+        # the variables of the block are python locals, or in a new environment
+        inner = _Scope(scope)
+        in_environment = any(isinstance(s, ast.VariableDeclaration) and s.identifier in self.names for s in stmt.body)
+        count = len(self.writer.lines)
+        if in_environment:
+            saved = self.unique("_env")
+            self.line("%s = env" % saved)
+            self.line("env = _Environment(env)")
+            self.line("try:")
+            self.writer.indent += 1
+        for statement in stmt.body:
+            self.statement(statement, inner)
+        if in_environment:
+            self.writer.indent -= 1
+            self.line("finally:")
+            self.line("    env = %s" % saved)
+        elif len(self.writer.lines) == count:
+            self.line("pass")
+
+    def statement_block(self, stmt: ast.BlockStatement, scope: _Scope, target: str | None):
+        self.block(stmt, scope)
+        self.statement_none(target)
+
+    def convert(self, code: str, kind: str | None, type: ast.Type) -> tuple[str, str | None]:
+        # the value of a declaration with a type, like interpreter._assign_Type(..)
+        type_id = type.type
+        if kind not in _SCALARS or type_id not in _SCALARS:
+            return "_assign_type(%s, %s)" % (code, self.constant(type)), type_id if type_id in _SCALARS else None
+        if kind == type_id:
+            return code, kind
+        if type_id == INT:
+            return _wrap("int(%s)" % code), INT
+        return "%s(%s)" % (_python_types[type_id], code), type_id
+
+    def statement_variable_declaration(self, stmt: ast.VariableDeclaration, scope: _Scope, target: str | None):
+        code, kind = self.expression(stmt.value, scope)
+        if stmt.type:
+            code, kind = self.convert(code, kind, stmt.type)
+        name = stmt.identifier
+        node = self.constant(stmt)
+        if name in self.names or (scope.parent is None and not self.is_function):
+            declare = "_declare(env, %r, %s, %r, %s)" % (name, code, stmt.mutable, node)
+            if name in self.names:
+                scope.variables[name] = _Variable(None, stmt.mutable, kind)
+                self.line("%s = %s" % (target, declare) if target else declare)
+                return
+            # a variable of the program is declared in the environment for the checks,
+            # the value is copied into it when the program ends.
+            python = self.unique(name)
+            scope.variables[name] = _Variable(python, stmt.mutable, kind)
+            if stmt.mutable:
+                self.mirrors.append((name, python))
+            self.line("%s = %s" % (python, declare))
+        elif name in scope.variables:
+            self.line("_defined(%s, %r, %s)" % (code, name, node))
+            return
+        else:
+            python = self.unique(name)
+            scope.variables[name] = _Variable(python, stmt.mutable, kind)
+            self.line("%s = %s" % (python, code))
+        if target:
+            self.line("%s = %s" % (target, python))
+
+    def statement_function_declaration(self, stmt: ast.FunctionDeclaration, scope: _Scope, target: str | None):
+        defaults = [self.expression(param.default, scope)[0] if param.default else "_UNSET" for param in stmt.parameters]
+        code = "_function(%s)" % ", ".join(["env", self.constant(stmt), self.function_name(stmt)] + defaults)
+        self.line("%s = %s" % (target, code) if target else code)
+
+    def statement_if_expression(self, stmt: ast.IfExpression, scope: _Scope, target: str | None):
+        self.line("if %s:" % self.condition(stmt.test, scope))
+        self.indented_block(stmt.consequent, scope)
+        alternate = stmt.alternate
+        while isinstance(alternate, ast.IfExpression):
+            self.line("elif %s:" % self.condition(alternate.test, scope))
+            self.indented_block(alternate.consequent, scope)
+            alternate = alternate.alternate
+        if alternate is not None:
+            self.line("else:")
+            self.writer.indent += 1
+            self.statement(alternate, scope)
+            self.writer.indent -= 1
+        self.statement_none(target)
+
+    def indented_block(self, stmt: ast.BlockStatement, scope: _Scope):
+        self.writer.indent += 1
+        self.block(stmt, scope)
+        self.writer.indent -= 1
+
+    def statement_while_expression(self, stmt: ast.WhileExpression, scope: _Scope, target: str | None):
+        self.line("while %s:" % self.condition(stmt.condition, scope))
+        self.writer.loops += 1
+        self.indented_block(stmt.body, scope)
+        self.writer.loops -= 1
+        self.statement_none(target)
+
+    def statement_for_expression(self, stmt: ast.ForExpression, scope: _Scope, target: str | None):
+        type = stmt.type or _int_type
+        maximum, maximum_kind = self.expression(stmt.quantity_max, scope)
+        minimum, minimum_kind = "_UNSET", None
+        if stmt.quantity_min:
+            minimum, minimum_kind = self.expression(stmt.quantity_min, scope)
+        if type.type == INT and maximum_kind == INT and (not stmt.quantity_min or minimum_kind == INT):
+            iterator = "range(%s)" % maximum if not stmt.quantity_min else "range(%s, %s)" % (minimum, maximum)
+        else:
+            iterator = "_for_values(%s, %s, %s, %s)" % (minimum, maximum, self.constant(type), self.constant(stmt))
+        kind = type.type if type.type in _SCALARS else None
+        inner = _Scope(scope)
+        name = stmt.identifier
+        self.writer.loops += 1
+        if name not in self.names:
+            python = self.unique(name)
+            inner.variables[name] = _Variable(python, True, kind)
+            self.line("for %s in %s:" % (python, iterator))
+            self.indented_block(stmt.body, inner)
+        else:
+            # the loop variable is in an environment of the loop
+            inner.variables[name] = _Variable(None, True, kind)
+            saved = self.unique("_env")
+            value = self.unique("_i")
+            values = self.unique("_values")
+            self.line("%s = %s" % (values, iterator))
+            self.line("%s = env" % saved)
+            self.line("env = _for_declare(env, %s, %s)" % (self.constant(type), self.constant(stmt)))
+            self.line("try:")
+            self.line("    for %s in %s:" % (value, values))
+            self.line("        env.assign(%r, _box(%s), %s, True)" % (name, value, self.constant(stmt)))
+            self.writer.indent += 1
+            self.indented_block(stmt.body, inner)
+            self.writer.indent -= 1
+            self.line("finally:")
+            self.line("    env = %s" % saved)
+        self.writer.loops -= 1
+        self.statement_none(target)
+
+    def statement_return_expression(self, stmt: ast.ReturnExpression, scope: _Scope, target: str | None):
+        code = self.expression(stmt.value, scope)[0] if stmt.value else "None"
+        if self.is_function:
+            self.line("return %s" % code)
+        else:
+            message = "Expression '%s' is not allowed outside function." % lexer.RETURN
+            self.line("_fail(%s, %r, %s)" % (code, message, self.constant(self.program)))
+
+    def jump(self, keyword: str):
+        if self.writer.loops:
+            self.line(keyword)
+            return
+        # the error is at the call of the function, or at the program
+        message = "Expression '%s' is not allowed outside loop." % keyword
+        self.line("_error(%r, %s)" % (message, "call" if self.is_function else self.constant(self.program)))
+
+    def statement_break_expression(self, stmt: ast.BreakExpression, scope: _Scope, target: str | None):
+        self.jump(lexer.BREAK)
+
+    def statement_continue_expression(self, stmt: ast.ContinueExpression, scope: _Scope, target: str | None):
+        self.jump(lexer.CONTINUE)
+
+    def statement_delete_expression(self, stmt: ast.DeleteExpression, scope: _Scope, target: str | None):
+        self.line("env.delete(%r, %s)" % (stmt.identifier, self.constant(stmt)))
+        self.statement_none(target)
+
+    def statement_assignment_expression(self, stmt: ast.AssignmentExpression, scope: _Scope, target: str | None):
+        python, code, kind = self.assignment(stmt, scope)
+        if python:
+            self.line("%s = %s" % (python, code))
+            if target:
+                self.line("%s = %s" % (target, python))
+        else:
+            self.line("%s = %s" % (target, code) if target else code)
+
+    def statement_increment(self, stmt: ast.UnaryIdentifierBeforeExpression | ast.UnaryIdentifierAfterExpression, scope: _Scope, target: str | None):
+        variable = scope.find(stmt.identifier)
+        if target or variable is None or variable.python is None or not variable.mutable:
+            self.statement_expression(stmt, scope, target)
+            return
+        self.line("%s = %s" % (variable.python, self.increment(stmt, variable)))
+
+    # -- expressions -- #
+
+    def expression(self, stmt: ast.Statement, scope: _Scope) -> tuple[str, str | None]:
+        # the python expression and the type of its value if known
+        try:
+            method = _expressions[type(stmt)]
+        except KeyError:
+            method = _find_method(_expressions, type(stmt), Transpiler.expression_unknown)
+        return method(self, stmt, scope)
+
+    def expression_unknown(self, stmt: ast.Statement, scope: _Scope) -> tuple[str, str | None]:
+        # the interpreter runs it, or gives the error
+        return "_interpret(%s, env)" % self.constant(stmt), None
+
+    def condition(self, stmt: ast.Statement, scope: _Scope) -> str:
+        code, kind = self.expression(stmt, scope)
+        if kind in _SCALARS:
+            return code
+        return "_truth(%s)" % code
+
+    def expression_numeric_literal(self, stmt: ast.NumericLiteral, scope: _Scope) -> tuple[str, str | None]:
+        value = inter.IntValue(stmt.value).value
+        return repr(value) if value >= 0 else "(%r)" % value, INT
+
+    def expression_float_literal(self, stmt: ast.FloatLiteral, scope: _Scope) -> tuple[str, str | None]:
+        return self.constant(inter.FloatValue(stmt.value).value), FLOAT
+
+    def expression_string_literal(self, stmt: ast.StringLiteral, scope: _Scope) -> tuple[str, str | None]:
+        return repr(str(stmt.value)), STR
+
+    def expression_identifier(self, stmt: ast.Identifier, scope: _Scope) -> tuple[str, str | None]:
+        variable = scope.find(stmt.symbol)
+        if variable is None or variable.python is None:
+            return "_lookup(env, %r, %s)" % (stmt.symbol, self.constant(stmt)), None
+        return variable.python, variable.kind
+
+    def is_simple(self, stmt: ast.Statement, scope: _Scope) -> bool:
+        # evaluating it has no effect and gives no error
+        if isinstance(stmt, (ast.NumericLiteral, ast.FloatLiteral, ast.StringLiteral)):
+            return True
+        if isinstance(stmt, ast.Identifier):
+            variable = scope.find(stmt.symbol)
+            return variable is not None and variable.python is not None
+        return False
+
+    def expression_binary_expression(self, stmt: ast.BinaryExpression, scope: _Scope) -> tuple[str, str | None]:
+        left, left_kind = self.expression(stmt.left, scope)
+        right, right_kind = self.expression(stmt.right, scope)
+        operator = stmt.operator
+        operation = inter._binary_operations.get(operator)
+        if operation is None:
+            return "_fail((%s, %s), 'Did not found a operation for this expression.', %s)" % (left, right, self.constant(stmt)), None
+        code = self.binary(operator, left, left_kind, right, right_kind)
+        if code:
+            return code
+        if operator in (lexer.OR, lexer.AND):
+            if left_kind in _SCALARS and right_kind in _SCALARS and self.is_simple(stmt.right, scope):
+                return "bool(%s %s %s)" % (left, operator, right), BOOL
+            return "_%s(%s, %s)" % (operator, left, right), BOOL
+        generic = "_binary(%s, %s, %s, %s)" % (left, right, self.constant(operation), self.constant(stmt))
+        return generic, _result_kinds.get(operator)
+
+    def binary(self, operator: str, left: str, left_kind: str | None, right: str, right_kind: str | None) -> tuple[str, str | None] | None:
+        # the python expression if the types allow it
+        symbol = _python_operators.get(operator)
+        if symbol is None:
+            return None
+        code = "(%s %s %s)" % (left, symbol, right)
+        integers = left_kind in _INTEGERS and right_kind in _INTEGERS
+        numbers = left_kind in _NUMBERS and right_kind in _NUMBERS
+        if operator in _comparisons:
+            if numbers or (left_kind == STR and right_kind == STR):
+                return code, BOOL
+            if operator in (lexer.COMPARE, lexer.NOTCOMPARE) and left_kind in _SCALARS and right_kind in _SCALARS:
+                return code, BOOL
+            return None
+        if operator in (lexer.PLUS, lexer.MINUS, lexer.MUL):
+            if integers:
+                return _wrap(code), INT
+            if numbers:
+                return code, FLOAT
+            if operator == lexer.PLUS and left_kind == STR and right_kind == STR:
+                return code, STR
+            return None
+        if operator == lexer.DIV:
+            return (code, FLOAT) if numbers else None
+        if not integers:
+            return None
+        if operator == lexer.POW:
+            return _wrap("int(%s)" % code), INT
+        if operator in (lexer.MOD, lexer.SHIFTRIGHT) or (left_kind == INT and right_kind == INT and operator in (lexer.BITOR, lexer.XOR, lexer.BITAND)):
+            # the result is in the range of a 32 bit int
+            return code, INT
+        return _wrap(code), INT
+
+    def expression_unary_before_expression(self, stmt: ast.UnaryBeforeExpression, scope: _Scope) -> tuple[str, str | None]:
+        code, kind = self.expression(stmt.expr, scope)
+        operator = stmt.operator
+        operation = inter._unary_operations.get(operator)
+        if operation is None:
+            return "_fail(%s, %r, %s)" % (code, "Statement operator invalid '%s' for unary." % operator, self.constant(stmt)), None
+        if operator == lexer.PLUS:
+            return code, kind
+        if operator == lexer.NOT:
+            if kind in _SCALARS:
+                return "(not %s)" % code, BOOL
+            return "(not _truth(%s))" % code, BOOL
+        if operator == lexer.BITNOT and kind in _INTEGERS:
+            return "(~%s)" % code, INT
+        if operator == lexer.MINUS:
+            if kind == INT:
+                return _wrap("-%s" % code), INT
+            if kind in (BOOL, FLOAT):
+                return "(-%s)" % code, INT if kind == BOOL else FLOAT
+        return "_unary(%s, %s)" % (code, self.constant(operation)), INT if operator == lexer.BITNOT else None
+
+    def increment(self, stmt: ast.UnaryIdentifierBeforeExpression | ast.UnaryIdentifierAfterExpression, variable: _Variable) -> str:
+        # the new value of the mutable python local
+        step = _increment_steps[stmt.operator]
+        if variable.kind == INT:
+            return _wrap("%s + %d" % (variable.python, step))
+        if variable.kind == FLOAT:
+            return "(%s + %d)" % (variable.python, step)
+        return "_increment(%s, %d, %r, %s)" % (variable.python, step, stmt.identifier, self.constant(stmt))
+
+    def expression_increment(self, stmt: ast.UnaryIdentifierBeforeExpression | ast.UnaryIdentifierAfterExpression, scope: _Scope) -> tuple[str, str | None]:
+        after = isinstance(stmt, ast.UnaryIdentifierAfterExpression)
+        node = self.constant(stmt)
+        if stmt.operator not in _increment_steps:
+            message = "Statement operator invalid '%s' for unary%s." % (stmt.operator, " post expression" if after else "")
+            return "_error(%r, %s)" % (message, node), None
+        variable = scope.find(stmt.identifier)
+        if variable is None or variable.python is None:
+            return "_increment_env(env, %r, %d, %r, %s)" % (stmt.identifier, _increment_steps[stmt.operator], after, node), None
+        kind = variable.kind if variable.kind in (INT, FLOAT) else None
+        if not variable.mutable:
+            value = "_increment_value(%s, %d)" % (variable.python, _increment_steps[stmt.operator])
+            return "_not_mutable(%s, %r, %s)" % (value, stmt.identifier, node), None
+        if after:
+            return "(%s, (%s := %s))[0]" % (variable.python, variable.python, self.increment(stmt, variable)), kind
+        return "(%s := %s)" % (variable.python, self.increment(stmt, variable)), kind
+
+    def assignment(self, stmt: ast.AssignmentExpression, scope: _Scope) -> tuple[str | None, str, str | None]:
+        # the python local which gets the value and the value. Without a local the value
+        # expression does the assignment.
+        node = self.constant(stmt)
+        operator = stmt.operator
+        if isinstance(stmt.assignee, ast.MemberExpression):
+            object = self.expression(stmt.assignee.object, scope)[0]
+            key = self.member_key(stmt.assignee, scope)
+            right = self.expression(stmt.value, scope)[0]
+            if operator is lexer.ASSIGN:
+                return None, "_store_member(%s, %s, %s, None)" % (object, key, right), None
+            member_operation = inter._assignment_operations.get(operator)
+            if member_operation is None:
+                return None, "_fail((%s, %s, %s), %r, %s)" % (object, key, right, "Statement operator invalid '%s'." % operator, node), None
+            return None, "_store_member(%s, %s, %s, %s)" % (object, key, right, self.constant(member_operation)), None
+        if not isinstance(stmt.assignee, ast.Identifier):
+            return None, "None", None
+        name = stmt.assignee.symbol
+        right, right_kind = self.expression(stmt.value, scope)
+        operation = inter._assignment_operations.get(operator)
+        if operator is not lexer.ASSIGN and operation is None:
+            return None, "_fail(%s, %r, %s)" % (right, "Statement operator invalid '%s'." % operator, node), None
+        variable = scope.find(name)
+        if variable is None or variable.python is None:
+            if operator is lexer.ASSIGN:
+                return None, "_assign_env(env, %r, %s, %s)" % (name, right, node), None
+            return None, "_compound_env(env, %r, %s, %s, %s)" % (name, right, self.constant(operation), node), None
+        left, left_kind = variable.python, variable.kind
+        if not variable.mutable:
+            if operator is lexer.ASSIGN:
+                value = "_assign_value(%s, %s)" % (right, left)
+            else:
+                value = "_compound_value(%s, %s, %s)" % (left, right, self.constant(operation))
+            return None, "_not_mutable(%s, %r, %s)" % (value, name, node), None
+        if operator is lexer.ASSIGN:
+            code = self.assign_inline(left_kind, right, right_kind)
+            if code is None:
+                code = "_assign(%s, %s, %r, %s)" % (right, left, name, node)
+        else:
+            code = self.compound_inline(operator, left, left_kind, right, right_kind)
+            if code is None:
+                code = "_compound(%s, %s, %s, %r, %s)" % (left, right, self.constant(operation), name, node)
+        return left, code, left_kind
+
+    def assign_inline(self, left_kind: str | None, right: str, right_kind: str | None) -> str | None:
+        # interpreter._expression_find_type_everything(..) and the type check when the
+        # result is of the type of the variable
+        if left_kind == INT and right_kind == INT:
+            return right
+        if left_kind == INT and right_kind == BOOL:
+            return "int(%s)" % right
+        if left_kind == FLOAT and right_kind in _NUMBERS:
+            return right if right_kind == FLOAT else "float(%s)" % right
+        if left_kind == STR and right_kind == STR:
+            return right
+        return None
+
+    def compound_inline(self, operator: str, left: str, left_kind: str | None, right: str, right_kind: str | None) -> str | None:
+        binary = _compound_operators[operator]
+        if left_kind == INT and right_kind in _INTEGERS:
+            if binary == lexer.DIV:
+                return _wrap("int(%s / %s)" % (left, right))
+            code = self.binary(binary, left, INT, right, right_kind)
+            return code[0] if code else None
+        if left_kind == FLOAT and right_kind in _NUMBERS and binary in (lexer.PLUS, lexer.MINUS, lexer.MUL, lexer.DIV):
+            return "(%s %s %s)" % (left, _python_operators[binary], right)
+        return None
+
+    def expression_assignment_expression(self, stmt: ast.AssignmentExpression, scope: _Scope) -> tuple[str, str | None]:
+        python, code, kind = self.assignment(stmt, scope)
+        if python:
+            return "(%s := %s)" % (python, code), kind
+        return code, kind
+
+    def member_key(self, stmt: ast.MemberExpression, scope: _Scope) -> str:
+        if isinstance(stmt.key, ast.Identifier):
+            return repr(stmt.key.symbol)
+        return self.expression(stmt.key, scope)[0]
+
+    def expression_member_expression(self, stmt: ast.MemberExpression, scope: _Scope) -> tuple[str, str | None]:
+        object = self.expression(stmt.object, scope)[0]
+        return "_member(%s, %s, %s)" % (object, self.member_key(stmt, scope), self.constant(stmt)), None
+
+    def expression_call_expression(self, stmt: ast.CallExpression, scope: _Scope) -> tuple[str, str | None]:
+        # a transpiled function with the right number of arguments is called directly
+        caller = self.expression(stmt.caller, scope)[0]
+        arguments = [self.expression(argument, scope)[0] for argument in stmt.arguments]
+        function = self.unique("_f")
+        node = self.constant(stmt)
+        direct = "%s.python(%s)" % (function, ", ".join([function, "env", node] + arguments))
+        if all(isinstance(argument, (ast.NumericLiteral, ast.FloatLiteral, ast.StringLiteral)) for argument in stmt.arguments):
+            generic = "_call(%s, [%s], env, %s)" % (function, ", ".join(arguments), node)
+        else:
+            generic = "_call(_callable(%s, %s), [%s], env, %s)" % (function, node, ", ".join(arguments), node)
+        test = "type(%s := %s) is _RuntimeFunction and %s.python is not None and len(%s.parameters) == %d" % (function, caller, function, function, len(arguments))
+        return "(%s if %s else %s)" % (direct, test, generic), None
+
+    def expression_inlined_call_expression(self, stmt: ast.InlinedCallExpression, scope: _Scope) -> tuple[str, str | None]:
+        # the inlined expression while the caller still finds the function it was taken from
+        caller = self.expression(stmt.call.caller, scope)[0]
+        expression = self.expression(stmt.expression, scope)[0]
+        call = self.expression(stmt.call, scope)[0]
+        function = self.unique("_f")
+        test = "type(%s := %s) is _RuntimeFunction and %s.declaration is %s" % (function, caller, function, self.constant(stmt._declaration))
+        return "(%s if %s else %s)" % (expression, test, call), None
+
+    def expression_elvis_expression(self, stmt: ast.ElvisExpression, scope: _Scope) -> tuple[str, str | None]:
+        test = self.condition(stmt.test, scope)
+        consequent, consequent_kind = self.expression(stmt.consequent, scope)
+        alternate, alternate_kind = self.expression(stmt.alternate, scope)
+        kind = consequent_kind if consequent_kind == alternate_kind else None
+        return "(%s if %s else %s)" % (consequent, test, alternate), kind
+
+    def boxed(self, stmt: ast.Statement, scope: _Scope) -> str:
+        code, kind = self.expression(stmt, scope)
+        if kind in _box_functions:
+            return "%s(%s)" % (_box_functions[kind], code)
+        return "_box(%s)" % code
+
+    def expression_list_literal(self, stmt: ast.ListLiteral, scope: _Scope) -> tuple[str, str | None]:
+        return "_list(%s)" % ", ".join(self.expression(value, scope)[0] for value in stmt.values), None
+
+    def expression_object_literal(self, stmt: ast.ObjectLiteral, scope: _Scope) -> tuple[str, str | None]:
+        properties = []
+        for property in stmt.properties:
+            if property.value:
+                value = self.boxed(property.value, scope)
+            else:
+                variable = scope.find(property.key)
+                if variable is None or variable.python is None:
+                    value = "env.lookup(%r, %s)" % (property.key, self.constant(stmt))
+                else:
+                    value = "_box(%s)" % variable.python
+            properties.append("%r: %s" % (property.key, value))
+        return "_ObjectValue({%s})" % ", ".join(properties), None
+
+    def expression_unreachable_expression(self, stmt: ast.UnreachableExpression, scope: _Scope) -> tuple[str, str | None]:
+        return "_error('Reached unreachable expression.', %s)" % self.constant(stmt), None
+
+    # -- functions and programs -- #
+
+    def write_pending(self):
+        while self.pending:
+            name, stmt = self.pending.pop(0)
+            self.write_function(name, stmt.parameters, stmt.body)
+
+    def write_function(self, name: str, parameters: list[typing.Any], body: ast.BlockStatement):
+        # def name(function, env, call, <parameters>). call is the call expression of the errors.
+        self.writer = _Writer()
+        self.is_function = True
+        self.statement_node = body
+        scope = _Scope()
+        python_parameters = []
+        # a name of more than one parameter is declared in the environment, the second one fails
+        identifiers = [param.identifier for param in parameters]
+        in_env = self.names | {identifier for identifier in identifiers if identifiers.count(identifier) > 1}
+        for param in parameters:
+            python = self.unique(param.identifier)
+            python_parameters.append(python)
+            scope.variables[param.identifier] = _Variable(python if param.identifier not in in_env else None, param.mutable, None)
+        self.line("def %s(%s):" % (name, ", ".join(["function", "env", "call"] + python_parameters)))
+        self.writer.indent += 1
+        if any(param.identifier in in_env for param in parameters) or _contains(body, ast.FunctionDeclaration):
+            self.line("env = _Environment(env, function)")
+            for param, python in zip(parameters, python_parameters):
+                if param.identifier in in_env:
+                    self.line("_declare(env, %r, %s, %r, call)" % (param.identifier, python, param.mutable))
+        typed = [(python, param.type.type) for param, python in zip(parameters, python_parameters)
+                 if scope.variables[param.identifier].python and param.type and param.type.type in _SCALARS and not param.type.is_array]
+        if typed:
+            # the parameters have the declared types, the operations are inline
+            self.line("if %s:" % " and ".join("type(%s) is %s" % (python, _python_types[kind]) for python, kind in typed))
+            self.writer.indent += 1
+            kinds = dict(typed)
+            typed_scope = _Scope()
+            for name, variable in scope.variables.items():
+                typed_scope.variables[name] = _Variable(variable.python, variable.mutable, kinds.get(variable.python or ""))
+            self.block(body, typed_scope)
+            self.writer.indent -= 1
+            self.line("else:")
+            self.writer.indent += 1
+            self.block(body, scope)
+            self.writer.indent -= 1
+        else:
+            self.block(body, scope)
+        self.done.append(self.writer)
+
+    def write_program(self, stmt: ast.Program):
+        self.writer = _Writer()
+        self.program = self.statement_node = stmt
+        self.is_function = False
+        scope = _Scope()
+        self.line("def __program__(env):")
+        self.writer.indent += 1
+        start = len(self.writer.lines)
+        self.line("_last = None")
+        self.line("try:")
+        self.writer.indent += 1
+        if stmt.shebang is not None:
+            self.line("_shebang(%s, env)" % self.constant(stmt.shebang))
+        # calls are deferred to run after all other statements, like interpreter.interpret_program(..)
+        defer = []
+        for statement in stmt.body:
+            if isinstance(statement, ast.CallExpression):
+                defer.append(statement)
+            else:
+                self.statement(statement, scope, "_last")
+        self.statement_node = stmt
+        self.line("if _is_script(env):")
+        self.writer.indent += 1
+        for statement in defer:
+            self.statement(statement, scope, "_last")
+        self.line("pass")
+        self.writer.indent -= 1
+        self.line("else:")
+        if defer:
+            message = "In normal mode the main function gets automatically called. Did you forgot '#!script' shebang?"
+            self.line("    _error(%r, %s)" % (message, self.constant(stmt)))
+        main = ast.CallExpression(ast.Identifier("main"), [])
+        self.line("    if env.has('main'):")
+        self.line("        _last = _call(env.lookup('main', %s), [], env, %s)" % (self.constant(main), self.constant(main)))
+        self.writer.indent -= 1
+        self.line("finally:")
+        for name, python in self.mirrors:
+            self.line("    _store(env, %r, %s)" % (name, python))
+        self.line("    pass")
+        self.line("return _box(_last)")
+        # the variables of the program are not set, if it stops early
+        self.writer.lines[start:start] = ["    %s = _UNSET" % python for name, python in self.mirrors]
+        self.writer.statements[start:start] = [stmt] * len(self.mirrors)
+        self.done.append(self.writer)
+
+
+def _find_method(methods: dict[type, typing.Any], cls: type, default: typing.Any) -> typing.Any:
+    # like interpreter._find_interpreter(..)
+    for base in cls.__mro__:
+        if base in methods:
+            methods[cls] = methods[base]
+            return methods[cls]
+    return default
+
+
+def _line_number(stmt: ast.Statement) -> int:
+    if stmt.loc.start is None:
+        return 1
+    return stmt.loc.start.line_nr + 1
+
+
+def _filename(stmt: ast.Statement) -> str:
+    for node in ast.walk(stmt):
+        if node.loc.start is not None:
+            return node.loc.start.filename
+    return "<flolang>"
+
+
+_int_type = ast.Type(INT)
+_increment_steps = inter._increment_steps
+
+_statements: dict[type, typing.Any] = {
+    ast.VariableDeclaration: Transpiler.statement_variable_declaration,
+    ast.FunctionDeclaration: Transpiler.statement_function_declaration,
+    ast.IfExpression: Transpiler.statement_if_expression,
+    ast.WhileExpression: Transpiler.statement_while_expression,
+    ast.ForExpression: Transpiler.statement_for_expression,
+    ast.BlockStatement: Transpiler.statement_block,
+    ast.ReturnExpression: Transpiler.statement_return_expression,
+    ast.BreakExpression: Transpiler.statement_break_expression,
+    ast.ContinueExpression: Transpiler.statement_continue_expression,
+    ast.DeleteExpression: Transpiler.statement_delete_expression,
+    ast.AssignmentExpression: Transpiler.statement_assignment_expression,
+    ast.UnaryIdentifierBeforeExpression: Transpiler.statement_increment,
+    ast.UnaryIdentifierAfterExpression: Transpiler.statement_increment,
+}
+
+_expressions: dict[type, typing.Any] = {
+    ast.NumericLiteral: Transpiler.expression_numeric_literal,
+    ast.FloatLiteral: Transpiler.expression_float_literal,
+    ast.StringLiteral: Transpiler.expression_string_literal,
+    ast.Identifier: Transpiler.expression_identifier,
+    ast.BinaryExpression: Transpiler.expression_binary_expression,
+    ast.UnaryBeforeExpression: Transpiler.expression_unary_before_expression,
+    ast.UnaryIdentifierBeforeExpression: Transpiler.expression_increment,
+    ast.UnaryIdentifierAfterExpression: Transpiler.expression_increment,
+    ast.AssignmentExpression: Transpiler.expression_assignment_expression,
+    ast.MemberExpression: Transpiler.expression_member_expression,
+    ast.CallExpression: Transpiler.expression_call_expression,
+    ast.InlinedCallExpression: Transpiler.expression_inlined_call_expression,
+    ast.ElvisExpression: Transpiler.expression_elvis_expression,
+    ast.ListLiteral: Transpiler.expression_list_literal,
+    ast.ObjectLiteral: Transpiler.expression_object_literal,
+    ast.UnreachableExpression: Transpiler.expression_unreachable_expression,
+}
+
+
+# ---- entry points ---- #
+
+
+def transpile(program: ast.Program, env: Environment | None = None) -> Transpiler:
+    # the python source of the program and its functions
+    transpiler = Transpiler(_environment_names(program, env))
+    transpiler.write_program(program)
+    transpiler.write_pending()
+    return transpiler
+
+
+def source(program: ast.Program, env: Environment | None = None) -> str:
+    return transpile(program, env).source()[0]
+
+
+def execute(program: ast.Program, env: Environment) -> RuntimeValue:
+    # same as interpreter.interpret(program, env)
+    return transpile(program, env).compile(_filename(program))["__program__"](env)
+
+
+def compile_function(function: inter.RuntimeFunction, env: Environment | None = None) -> typing.Callable:
+    # a function declared by another engine (like the builtin ones) is transpiled on its first call.
+    # Called as python(function, env, call, *arguments).
+    transpiler = Transpiler(_environment_names(function.body, env))
+    name = transpiler.unique("_function")
+    transpiler.write_function(name, function.parameters, function.body)
+    transpiler.write_pending()
+    function.python = transpiler.compile(_filename(function.body))[name]
+    return function.python
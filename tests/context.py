@@ -1,7 +1,24 @@
 
 from pathlib import Path
+import importlib
+import inspect
+import pytest
 
 
 def resolve_path(relative):
     current_dir = Path(__file__).parent
     return current_dir / relative
+
+
+# the tests of these suites run again with every other engine
+engine_suites = ["tests.test_flow", "tests.test_expressions", "tests.test_algorythm"]
+
+
+def engine_suite_params():
+    # a pytest.param for every test function of the suites, with its marks
+    params = []
+    for suite in map(importlib.import_module, engine_suites):
+        for name, function in inspect.getmembers(suite, inspect.isfunction):
+            if name.startswith("test_") and function.__module__ == suite.__name__:
+                params.append(pytest.param(function, marks=getattr(function, "pytestmark", []), id=suite.__name__.split(".")[-1] + "." + name))
+    return params
@@ -0,0 +1,91 @@
+from flolang import tokenize, parse, eval
+from flolang.abstract_source_tree import LazyBlockStatement
+import flolang.cache as cache
+import flolang.lexer as lexer
+import os
+
+
+code = """#!script
+fn add(int a, int b) int:
+    return a + b
+let list<list<int>> d = [[1], [2]]
+let x = add(1, 2) >> 1 == 1 or 2 ** 3 >= 8
+x
+"""
+
+
+def entries(directory):
+    return sorted(os.listdir(directory))
+
+
+def test_cache_same_as_parse(tmp_path):
+    for lazy in (False, True):
+        tok, program = cache.cached_parse(code, "test.flo", lazy, str(tmp_path))
+        cached_tok, cached = cache.cached_parse(code, "test.flo", lazy, str(tmp_path))
+        assert cached is not program
+        assert str(cached) == str(parse(tokenize(code, "test.flo"), lazy))
+        assert [(t.type, t.value, t.line_nr, t.line_pos, t.filename) for t in cached_tok] == \
+            [(t.type, t.value, t.line_nr, t.line_pos, t.filename) for t in tok]
+        # types and operators are compared with 'is'
+        assert cached_tok[1].type is lexer.FUNCTION
+        assert cached.body[2].value.operator is lexer.OR
+        assert isinstance(cached.body[0].body, LazyBlockStatement) == lazy
+    assert len(entries(tmp_path)) == 2
+
+
+def test_cache_key(tmp_path):
+    cache.cached_parse(code, "a.flo", directory=str(tmp_path))
+    cache.cached_parse(code, "b.flo", directory=str(tmp_path))
+    cache.cached_parse(code + "x\n", "a.flo", directory=str(tmp_path))
+    assert len(entries(tmp_path)) == 3
+
+
+def test_cache_damaged_entry(tmp_path):
+    cache.cached_parse(code, directory=str(tmp_path))
+    path = tmp_path / entries(tmp_path)[0]
+    path.write_bytes(b"garbage")
+    tok, program = cache.cached_parse(code, directory=str(tmp_path))
+    assert str(program) == str(parse(tokenize(code)))
+    assert path.read_bytes() != b"garbage"
+
+
+def test_cache_evict(tmp_path, monkeypatch):
+    # the file name is only part of the key, the entries have the same size
+    cache.cached_parse(code, "a.flo", directory=str(tmp_path))
+    first = entries(tmp_path)[0]
+    size = os.path.getsize(tmp_path / first)
+    monkeypatch.setattr(cache, "max_size", size * 2)
+    os.utime(tmp_path / first, (0, 0))
+    cache.cached_parse(code, "b.flo", directory=str(tmp_path))
+    # file times can be coarser than the time between these calls
+    [second] = [entry for entry in entries(tmp_path) if entry != first]
+    os.utime(tmp_path / second, (1, 1))
+    # using the first one makes it the most recently used one
+    cache.cached_parse(code, "a.flo", directory=str(tmp_path))
+    cache.cached_parse(code, "c.flo", directory=str(tmp_path))
+    assert len(entries(tmp_path)) == 2
+    assert first in entries(tmp_path)
+
+
+def test_cache_only_files(tmp_path, monkeypatch):
+    # a source code given as string is not cached in the working directory
+    monkeypatch.chdir(tmp_path)
+    assert eval("1 + 2") == 3
+    cache.cached_parse(code)
+    assert os.listdir(tmp_path) == []
+
+
+def test_cache_file(tmp_path):
+    # a file gives the same entry as its source code
+    source = tmp_path / "test.flo"
+    source.write_text(code, encoding="utf-8")
+    directory = str(tmp_path / cache.DIRECTORY)
+    for lazy in (False, True):
+        tok, program = cache.cached_parse_file(str(source), "test.flo", lazy, directory)
+        cached_tok, cached = cache.cached_parse_file(str(source), "test.flo", lazy, directory)
+        assert cached is not program
+        assert str(cached) == str(program) == str(parse(tokenize(code, "test.flo"), lazy))
+        assert [(t.type, t.value, t.line_nr, t.line_pos, t.filename) for t in cached_tok] == \
+            [(t.type, t.value, t.line_nr, t.line_pos, t.filename) for t in tok]
+        assert str(cache.cached_parse(code, "test.flo", lazy, directory)[1]) == str(program)
+    assert len(entries(directory)) == 2
@@ -0,0 +1,34 @@
+import flolang
+from flolang import tokenize, default_environment, parse, eval
+import flolang.closure as closure
+import pytest
+from tests.context import engine_suite_params
+
+
+# every test of the engine suites, see tests.context, runs again with the closure engine
+@pytest.mark.parametrize("test", engine_suite_params())
+def test_closure_engine_suites(test, monkeypatch):
+    monkeypatch.setattr(flolang, "default_engine", "closure")
+    test()
+
+
+def test_closure_engine_loop():
+    code = """#!script
+let mut int sum = 0
+for int i in 0..100:
+    if i % 3 == 0:
+        continue
+    if i > 50:
+        break
+    sum += i
+sum
+"""
+    assert eval(code, engine="closure") == eval(code, engine="tree")
+
+
+def test_closure_engine_shares_functions():
+    # a function declared by the tree walker is run by the closure engine and the other way round
+    env = default_environment()
+    env.is_script = True
+    flolang.execute(parse(tokenize("#!script\nfn twice(int a) int:\n    return a * 2\n")), env, "tree")
+    assert flolang.to_native(closure.execute(parse(tokenize("#!script\ntwice(21)")), env)) == 42
@@ -1,8 +1,15 @@
 import pytest
 from flolang.compiler import compiler_run, file_ending
+import flolang.cache as cache
 import os
 
 
+@pytest.fixture(autouse=True)
+def no_cache(monkeypatch):
+    # the test files are compiled without a __flocache__ next to them
+    monkeypatch.setattr(cache, "enabled", False)
+
+
 def test_compile_to_ast(tmp_path):
     output_path = tmp_path / "file.ast"
     compiler_run(["floc", "./tests/code/test_code.txt", "--emit", "ast", "--output", output_path])
@@ -23,6 +30,15 @@ def test_compile_to_token(tmp_path):
         assert len(lines) > 10
 
 
+def test_compile_to_ir(tmp_path):
+    output_path = tmp_path / "file.ir"
+    compiler_run(["floc", "./tests/code/test_code.txt", "--emit", "ir", "--output", output_path])
+    with open(output_path, "r", encoding="utf-8") as f:
+        lines = f.readlines()
+        assert lines[0] == "code <program>:\n"
+        assert len(lines) > 10
+
+
 def test_file_ending_1():
     assert file_ending("file", ".txt") == "file.txt"
 
@@ -45,3 +61,20 @@ def test_file_ending_5():
 
 def test_file_ending_():
     assert file_ending("txt", ".txt") == "txt.txt"
+
+
+def test_compile_no_optimize(tmp_path):
+    source = tmp_path / "file.flo"
+    source.write_text("#!script\nlet int a = 1 + 2\n", encoding="utf-8")
+    for switches, kind in [([], "NumericLiteral"), (["--no-optimize"], "BinaryExpression")]:
+        output_path = tmp_path / "file.ast"
+        compiler_run(["floc", str(source), "--emit", "ast", "--output", str(output_path)] + switches)
+        assert "value: ┬ " + kind in output_path.read_text(encoding="utf-8")
+
+
+def test_compile_inline_not_a_number(tmp_path, capfd):
+    output_path = tmp_path / "file.ast"
+    compiler_run(["floc", "./tests/code/test_code.txt", "--emit", "ast", "--inline", "all", "--output", str(output_path)])
+    out, err = capfd.readouterr()
+    assert err == "inline size 'all' is not a number\n"
+    assert not os.path.isfile(output_path)
@@ -1153,3 +1153,28 @@ def test_type_4b():
 def test_type_4c():
     # need typecast
     eval("let mut int a = 1        a = int(1.0)")
+
+
+def test_operator_tables():
+    # every operator the parser accepts has a function in the interpreter.
+    # 'is' and 'is not' are not implemented yet.
+    import flolang.abstract_source_tree as ast
+    import flolang.interpreter as interpreter
+    import flolang.lexer as lexer
+    assert set(ast._binary_precedence) - {lexer.IS, lexer.ISNOT} == set(interpreter._binary_operations)
+    assert set(ast._unary_before_operators) == set(interpreter._unary_operations)
+    assert set(ast._increment_operators) == set(interpreter._increment_steps)
+    assert set(ast._assignment_operators) == set(interpreter._assignment_operations) | {lexer.ASSIGN}
+
+
+def test_compound_assignment_member():
+    # a list or object member keeps a runtime value, like a variable
+    assert eval("let mut o = {a: 1, b: 2}\no.b += 3\no.b") == 5
+    assert eval("let mut o = [1, 2.5]\no[1] *= 2\no[0] -= 3\no[0] + o[1]") == 3
+    assert eval("let mut o = {a: 2147483647}\no.a += 1\no.a") == -2147483648
+
+
+def test_compound_assignment_division():
+    # dividing a variable keeps its type, the division operator gives a float
+    assert eval("let mut a = 7\na /= 2\na") == 3
+    assert eval("let a = 7\na / 2") == 3.5
@@ -1,5 +1,9 @@
 from tests.context import resolve_path
+import flolang
 from flolang import tokenize, default_environment, parse, interpret, to_native, eval
+from flolang.interpreter import Environment
+import flolang.resolver as resolver
+from flolang.error import CompileException
 import pytest
 
 
@@ -1260,3 +1264,80 @@ fn foo(mut int i) int:
 foo(4)
 
 """)
+
+
+def test_environment_reuse():
+    # a block without variables makes no environment, the others are used again
+    code = "fn f(int n) int:\n    let mut int s = 0\n    for int i in 0..n:\n        if i % 2:\n            let int k = i\n            s += k\n    return s\n"
+
+    def allocations(n):
+        before = Environment.allocations
+        assert eval(code + "f(%d)" % n, engine="tree") == (n // 2) ** 2
+        return Environment.allocations - before
+
+    allocations(2)
+    empty = allocations(0)
+    assert allocations(1000) == allocations(10) == empty
+
+
+def test_resolve_interrupts():
+    # the blocks which a 'break', 'continue' or 'return' can leave
+    code = "fn f(mut int n) int:\n    while n:\n        n -= 1\n        if n == 3:\n            break\n    for int i in 0..n:\n        n += i\n    return n\nf(5)\n"
+    function = parse(tokenize(code)).body[0]
+    body = resolver.resolve_function(function.parameters, function.body)
+    loop, counter, _ = body.body
+    assert body.interrupts
+    assert loop.body.interrupts and loop.body.body[1].consequent.interrupts
+    assert not counter.body.interrupts
+    assert eval(code) == 6
+
+
+def test_call_inline_cache():
+    # the function of a call by name is kept on the call until something might change it
+    code = "fn one() int:\n    let int r = 1\n    return r\nfn call() int:\n    return one()\n"
+    program = parse(tokenize("#!script\n" + code + "call()\n"))
+    env = flolang.default_environment()
+    assert flolang.execute(program, env, "tree").value == 1
+    [_, call, top] = program.body
+    inner = call.body.body[0].value
+    assert inner._callee[1] is env and inner._callee[2] is env.lookup("one", inner)
+    assert top._callee[2] is env.lookup("call", top)
+    # a variable named like the function hides it from the callee (dynamic scoping)
+    assert eval(code + "fn two() int:\n    return 2\nfn hide() int:\n    let one = two\n    return call()\ncall() * 10 + hide()") == 12
+    assert eval(code + "let int s = call()\ndelete one\nfn one() int:\n    return 3\ns * 10 + call()") == 13
+
+
+def test_call_plan():
+    function = "fn f(int a, int b, int c = 7) int:\n    return a * 100 + b * 10 + c\n"
+    assert eval(function + "f(1, 2) + f(1, 2, 3) * 1000") == 123127
+    for code, message in [("f(1)", "Either argument default"), ("f(1, 2, 3, 4)", "not have enough parameters")]:
+        with pytest.raises(CompileException, match=message):
+            eval(function + code)
+
+
+def test_resolve_unused_loop_variable():
+    # an int loop of '_' which nothing in the body sees makes no environment
+    code = "fn f(int n) int:\n    let mut int s = 0\n    for int _ in 0..n:\n        for int _ in 0..2:\n            s += 1\n" \
+        "    for int _ in 0..n:\n        s += _\n    for _ in 0..n:\n        s += abs(1)\n    return s\n"
+    function = parse(tokenize("#!script\n" + code)).body[0]
+    body = resolver.resolve_function(function.parameters, function.body)
+    outer, used, called = body.body[1:4]
+    assert outer.names is None and outer.body.body[0].names is None
+    assert used.names == {"_": 0} and called.names == {"_": 0}
+    assert eval(code + "f(4)") == 8 + 6 + 4
+
+
+def test_loop_unused_variable():
+    # the engine suites run these with every engine
+    assert eval("fn f() int:\n    let mut int s = 0\n    for int _ in 0..10:\n        s += 1\n        if s == 3:\n            break\n        continue\n    return s\nf()") == 3
+    assert eval("fn f() int:\n    for int _ in 0..10:\n        return 5\n    return 0\nf()") == 5
+    assert eval("fn f() int:\n    let mut int s = 0\n    for int _ in [1, 2]:\n        s += 1\n    return s\nf()") == 2
+    assert eval("fn f() int:\n    let mut int s = 0\n    for int i in 0..5:\n        s += i\n        i += 10\n    return s\nf()") == 10
+
+
+def test_loop_variable_errors():
+    with pytest.raises(CompileException, match="same type"):
+        eval("fn f() int:\n    for int _ in [1, 2.5]:\n        let int k = 1\n    return 0\nf()")
+    # the next value is assigned by name, to the variable of the function
+    with pytest.raises(CompileException, match="not mutable"):
+        eval("fn f() int:\n    let int i = 100\n    for int i in 2..4:\n        delete i\n    return 0\nf()")
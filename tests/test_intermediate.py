@@ -0,0 +1,64 @@
+import flolang
+from flolang import tokenize, parse, eval
+from flolang.intermediate import Program, op, run
+from flolang.native import create_default_environment
+from flolang.error import CompileException
+import pickle
+import pytest
+from tests.context import engine_suite_params
+
+
+# every test of the engine suites, see tests.context, runs again with the bytecode virtual machine
+@pytest.mark.parametrize("test", engine_suite_params())
+def test_vm_suites(test, monkeypatch):
+    monkeypatch.setattr(flolang, "default_engine", "vm")
+    test()
+
+
+code = """#!script
+fn sum(int n, int step = 1) int:
+    let mut int s = 0
+    for int i in 0..n:
+        if i == 3:
+            continue
+        s += i * step
+    return s
+sum(10, 2)
+"""
+
+
+def test_vm_bytecode():
+    program = Program(parse(tokenize(code)))
+    instructions = program.code.code
+    assert instructions.typecode == "i"
+    assert len(instructions) == 2 * len(program.code.statements)
+    function = [c for c in program.code.constants if hasattr(c, "code")][0]
+    opcodes = function.code.code[::2]
+    assert op.FOR_NEXT in opcodes and op.RETURN in opcodes
+    # jumps are resolved to offsets of instructions
+    for offset in range(0, len(function.code.code), 2):
+        if function.code.code[offset] in (op.JUMP, op.JUMP_IF_FALSE, op.FOR_NEXT):
+            target = function.code.code[offset + 1]
+            assert 0 <= target < len(function.code.code) and target % 2 == 0
+
+
+def test_vm_listing():
+    listing = Program(parse(tokenize(code))).listing()
+    assert "code <program>:" in listing
+    assert "code sum:" in listing
+    assert "FOR_NEXT" in listing
+    assert "(+=)" in listing
+
+
+def test_vm_serializable():
+    program = pickle.loads(pickle.dumps(Program(parse(tokenize(code)))))
+    env = create_default_environment()
+    value, state = run(program.code, env)
+    assert value.value == 84 == eval(code, shebang=None)
+
+
+def test_vm_call_checks_function_first(capfd):
+    # like the interpreter, the arguments of a call of no function do not run
+    with pytest.raises(CompileException, match="Function type not implemented"):
+        eval('let int n = 5\nn(print("side effect"))', engine="vm")
+    assert "side effect" not in capfd.readouterr().out.splitlines()
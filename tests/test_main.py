@@ -102,3 +102,61 @@ def test_main_function_help(monkeypatch, capfd):
     assert out == main.get_help()  # check that the text is equal to the help text
     assert len(out) >= 200  # potentially guarding against not printing enough text
     assert len(out.split("\n")) >= 10  # potentially guarding against not printing multiple lines
+
+
+def test_main_execute_error_tokens(tmp_path, capfd):
+    # the tokens of a script are printed with its error
+    main.set_pretty_print(False)
+    script = tmp_path / "error.flo"
+    script.write_text("#!script\nfn main():\n    undefined_symbol\nmain()\n", encoding="utf-8")
+    main.main_execute(str(script), [])
+    out, err = capfd.readouterr()
+    assert "is not defined" in out
+    assert "IDENTIFIER:'undefined_symbol'" in out
+
+
+@pytest.mark.timeout(5)  # timeout in case it is stuck in interpreter mode
+@pytest.mark.parametrize("switches, inline_size", [([], 16), (["--inline=0"], 0), (["--no-optimize"], None)])
+def test_main_inline_switch(monkeypatch, capfd, switches, inline_size):
+    sizes = []
+    original = main.execute
+
+    def execute(ast, env, engine=None, inline_size=16):
+        sizes.append(inline_size)
+        return original(ast, env, engine, inline_size)
+
+    monkeypatch.setattr(main, "execute", execute)
+    monkeypatch.setattr('builtins.input', create_input_iterator(["1 + 2", KeyboardInterrupt()]))
+    monkeypatch.setattr(sys, 'argv', ['name_does_not_matter.py'] + switches)
+    with pytest.raises(KeyboardInterrupt):
+        main.main()
+    out, err = capfd.readouterr()
+    assert out.split("\n")[1] == "# 3"
+    assert sizes == [inline_size]
+
+
+def test_main_inline_switch_error(monkeypatch, capfd):
+    monkeypatch.setattr(sys, 'argv', ['name_does_not_matter.py', '--inline=all'])
+    main.main()
+    out, err = capfd.readouterr()
+    assert out == "inline size 'all' is not a number\n"
+
+
+def test_main_execute_optimizes_lazy_bodies(monkeypatch, tmp_path, capfd):
+    # the function bodies of a script are parsed when called, they are optimized then
+    script = tmp_path / "script.flo"
+    script.write_text("#!script\nfn sq(int a) int:\n    return a * a\nfn work(int n) int:\n    let int k = 2 + 3\n    return sq(n) + k\n"
+                      "print(work(3))\n", encoding="utf-8")
+    programs = []
+    original = main.execute
+
+    def execute(ast, env, engine=None, inline_size=16):
+        programs.append(ast)
+        return original(ast, env, engine, inline_size)
+
+    monkeypatch.setattr(main, "execute", execute)
+    main.main_execute(str(script), [])
+    out, err = capfd.readouterr()
+    assert out.splitlines()[-1] == "14"
+    value = programs[-1].body[1].body.body[1].value
+    assert (value.left.kind, value.right.kind) == ("InlinedCallExpression", "NumericLiteral")
@@ -0,0 +1,164 @@
+import flolang
+from flolang import tokenize, parse, eval
+import flolang.abstract_source_tree as ast
+from flolang.abstract_source_tree import IncrementalParser
+from flolang.optimizer import optimize, _size
+from flolang.error import CompileException
+import pytest
+
+
+def optimized(code, lazy=False, env=None, inline_size=16):
+    program = parse(tokenize("#!script\n" + code), lazy=lazy)
+    size = _size(program)
+    report = optimize(program, env, inline_size)
+    assert _size(program) == size - report.removed
+    assert optimize(program, env, inline_size).removed == 0  # nothing left to do
+    return program, report.removed
+
+
+def test_optimize_fold():
+    program, removed = optimized("let int a = 2**31 - 1\nlet float b = -(1 + 2) / 2\nlet c = 0xFFFFFFFF + 0")
+    a, b, c = (declaration.value for declaration in program.body)
+    assert isinstance(a, ast.NumericLiteral) and a.value == 2147483647
+    assert isinstance(b, ast.FloatLiteral) and b.value == -1.5
+    assert isinstance(c, ast.NumericLiteral) and c.value == -1  # 32 bit wrap around
+    assert removed == 4 + 5 + 2
+
+
+def test_optimize_keeps_errors():
+    program, removed = optimized('let int a = 1 // 0\nlet b = "a" - 1')
+    assert removed == 0
+    assert isinstance(program.body[0].value, ast.BinaryExpression)
+
+
+def test_optimize_propagate():
+    program, removed = optimized("let int k = 3\nlet mut int m = 4\nlet int j = k * k + m\nfn f() int:\n    return k\n")
+    _, _, j, function = program.body
+    # 'm' is mutable, the function may see the 'k' of its caller
+    assert isinstance(j.value, ast.BinaryExpression) and isinstance(j.value.left, ast.NumericLiteral)
+    assert j.value.left.value == 9
+    assert isinstance(function.body.body[0].value, ast.Identifier)
+
+
+def test_optimize_dead_branches():
+    code = "static bool DEBUG = 0\nfn f(int a) int:\n    static bool CHECK = 1\n    if CHECK:\n        return a\n    return 0\nif DEBUG:\n    f(1)\nelif DEBUG == 0:\n    f(2)\nelse:\n    f(3)\n"
+    program, removed = optimized(code)
+    _, function, block = program.body
+    # the 'if' with a true test is its block, the 'return' following it never runs
+    [_, taken] = function.body.body
+    assert isinstance(taken, ast.BlockStatement)
+    assert isinstance(taken.body[0], ast.ReturnExpression)
+    assert isinstance(block, ast.BlockStatement)
+    assert block.body[0].arguments[0].value == 2
+    assert removed == 18
+
+
+def test_optimize_lazy():
+    # a function body which is not parsed yet stays so
+    program, removed = optimized("fn f() int:\n    delete k\n    return 1\nlet int k = 1\nlet int j = k\n", lazy=True)
+    assert not program.body[0].body.is_parsed()
+    assert isinstance(program.body[2].value, ast.Identifier)
+
+
+@pytest.mark.parametrize("code, result", [
+    ("let int k = 1\nfn f() int:\n    return k\nfn g() int:\n    let int k = 7\n    return f()\ng()", 7),
+    ("let int k = 1\nlet mut int s = 0\nif 1:\n    s += k\n    let int k = 2\n    s += k\ns", 3),
+    ("let int i = 10\nlet mut int s = 0\nfor int i in 0..3:\n    s += i\ns + i", 13),
+    ("let int k = 1\ndelete k\nlet int k = 2\nk", 2),
+    ("let str s = 5\ns + \"x\"", "5x"),
+    ("let int x = 5\nif 0:\n    x", None),
+    ("static bool SKIP = 1\nlet mut int s = 0\nfor int i in 0..5:\n    if SKIP:\n        continue\n    s += i\ns", 0),
+])
+def test_optimized_engines_agree(code, result):
+    for engine in flolang.engines:
+        assert eval(code, engine=engine) == result
+
+
+def test_inline():
+    code = "fn sign(int a, int b = 1) int:\n    if a < 0:\n        return -b\n    elif a == 0:\n        return 0\n    return b\n" \
+        "fn f(int x) int:\n    return sign(x) + sign(x, 2) + sign(-3) + sign(g(x))\n"
+    program = parse(tokenize("#!script\n" + code))
+    report = optimize(program)
+    assert report.inlined == {"sign": 3}  # the argument 'g(x)' runs before the function
+    assert str(report) == "removed %d nodes, inlined sign 3 times" % report.removed
+    value = program.body[1].body.body[0].value
+    assert isinstance(value.left.left.left, ast.InlinedCallExpression)
+    assert isinstance(value.left.left.left.expression, ast.ElvisExpression)
+    assert value.left.left.left._declaration is program.body[0]
+    assert isinstance(value.left.right.expression, ast.NumericLiteral) and value.left.right.expression.value == -1
+    assert isinstance(value.right, ast.CallExpression)
+
+
+def test_inline_environment():
+    # the functions of the builtin prelude, unless the program binds their name
+    env = flolang.default_environment()
+    program, _ = optimized("fn f(int x) int:\n    return abs(x) + max(x, 2)\n", env=env)
+    assert isinstance(program.body[0].body.body[0].value.left.expression, ast.ElvisExpression)
+    program, _ = optimized("fn f(int x) int:\n    let int max = 3\n    return abs(x) + max(x, 2)\n", env=env)
+    assert isinstance(program.body[0].body.body[1].value.right, ast.CallExpression)
+    program, removed = optimized("let mut int a = 2\nlet int b = abs(a)\n", env=env, inline_size=0)
+    assert removed == 0
+
+
+@pytest.mark.parametrize("code, result", [
+    ("fn sub(int a, int b) int:\n    return a - b\nfn f(int a, int b) int:\n    return sub(b, a)\nf(1, 5)", 4),
+    ("fn add(int a) int:\n    return a + k\nfn f() int:\n    let int k = 2\n    return add(1)\nf()", 3),
+    ("fn one(int a) int:\n    return 1\nfn f() int:\n    return one(undefined)\nf()", "error"),
+    ("fn f(int a) int:\n    return a * 2\nlet int r = f(4) + f(-2)\ndelete f\nfn f(int a) int:\n    return a\nr + f(1)", 5),
+    ("fn f(int a) int:\n    return 10 * a\nfn g(int a) int:\n    if a > 1:\n        return f(a)\n    return a\ng(2) + g(1)", 21),
+    ("let int x = 3\nlet mut int s = 0\nfor int i in 0..x:\n    s += min(i, 1) + abs(i - 2)\ns", 5),
+])
+def test_inlined_engines_agree(code, result):
+    for engine in flolang.engines:
+        if result == "error":
+            with pytest.raises(CompileException):
+                eval(code, engine=engine)
+        else:
+            assert eval(code, engine=engine) == result
+
+
+@pytest.mark.parametrize("first, second, result", [
+    # the function inlined is deleted and declared again by a later program
+    ("fn f() int:\n    return 1\nfn g() int:\n    return f()\n", "delete f\nfn f() int:\n    return 2\ng()", 2),
+    ("fn g(int a) int:\n    return abs(a)\n", "delete abs\nfn abs(int a) int:\n    return 99\ng(-3)", 99),
+    # a caller declares the name
+    ("fn f() int:\n    return 1\nfn g() int:\n    return f()\n", "fn k() int:\n    let int f = 3\n    return g()\nk()", "error"),
+])
+def test_inlined_shared_environment(first, second, result):
+    for engine in flolang.engines:
+        env = flolang.default_environment()
+        eval(first, env=env, engine=engine)
+        if result == "error":
+            with pytest.raises(CompileException, match="Function type not implemented"):
+                eval(second, env=env, engine=engine)
+        else:
+            assert eval(second, env=env, engine=engine) == result
+
+
+def test_execute_inline_size():
+    # 0 inlines nothing, None does not optimize
+    code = "#!script\nfn one() int:\n    return 1\nfn f() int:\n    return one() + 1 * 2\nf()"
+    for inline_size, kind, right in [(16, "InlinedCallExpression", "NumericLiteral"), (0, "CallExpression", "NumericLiteral"),
+                                     (None, "CallExpression", "BinaryExpression")]:
+        program = parse(tokenize(code))
+        assert flolang.execute(program, flolang.default_environment(), inline_size=inline_size).value == 3
+        value = program.body[1].body.body[0].value
+        assert (value.left.kind, value.right.kind) == (kind, right)
+    assert eval(code[len("#!script\n"):], inline_size=None) == 3
+
+
+def test_incremental_program():
+    # a statement kept after an edit does not keep the value of a variable of another statement
+    parser = IncrementalParser("#!script\nlet int k = 1\nlet int j = k + 1\nj\n")
+    assert flolang.execute(parser.program, flolang.default_environment()).value == 2
+    parser.edit(1, 2, "let int k = 10\n")
+    assert flolang.execute(parser.program, flolang.default_environment()).value == 11
+
+
+def test_deleted_by_environment_function():
+    # a function declared before deletes a variable of its caller
+    for engine in flolang.engines:
+        env = flolang.default_environment()
+        eval("fn zap() int:\n    delete k\n    return 0\n", env=env, engine=engine)
+        with pytest.raises(CompileException, match="'k' is not defined"):
+            eval("let int k = 1\nlet int z = zap()\nk", env=env, engine=engine)
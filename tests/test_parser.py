@@ -1,5 +1,10 @@
 from tests.context import resolve_path
-from flolang import tokenize, default_environment, parse, interpret
+from flolang import tokenize, iter_tokens, default_environment, parse, interpret
+from flolang.abstract_source_tree import Parser, BinaryExpression, BlockStatement, LazyBlockStatement, IncrementalParser
+from flolang.abstract_source_tree import Statement, NumericLiteral, NodeVisitor, NodeTransformer, walk
+from flolang.error import ParserError
+import flolang.lexer as lexer
+import io
 import pytest
 
 
@@ -27,3 +32,237 @@ def test_types_1():
 @pytest.mark.skip(reason="not yet parsing correctly")
 def test_types_2():
     parseeval("let int[][] i = 5")
+
+
+def test_parse_token_stream():
+    code = "#!script\nfn foo(int a) int:\n    return a * 2\nfoo(21)\n"
+    program = parse(iter_tokens(io.StringIO(code)))
+    assert str(program) == str(parse(tokenize(code)))
+    assert interpret(program, default_environment()).value == 42
+
+
+def test_parse_keeps_tokens():
+    tok = tokenize("let list<list<int>> a = [[1], [2]]\nlet b = a[0][0] >> 1\n")
+    copy = list(tok)
+    parse(tok)
+    assert tok == copy
+    # parsing twice from the same list gives the same tree
+    assert str(parse(tok)) == str(parse(copy))
+
+
+def test_ast_slots():
+    program = parse(tokenize("let int a = 1 + 2\nfn f():\n    return\n"))
+    assert program.kind == "Program"
+    assert not hasattr(program, "__dict__")
+    declaration = program.body[0]
+    assert list(declaration.json()) == ["kind", "loc", "mutable", "dynamic", "type", "identifier", "value", "is_global"]
+    assert BinaryExpression.kind == "BinaryExpression"
+    assert LazyBlockStatement.kind == "BlockStatement"
+    # nodes created without a location share the same one
+    assert BlockStatement([]).loc is BlockStatement([]).loc
+
+
+def test_parse_split_shift_template():
+    code = "let dict<int, list<int>> a = None\nlet list<list<int>> b = None\n"
+    assert str(parse(iter_tokens(io.StringIO(code)))) == str(parse(tokenize(code)))
+
+
+def test_parser_cursor():
+    parser = Parser()
+    parser.tokens = tokenize("a b c")
+    assert parser.peek(0) is parser.at()
+    assert parser.peek(2).value == "c"
+    assert parser.peek(100).type is lexer.EOF
+    mark = parser.mark()
+    assert parser.eat().value == "a"
+    assert parser.eat().value == "b"
+    parser.backtrack()
+    assert parser.at().value == "b"
+    parser.restore(mark)
+    assert parser.at().value == "a"
+    assert parser.at_last() is None
+
+
+def test_parser_split_token():
+    parser = Parser()
+    parser.tokens = tokenize("a >> b")
+    parser.eat()
+    shift = parser.at()
+    first = lexer.Token(shift.symbols, lexer.BIGGER)
+    second = lexer.Token(shift.symbols, lexer.BIGGER)
+    mark = parser.mark()
+    assert parser.split_token(first, second) is first
+    assert parser.at() is second
+    assert parser.peek(1).value == "b"
+    assert parser.eat() is second
+    parser.backtrack()
+    assert parser.at() is second
+    parser.restore(mark)
+    assert parser.at() is shift
+
+
+def binary_tree(expr):
+    if isinstance(expr, BinaryExpression):
+        return (binary_tree(expr.left), expr.operator, binary_tree(expr.right))
+    return getattr(expr, "symbol", None) or getattr(expr, "value_raw", None)
+
+
+def test_parse_binary_precedence():
+    def tree(code):
+        return binary_tree(parse(tokenize(code)).body[0])
+    assert tree("a - b - c") == (("a", "-", "b"), "-", "c")
+    assert tree("a + b * c") == ("a", "+", ("b", "*", "c"))
+    assert tree("a ** b ** c") == (("a", "**", "b"), "**", "c")
+    assert tree("a or b and c | d ^ e & f") == ("a", "or", ("b", "and", ("c", "|", ("d", "^", ("e", "&", "f")))))
+    assert tree("a == b < c << d + e * f ** g") == ("a", "==", ("b", "<", ("c", "<<", ("d", "+", ("e", "*", ("f", "**", "g"))))))
+    assert tree("(a + b) * 2") == (("a", "+", "b"), "*", "2")
+
+
+def test_parse_lazy_function_body():
+    code = "#!script\nfn foo(int a) int:\n    if a > 1:\n        return a * 2\n    return a\nfn bar():\n    let x = = 1\nfoo(21)\n"
+    program = parse(tokenize(code), lazy=True)
+    foo, bar = program.body[0], program.body[1]
+    assert isinstance(foo.body, LazyBlockStatement)
+    assert not foo.body.is_parsed()
+    # the syntax error in bar is not reported as long as bar is not used
+    assert interpret(program, default_environment()).value == 42
+    assert foo.body.is_parsed()
+    assert not bar.body.is_parsed()
+    with pytest.raises(ParserError):
+        bar.body.body
+    assert "error" in bar.body.json()
+
+
+def test_parse_lazy_same_tree():
+    code = "fn foo(int a, list<list<int>> b) int:\n    fn inner():\n        return 1\n    return a * 2\nfn bar(): return 3\n"
+    eager = parse(tokenize(code))
+    lazy = parse(iter_tokens(io.StringIO(code)), lazy=True)
+    assert str(lazy) == str(eager)
+    assert isinstance(lazy.body[1].body, BlockStatement)
+    assert not isinstance(lazy.body[1].body, LazyBlockStatement)  # not indented, parsed right away
+
+
+def test_incremental_parser():
+    code = "fn a(int x) int:\n    return x\nfn b():\n    print(1)\nlet list<list<int>> c = None\n"
+    inc = IncrementalParser(code)
+    a, b, c = inc.program.body
+    program = inc.edit(3, 4, "    print(2)\n    print(3)\n")
+    assert program.body[0] is a
+    assert program.body[1] is not b
+    assert program.body[2] is c
+    assert inc.reparsed == [program.body[1]]
+    assert inc.removed == [b]
+    assert str(program) == str(parse(tokenize("".join(line + "\n" for line in inc.tokenizer.lines))))
+    # the reused declaration after the edit has moved one line down
+    assert c.loc.start.line_nr == 5
+    assert c.type.loc.end.line_nr == 5
+
+
+def test_incremental_parser_error():
+    inc = IncrementalParser("let a = 1\nlet b = 2\n")
+    with pytest.raises(ParserError):
+        inc.edit(1, 2, "let b = = 2\n")
+    program = inc.edit(1, 2, "let b = 3\n")
+    assert str(program) == str(parse(tokenize("let a = 1\nlet b = 3\n")))
+
+
+def test_parse_parallel():
+    code = "#!script\n" + "".join("fn f%d(int a) int:\n    return a + %d\nlet v%d = f%d(1)\n" % (i, i, i, i) for i in range(40))
+    tok = tokenize(code)
+    program = parse(tok, workers=2)
+    assert str(program) == str(parse(tok))
+    # locations use the tokens of the caller, function bodies come back lazy
+    assert program.body[0].loc.start is tok[1]
+    assert isinstance(program.body[0].body, LazyBlockStatement)
+    assert interpret(program, default_environment()).value == 40
+    # operators are compared with 'is', they must be the lexer constants again
+    program = parse(tokenize(code + "let b = v1 == 2 or v2 >= 9\nb\n"), workers=2)
+    assert program.body[-2].value.operator is lexer.OR
+    assert interpret(program, default_environment()).value
+
+
+def test_parse_parallel_errors():
+    code = "".join("fn f%d(int a) int:\n    return a + %d\nlet v%d = f%d(1)\n" % (i, i, i, i) for i in range(40))
+    broken = [code.replace("return a + 7\n", "return a + + \n"),  # in a function body
+              code.replace("let v20 = f20(1)\n", "let v20 = f20(1) +\n")]  # statement continues into the next one
+    for source in broken:
+        with pytest.raises(ParserError) as sequential:
+            parse(tokenize(source))
+        with pytest.raises(ParserError) as parallel:
+            parse(tokenize(source), workers=2)
+        assert str(parallel.value) == str(sequential.value)
+
+
+def test_walk_children():
+    for name in ("test_code.txt", "test_code_readme_example_1.txt", "test_code_readme_example_2.txt", "test_main.txt"):
+        with open(resolve_path("code/" + name), "r") as f:
+            program = parse(tokenize(f.read()))
+        nodes = list(walk(program))
+        assert nodes[0] is program
+        for node in nodes:
+            # fields which are not children hold no nodes
+            for field in node._fields:
+                if field not in node._children:
+                    value = getattr(node, field)
+                    assert not isinstance(value, Statement)
+                    assert not (isinstance(value, list) and any(isinstance(v, Statement) for v in value))
+        # same nodes as found through json()
+        count = 0
+        stack = [program]
+        while stack:
+            node = stack.pop()
+            count += 1
+            for value in node.json().values():
+                if isinstance(value, Statement):
+                    stack.append(value)
+                elif isinstance(value, list):
+                    stack.extend(v for v in value if isinstance(v, Statement))
+        assert count == len(nodes)
+
+
+def test_visitor_deep_tree():
+    node = NumericLiteral("1")
+    for i in range(10000):
+        node = BinaryExpression(NumericLiteral("1"), node, lexer.PLUS)
+    assert len(list(walk(node))) == 20001
+
+    class Counter(NodeVisitor):
+        def __init__(self):
+            super().__init__()
+            self.numbers = 0
+            self.others = 0
+
+        def visit_NumericLiteral(self, node):
+            self.numbers += 1
+
+        def generic_visit(self, node):
+            self.others += 1
+            return node.right.kind != "NumericLiteral"  # does not go into the last one
+
+    counter = Counter()
+    counter.visit(node)
+    assert (counter.numbers, counter.others) == (9999, 10000)
+
+    class Fold(NodeTransformer):
+        def visit_BinaryExpression(self, node):
+            return NumericLiteral(str(node.left.value + node.right.value))
+
+    assert Fold().visit(node).value == 10001
+
+
+def test_transformer_replace_remove():
+    program = parse(tokenize("let a = 1\nfn f():\n    return 2\nlet b = [3, 4, 5]\n"))
+
+    class Transformer(NodeTransformer):
+        def visit_NumericLiteral(self, node):
+            if node.value == 4:
+                return None  # removed from the list
+            return NumericLiteral(str(node.value * 10)).location(node.loc.start, node.loc.end)
+
+        def visit_FunctionDeclaration(self, node):
+            return None
+
+    assert Transformer().visit(program) is program
+    assert [stmt.kind for stmt in program.body] == ["VariableDeclaration", "VariableDeclaration"]
+    assert program.body[0].value.value == 10
+    assert [v.value for v in program.body[1].value.values] == [30, 50]
@@ -0,0 +1,82 @@
+import flolang
+from flolang import tokenize, parse, eval
+import flolang.abstract_source_tree as ast
+import flolang.resolver as resolver
+from flolang.error import CompileException
+import pytest
+
+
+def nodes(tree, kind):
+    return [node for node in ast.walk(tree) if isinstance(node, kind)]
+
+
+def test_resolve_function_slots():
+    program = parse(tokenize("#!script\nfn f(mut int a, int b) int:\n    let mut int c = a\n    for int i in 0..b:\n        c += i\n    return c\n"))
+    function = program.body[0]
+    body = resolver.resolve_function(function.parameters, function.body)
+    assert body.parameter_names == {"a": 0, "b": 1}
+    assert body.parameter_mutables == 0b01
+    assert body.names == {"c": 0}
+    assert body.mutables == 0b1
+    # (depth, slot) from the using environment: the block of the call, the call, the loop.
+    # The block of the loop declares nothing and runs in the environment of the loop.
+    assert body.body[1].body.names is None
+    bindings = {(node.symbol, node.depth, node.slot) for node in nodes(body, ast.SlotIdentifier)}
+    assert bindings == {("a", 1, 0), ("b", 1, 1), ("c", 0, 0), ("i", 0, 0)}
+    [assignment] = nodes(body, ast.SlotAssignmentExpression)
+    assert (assignment.depth, assignment.slot) == (1, 0)
+    assert resolver.resolve_function(function.parameters, body) is body
+
+
+def test_resolve_program_environment():
+    # outside of functions the variables of the program are in its environment, slot None
+    program = resolver.resolve(parse(tokenize("#!script\nlet mut int s = 0\nfor int i in 0..3:\n    s += i\ns\n")))
+    assert isinstance(program.body[0], ast.VariableDeclaration)
+    assert not isinstance(program.body[0], ast.SlotVariableDeclaration)
+    [assignment] = nodes(program, ast.SlotAssignmentExpression)
+    assert (assignment.depth, assignment.slot) == (1, None)
+    assert program.body[2].depth == 0
+    # resolving again changes nothing
+    assert resolver.resolve(program).body[1] is program.body[1]
+
+
+def test_resolve_free_variables():
+    # the free variable of a function is found in the caller, it stays a lookup by name
+    program = parse(tokenize("#!script\nfn show() int:\n    return x\n"))
+    function = program.body[0]
+    body = resolver.resolve_function(function.parameters, function.body)
+    assert not nodes(body, ast.SlotIdentifier)
+
+
+@pytest.mark.parametrize("code, result", [
+    ("fn show() int:\n    return x\nfn caller() int:\n    let int x = 5\n    return show()\ncaller()", 5),
+    ("fn bump():\n    x += 1\nfn caller() int:\n    let mut int x = 5\n    bump()\n    return x\ncaller()", 6),
+    ("let int x = 1\nfn f() int:\n    let int x = 2\n    delete x\n    return x\nf()", 1),
+    ("fn f() int:\n    let int x = 2\n    delete x\n    let mut int x = 3\n    x += 1\n    return x\nf()", 4),
+    ("let int y = 7\nfn f() int:\n    let mut int r = 0\n    let mut int c = 0\n    while c < 2:\n        r += y\n        let int y = 1\n        c++\n    return r\nf()", 14),
+])
+def test_resolved_engines_agree(code, result):
+    for engine in flolang.engines:
+        assert eval(code, engine=engine) == result
+
+
+@pytest.mark.parametrize("code, message", [
+    ("fn f() int:\n    let int x = 2\n    let int x = 3\n    return x\nf()", "already defined"),
+    ("fn f() int:\n    let int x = 2\n    x = 3\n    return x\nf()", "not mutable"),
+    ("fn f(int a) int:\n    a += 3\n    return a\nf(1)", "not mutable"),
+    ("fn f() int:\n    let mut int x = 2\n    x = 3.5\n    return x\nf()", "same type"),
+])
+def test_resolved_errors(code, message):
+    with pytest.raises(CompileException, match=message):
+        eval(code)
+
+
+def test_local_names_per_environment():
+    # the names declared below a root environment, also by a program resolved before in another one
+    program = parse(tokenize("#!script\nfn f(int n) int:\n    if n:\n        let int y = n\n        return y\n    return 0\nf(1)\n"))
+    first, second = flolang.default_environment(), flolang.default_environment()
+    flolang.execute(program, first, "tree")
+    assert {"n", "y"} <= first.local_names
+    assert "y" not in second.local_names
+    flolang.execute(program, second, "tree")
+    assert {"n", "y"} <= second.local_names
@@ -1,6 +1,10 @@
+import io
+import mmap
 import pytest
 from tests.context import resolve_path
-from flolang import tokenize, default_environment, parse, interpret
+from flolang import tokenize, iter_tokens, default_environment, parse, interpret
+from flolang.error import TokenError
+import flolang.lexer as lexer
 
 
 def test_alloc_1():
@@ -9,3 +13,138 @@ def test_alloc_1():
 
 def test_alloc_2():
     assert len(tokenize("@alloc allocator_name")) == 3
+
+
+def types(code):
+    return [t.type for t in tokenize(code)]
+
+
+def test_symbolic_longest_match():
+    assert types("a <<= b") == [lexer.IDENTIFIER, lexer.ASSIGNBITSHIFTL, lexer.IDENTIFIER, lexer.EOF]
+    assert types("0..10") == [lexer.NUMBER, lexer.DOTDOT, lexer.NUMBER, lexer.EOF]
+
+
+def test_symbolic_chain():
+    # adjacent symbolic tokens are matched as one chain sharing its start position
+    tok = tokenize("a[0])")
+    assert [t.type for t in tok][3:5] == [lexer.SQUARE_R, lexer.COURVE_R]
+    assert tok[3].symbols.line_pos == tok[4].symbols.line_pos == 3
+    assert types("<<<=")[:3] == [lexer.SHIFTLEFT, lexer.SMALLER, lexer.ASSIGN]
+
+
+def test_keyword_before_underscore():
+    assert types("fn_foo") == [lexer.FUNCTION, lexer.IDENTIFIER, lexer.EOF]
+    assert types("fnfoo") == [lexer.IDENTIFIER, lexer.EOF]
+
+
+def test_reserved_identifier():
+    tok = tokenize("let int void = 0")
+    assert tok[2].type == lexer.RESERVED_IDENTIFIER
+    assert tok[2].value == "void"
+
+
+def test_numbers():
+    tok = tokenize("0x1F 1.5 1E5 7")
+    assert [(t.type, t.value) for t in tok[:4]] == [(lexer.NUMBER, "0x1F"), (lexer.FLOAT, "1.5"), (lexer.FLOAT, "1E5"), (lexer.NUMBER, "7")]
+
+
+def test_strings_and_comments():
+    tok = tokenize("'it\\'s' # comment")
+    assert [(t.type, t.value) for t in tok] == [(lexer.STRING, "it's"), (lexer.EOF, None)]
+
+
+def test_blocks_and_shebang():
+    assert types("#!script\nif a:\n    b\nc") == [
+        lexer.SHEBANG, lexer.IF, lexer.IDENTIFIER, lexer.COLON, lexer.BLOCKSTART,
+        lexer.IDENTIFIER, lexer.BLOCKEND, lexer.IDENTIFIER, lexer.EOF]
+    assert types("if a:\n    return") == [
+        lexer.IF, lexer.IDENTIFIER, lexer.COLON, lexer.BLOCKSTART, lexer.RETURN, lexer.BLOCKEND, lexer.EOF]
+
+
+def test_unknown_token():
+    with pytest.raises(TokenError):
+        tokenize("a ! b")
+    with pytest.raises(TokenError):
+        tokenize("   a")
+
+
+def dump(tokens):
+    return [(t.type, t.value, t.symbols.line_nr, t.symbols.line_pos, t.symbols.line) for t in tokens]
+
+
+def test_iter_tokens_text_stream():
+    code = "#!script\nfn foo(int a):\n    if a:\n        return a  # comment\n\x0c\nfoo(1)\n    "
+    assert dump(iter_tokens(io.StringIO(code))) == dump(tokenize(code))
+
+
+def test_iter_tokens_path_and_mmap():
+    path = resolve_path("./code/test_code.txt")
+    with open(path, "r", encoding="utf-8") as f:
+        expected = dump(tokenize(f.read()))
+    assert dump(iter_tokens(path)) == expected
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            assert dump(iter_tokens(mm)) == expected
+
+
+def test_iter_tokens_is_lazy():
+    lines = iter(["let a = 1\n", "let b = 2\n"])
+    tokens = iter_tokens(lines)  # type: ignore[arg-type]
+    assert next(tokens).type is lexer.LET
+    assert next(lines) == "let b = 2\n"  # the second line was not read yet
+
+
+def test_iter_tokens_empty():
+    assert dump(iter_tokens(io.StringIO(""))) == dump(tokenize(""))
+
+
+def test_incremental_edit_line():
+    inc = lexer.IncrementalTokenizer("fn foo():\n    return 1\nfoo()\n")
+    inc.edit(1, 2, "    return 2 + 3\n")
+    assert dump(inc.tokens()) == dump(tokenize("fn foo():\n    return 2 + 3\nfoo()\n"))
+
+
+def test_incremental_edit_resyncs_blocks():
+    inc = lexer.IncrementalTokenizer("if a:\n    b\n\n    c\nd\n")
+    inc.edit(1, 2, "    if b:\n        e\n")
+    assert inc.lines == ["if a:", "    if b:", "        e", "", "    c", "d"]
+    assert dump(inc.tokens()) == dump(tokenize("if a:\n    if b:\n        e\n\n    c\nd\n"))
+    inc.edit(0, 3, "")
+    assert dump(inc.tokens()) == dump(tokenize("\n    c\nd\n"))
+
+
+def test_incremental_error_keeps_state():
+    inc = lexer.IncrementalTokenizer("a = 1\nb = 2\n")
+    with pytest.raises(TokenError):
+        inc.edit(1, 2, "b ! 2\n")
+    assert dump(inc.tokens()) == dump(tokenize("a = 1\nb = 2\n"))
+    with pytest.raises(ValueError):
+        inc.edit(1, 5, "")
+
+
+def test_tokens_share_line_table():
+    tok = tokenize("let a = 1\nlet b = 2", filename="file")
+    assert not hasattr(tok[0], "__dict__")
+    assert all(t.table is tok[0].table for t in tok)
+    assert (tok[5].filename, tok[5].line_nr, tok[5].line_pos, tok[5].line) == ("file", 1, 4, "let b = 2")
+    symbols = tok[5].symbols
+    assert (symbols.filename, symbols.line_nr, symbols.line_pos, symbols.line) == ("file", 1, 4, "let b = 2")
+
+
+def test_tokenize_parallel():
+    with open(resolve_path("./code/test_code.txt"), "r", encoding="utf-8") as f:
+        code = "\n".join([f.read()] * 8)
+    serial = tokenize(code)
+    parallel = tokenize(code, workers=2)
+    assert dump(parallel) == dump(serial)
+    assert all(a.type is b.type for a, b in zip(parallel, serial))
+    assert parallel[0].table is parallel[-1].table
+
+
+def test_tokenize_parallel_error():
+    code = "\n".join(["fn foo():", "    return 1"] * 20 + ["a ! b"] + ["c = 1"] * 20)
+    with pytest.raises(TokenError) as serial:
+        tokenize(code)
+    with pytest.raises(TokenError) as parallel:
+        tokenize(code, workers=2)
+    assert str(parallel.value) == str(serial.value)
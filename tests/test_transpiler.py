@@ -0,0 +1,97 @@
+import flolang
+from flolang import tokenize, default_environment, parse, eval
+from flolang.error import CompileException
+import flolang.transpiler as transpiler
+import traceback
+import pytest
+from tests.context import engine_suite_params
+
+
+# every test of the engine suites, see tests.context, runs again transpiled to python
+@pytest.mark.parametrize("test", engine_suite_params())
+def test_py_engine_suites(test, monkeypatch):
+    monkeypatch.setattr(flolang, "default_engine", "py")
+    test()
+
+
+code = """#!script
+fn crc8_update(mut int crc, int dat, int polynomial=0x07) int:
+    crc ^= dat
+    for int _ in 0..8:
+        if crc & 0x80:
+            crc = (crc << 1) ^ polynomial
+        else:
+            crc = crc << 1
+        crc &= 0xFF
+    return crc
+let mut int crc = 0
+for int i in 0..300:
+    crc = crc8_update(crc, i & 0xFF)
+crc
+"""
+
+
+def test_py_engine_source():
+    source = transpiler.source(parse(tokenize(code)))
+    assert "def __program__(env):" in source
+    assert "def _function_crc8_update" in source
+    # the loops are python loops, the int operations are inline with the 32 bit wrap around
+    assert "in range(0, 8):" in source
+    assert "4294967295" in source
+    assert eval(code, engine="py") == eval(code, engine="tree")
+
+
+def test_py_engine_program_variables():
+    # the variables of the program stay in the environment for the next program
+    env = default_environment()
+    eval("let mut int a = 1\na += 41", env, engine="py")
+    assert eval("a", env, engine="py") == 42
+    with pytest.raises(CompileException, match="not mutable"):
+        eval("let int b = 1\nb = 2", env, engine="py")
+
+
+def test_py_engine_dynamic_scope():
+    # a callee sees the variables of its caller
+    code = """#!script
+fn show() int:
+    return x
+fn caller() int:
+    let int x = 5
+    return show()
+caller()
+"""
+    assert eval(code, engine="py") == 5
+
+
+def test_py_engine_location():
+    code = "#!script\nfn divide(int a, int b) int:\n    let int c = a // b\n    return c\ndivide(1, 0)\n"
+    with pytest.raises(ZeroDivisionError) as error:
+        eval(code, filename="divide.flo", shebang=None, engine="py")
+    frames = traceback.extract_tb(error.value.__traceback__)
+    assert ("divide.flo", 3) in [(frame.filename, frame.lineno) for frame in frames]
+    with pytest.raises(CompileException, match='File "divide.flo", line 2'):
+        eval("#!script\nlet int x = 1\nx = 2\n", filename="divide.flo", shebang=None, engine="py")
+
+
+def test_py_engine_compile_function():
+    # a function declared by the tree walker is transpiled on its first call
+    env = default_environment()
+    env.is_script = True
+    flolang.execute(parse(tokenize("#!script\nfn twice(int a) int:\n    return a * 2\n")), env, "tree")
+    twice = env.lookup("twice", None)
+    assert twice.python is None
+    assert flolang.to_native(transpiler.execute(parse(tokenize("#!script\ntwice(21)")), env)) == 42
+    assert twice.python is not None
+    assert transpiler.compile_function(twice, env)(twice, env, None, 4) == 8
+
+
+def test_py_engine_duplicate_parameter():
+    with pytest.raises(CompileException, match="already defined"):
+        eval("fn f(int a, int a) int:\n    return a\nf(1, 2)\n", engine="py")
+
+
+def test_py_engine_call_checks_function_first(capfd):
+    # like the interpreter, the arguments of a call of no function do not run
+    with pytest.raises(CompileException, match="Function type not implemented"):
+        eval('fn f() int:\n    let int n = 5\n    return n(print("side effect"))\nf()', engine="py")
+    assert "side effect" not in capfd.readouterr().out.splitlines()
@@ -0,0 +1,37 @@
+from flolang import tokenize, parse, default_environment, interpret
+from flolang.interpreter import IntValue, FloatValue, BooleanValue, StringValue, trueValueInstance, falseValueInstance
+import flolang.abstract_source_tree as ast
+import pickle
+
+
+def test_value_slots():
+    for value in (IntValue(5), IntValue(1 << 20), FloatValue(1.5), BooleanValue(True), StringValue("a")):
+        assert not hasattr(value, "__dict__")
+        assert value.variant == type(value).__name__
+        assert value.json() == {"variant": value.variant, "value": value.value}
+
+
+def test_value_cache():
+    assert BooleanValue(1) is trueValueInstance
+    assert BooleanValue(0) is falseValueInstance
+    assert IntValue(7) is IntValue(7.0)
+    assert IntValue(-256) is IntValue(-256)
+    assert IntValue(1 << 20) is not IntValue(1 << 20)
+    # the 32 bit wrap around is done before the cache
+    assert IntValue(0x100000007) is IntValue(7)
+    assert IntValue(0x80000000).value == -0x80000000
+    for value in (IntValue(3), IntValue(1 << 20), BooleanValue(False), FloatValue(0.5)):
+        copy = pickle.loads(pickle.dumps(value))
+        assert type(copy) is type(value) and copy.value == value.value
+    assert pickle.loads(pickle.dumps(BooleanValue(True))) is trueValueInstance
+
+
+def test_literal_constant():
+    program = parse(tokenize("#!script\nlet int x = 100000 + 1\nx"))
+    interpret(program, default_environment())
+    literal = program.body[0].value.left
+    assert isinstance(literal, ast.NumericLiteral)
+    assert literal._constant.value == 100000
+    constant = literal._constant
+    interpret(program, default_environment())
+    assert literal._constant is constant